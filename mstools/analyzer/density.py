@@ -0,0 +1,185 @@
+import numpy as np
+from ..constant import AVOGADRO, NANO
+
+_AXES = {'x': 0, 'y': 1, 'z': 2}
+
+
+class DensityProfile():
+    '''
+    Accumulate the density profile along one axis of the box from trajectory.
+
+    Similar to `gmx density`, the box is divided into fixed number of slices along the axis,
+    and the atoms are assigned to the slices based on their relative coordinates,
+    so that the fluctuation of box size is handled correctly.
+    The mass, number and charge density are accumulated simultaneously.
+
+    The frames can be assigned to different blocks (e.g. pieces of a trajectory),
+    so that the profiles of all blocks are obtained in a single pass over the trajectory.
+
+    Parameters
+    ----------
+    n_atom : int
+        The number of atoms in the trajectory
+    masses : array_like, optional
+        The masses of atoms. Required for mass density
+    charges : array_like, optional
+        The charges of atoms. If not provided, the charges recorded in the frames will be used if available
+    axis : str
+        The axis along which the profile is calculated. Can be 'x', 'y' or 'z'
+    n_bin : int
+        The number of slices along the axis
+    subset : list of int, optional
+        The indexes of atoms to be considered. If not provided, all atoms will be considered
+
+    Examples
+    --------
+    >>> masses, charges = GMX.get_top_atom_properties('topol.top')
+    >>> profile = DensityProfile(len(masses), masses=masses, charges=charges, axis='z')
+    >>> for frame_chunk in trj.iter_frames():
+    >>>     profile.accumulate_chunk(frame_chunk, blocks=(frame_chunk.times - begin) // 200)
+    >>> z, density = profile.get_profile('mass', block=0)
+    '''
+
+    KINDS = ('mass', 'number', 'charge')
+
+    def __init__(self, n_atom, masses=None, charges=None, axis='z', n_bin=50, subset=None):
+        if axis not in _AXES:
+            raise Exception('Invalid axis: %s' % axis)
+        self.axis = _AXES[axis]
+        self.n_bin = n_bin
+        self.n_atom = n_atom
+        self.subset = np.arange(n_atom) if subset is None else np.asarray(subset, dtype=int)
+        self.masses = None if masses is None else np.asarray(masses, dtype=float)[self.subset]
+        self.charges = None if charges is None else np.asarray(charges, dtype=float)[self.subset]
+        if self.masses is not None and len(self.masses) != len(self.subset):
+            raise Exception('Length of masses is different from the number of atoms')
+        if self.charges is not None and len(self.charges) != len(self.subset):
+            raise Exception('Length of charges is different from the number of atoms')
+
+        # block -> [n_frame, sum of box length, sum of profiles in shape of (3, n_bin)]
+        self._blocks = {}
+        self._charge_from_frame = False
+
+    @property
+    def blocks(self):
+        '''
+        The blocks which have at least one frame accumulated
+
+        Returns
+        -------
+        blocks : list of int
+        '''
+        return sorted(self._blocks)
+
+    def _get_block(self, block):
+        if block not in self._blocks:
+            self._blocks[block] = [0, 0., np.zeros((3, self.n_bin))]
+        return self._blocks[block]
+
+    def accumulate(self, frame, block=0):
+        '''
+        Add one frame.
+
+        Parameters
+        ----------
+        frame : Frame
+        block : int
+            The block this frame belongs to
+        '''
+        charges = frame.charges[self.subset] if frame.has_charge else None
+        self.accumulate_positions(frame.positions[self.subset], frame.cell.vectors, block, charges)
+
+    def accumulate_chunk(self, frame_chunk, blocks=None):
+        '''
+        Add a chunk of frames generated by :func:`Trajectory.iter_frames`.
+
+        Parameters
+        ----------
+        frame_chunk : FrameChunk
+        blocks : array_like of int, optional
+            The block each frame belongs to. If not provided, all frames will be assigned to block 0.
+            Frames assigned to negative block will be ignored.
+        '''
+        if blocks is None:
+            blocks = np.zeros(frame_chunk.n_frame, dtype=int)
+        blocks = np.asarray(blocks, dtype=int)
+        for i in range(frame_chunk.n_frame):
+            if blocks[i] < 0:
+                continue
+            charges = frame_chunk.charges[i][self.subset] if frame_chunk.has_charge else None
+            self.accumulate_positions(frame_chunk.positions[i][self.subset], frame_chunk.cells[i], blocks[i], charges)
+
+    def accumulate_positions(self, positions, vectors, block=0, charges=None):
+        '''
+        Add the positions of atoms in one frame.
+
+        Parameters
+        ----------
+        positions : array_like
+            The positions of the atoms in subset in shape of (n, 3)
+        vectors : array_like
+            The box vectors
+        block : int
+            The block this frame belongs to
+        charges : array_like, optional
+            The charges of atoms in subset. Will be ignored if charges are provided at construction.
+        '''
+        vectors = np.asarray(vectors, dtype=float)
+        volume = abs(np.linalg.det(vectors))
+        if volume == 0:
+            raise Exception('Box is required for density profile')
+
+        frac = np.asarray(positions, dtype=float) @ np.linalg.inv(vectors)[:, self.axis]
+        bins = (frac - np.floor(frac)) * self.n_bin
+        bins = np.minimum(bins.astype(int), self.n_bin - 1)
+
+        if self.charges is not None:
+            charges = self.charges
+        elif charges is not None:
+            self._charge_from_frame = True
+        slab_volume = volume / self.n_bin
+        data = self._get_block(block)
+        data[0] += 1
+        data[1] += volume / np.linalg.norm(np.cross(*np.delete(vectors, self.axis, axis=0)))
+        if self.masses is not None:
+            data[2][0] += np.bincount(bins, weights=self.masses, minlength=self.n_bin) / slab_volume
+        data[2][1] += np.bincount(bins, minlength=self.n_bin) / slab_volume
+        if charges is not None:
+            data[2][2] += np.bincount(bins, weights=charges, minlength=self.n_bin) / slab_volume
+
+    def get_profile(self, kind='mass', block=None):
+        '''
+        Get the density profile averaged over the frames.
+
+        Parameters
+        ----------
+        kind : ['mass', 'number', 'charge']
+            The type of density
+        block : int, optional
+            The block to be averaged. If not provided, all the frames will be averaged
+
+        Returns
+        -------
+        coords : np.ndarray
+            The coordinates of the center of slices in nm, based on the average box length along the axis
+        density : np.ndarray
+            The mass density in kg/m^3, number density in 1/nm^3 or charge density in e/nm^3
+        '''
+        if kind not in self.KINDS:
+            raise Exception('Invalid kind: %s' % kind)
+        if kind == 'mass' and self.masses is None:
+            raise Exception('Masses are required for mass density')
+        if kind == 'charge' and self.charges is None and not self._charge_from_frame:
+            raise Exception('Charges are required for charge density')
+
+        blocks = self.blocks if block is None else [block]
+        if len(blocks) == 0 or any(b not in self._blocks for b in blocks):
+            raise Exception('No frame accumulated')
+        n_frame = sum(self._blocks[b][0] for b in blocks)
+        length = sum(self._blocks[b][1] for b in blocks) / n_frame
+        density = sum(self._blocks[b][2][self.KINDS.index(kind)] for b in blocks) / n_frame
+        if kind == 'mass':
+            density = density / AVOGADRO / 1000 / NANO ** 3  # g/mol/nm^3 -> kg/m^3
+
+        coords = (np.arange(self.n_bin) + 0.5) * length / self.n_bin
+        return coords, density
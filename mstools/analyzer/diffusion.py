@@ -0,0 +1,296 @@
+import numpy as np
+from .rdf import AtomGroups
+from .neighbors import minimum_image
+
+_DIMS = {'x': [0], 'y': [1], 'z': [2], 'xy': [0, 1], 'xz': [0, 2], 'yz': [1, 2], 'xyz': [0, 1, 2]}
+
+
+class Unwrapper():
+    '''
+    Unwrap the positions across periodic boundaries frame by frame.
+
+    The displacement of each particle between two successive frames is wrapped with the minimum image convention
+    and accumulated onto the unwrapped position of previous frame.
+    Therefore, the frames should be dense enough so that no particle moves more than half of the box between two frames.
+    Both orthorhombic and triclinic boxes are supported.
+
+    Attributes
+    ----------
+    positions : np.ndarray or None
+        The unwrapped positions of last frame. None means no frame has been unwrapped.
+    '''
+
+    def __init__(self):
+        self.positions = None
+        self._last = None
+
+    def unwrap(self, positions, vectors):
+        '''
+        Unwrap the positions of next frame.
+
+        Parameters
+        ----------
+        positions : array_like
+            The wrapped positions in shape of (n, 3)
+        vectors : array_like
+            The box vectors of this frame
+
+        Returns
+        -------
+        positions : np.ndarray
+            The unwrapped positions
+        '''
+        positions = np.array(positions, dtype=float)
+        if self.positions is None:
+            self.positions = positions
+        else:
+            self.positions = self.positions + minimum_image(positions - self._last, vectors)
+        self._last = positions
+        return self.positions
+
+    def unwrap_frames(self, positions, vectors):
+        '''
+        Unwrap the positions of a series of frames.
+
+        Parameters
+        ----------
+        positions : array_like
+            The wrapped positions in shape of (n_frame, n, 3)
+        vectors : array_like
+            The box vectors of each frame in shape of (n_frame, 3, 3)
+
+        Returns
+        -------
+        positions : np.ndarray
+            The unwrapped positions in shape of (n_frame, n, 3)
+        '''
+        positions = np.asarray(positions, dtype=float)
+        vectors = np.asarray(vectors, dtype=float)
+        result = np.empty(positions.shape)
+        if len(positions) == 0:
+            return result
+
+        first = 0
+        if self.positions is None:
+            self.positions = positions[0].copy()
+            result[0] = self.positions
+            first = 1
+        last = np.concatenate([self._last[np.newaxis], positions[:-1]]) if first == 0 else positions[:-1]
+        displacements = minimum_image(positions[first:] - last, vectors[first:])
+        result[first:] = self.positions + np.cumsum(displacements, axis=0)
+        self.positions = result[-1].copy()
+        self._last = positions[-1].copy()
+        return result
+
+
+def calc_msd(positions, dims='xyz'):
+    '''
+    Calculate the mean squared displacement with all time origins using the FFT algorithm.
+
+    The MSD at lag m is averaged over all the time origins,
+    and it is split into a sum of squares and an autocorrelation term.
+    The autocorrelation is calculated with FFT according to Wiener-Khinchin theorem,
+    so the cost is O(N logN) for a trajectory of N frames.
+
+    Parameters
+    ----------
+    positions : array_like
+        The unwrapped positions in shape of (n_frame, n_particle, 3)
+    dims : str
+        The dimensions for calculating MSD. Can be 'x', 'y', 'z', 'xy', 'xz', 'yz' or 'xyz'
+
+    Returns
+    -------
+    msd : np.ndarray
+        The MSD of each particle at each lag in shape of (n_frame, n_particle)
+    '''
+    if dims not in _DIMS:
+        raise Exception('Invalid dims: %s' % dims)
+    x = np.asarray(positions, dtype=float)[:, :, _DIMS[dims]]
+    n_frame = len(x)
+
+    # the autocorrelation term
+    n_fft = 1 << (2 * n_frame - 1).bit_length()
+    f = np.fft.rfft(x, n=n_fft, axis=0)
+    acf = np.fft.irfft(f * f.conjugate(), n=n_fft, axis=0)[:n_frame].sum(axis=-1)
+    acf /= (n_frame - np.arange(n_frame))[:, np.newaxis]
+
+    # the sum of squares term
+    d = np.sum(x * x, axis=-1)
+    d = np.concatenate([d, np.zeros((1, d.shape[1]))])
+    s1 = np.empty((n_frame, x.shape[1]))
+    q = 2 * d[:-1].sum(axis=0)
+    for m in range(n_frame):
+        q = q - d[m - 1] - d[n_frame - m]
+        s1[m] = q / (n_frame - m)
+
+    return s1 - 2 * acf
+
+
+def fit_diffusion(time, msd, dims='xyz', begin_fit=0.1, end_fit=0.9):
+    '''
+    Fit the diffusion coefficient from the MSD with Einstein relation.
+
+    Similar to `gmx msd`, the error is estimated as the difference of the diffusion coefficients
+    fitted from the two halves of the fitting range.
+
+    Parameters
+    ----------
+    time : array_like
+        The time lags in ps
+    msd : array_like
+        The MSD at each time lag in nm^2
+    dims : str
+        The dimensions of the MSD. Can be 'x', 'y', 'z', 'xy', 'xz', 'yz' or 'xyz'
+    begin_fit : float
+        The start of the fitting range as a fraction of the time range
+    end_fit : float
+        The end of the fitting range as a fraction of the time range
+
+    Returns
+    -------
+    diffusion : float
+        Diffusion coefficient in unit of cm^2/s
+    stderr : float
+        Estimated error in unit of cm^2/s
+    '''
+    if dims not in _DIMS:
+        raise Exception('Invalid dims: %s' % dims)
+    time = np.asarray(time, dtype=float)
+    msd = np.asarray(msd, dtype=float)
+    t0, t1 = time[0] + (time[-1] - time[0]) * np.array([begin_fit, end_fit])
+    mask = (time >= t0) & (time <= t1)
+    if mask.sum() < 4:
+        raise Exception('Not enough data points for fitting diffusion coefficient')
+
+    factor = 1E-2 / (2 * len(dims))  # nm^2/ps to cm^2/s
+    slope = np.polyfit(time[mask], msd[mask], 1)[0]
+    index = np.flatnonzero(mask)
+    half = len(index) // 2
+    slope1 = np.polyfit(time[index[:half]], msd[index[:half]], 1)[0]
+    slope2 = np.polyfit(time[index[half:]], msd[index[half:]], 1)[0]
+    return slope * factor, abs(slope1 - slope2) * factor
+
+
+class MSD():
+    '''
+    Calculate the mean squared displacement of groups (e.g. COM of molecules) from trajectory.
+
+    The COMs of groups are unwrapped and collected frame by frame.
+    The MSD with all time origins is calculated with FFT when requested.
+    The frames should be evenly spaced in time.
+
+    Parameters
+    ----------
+    groups : list of list of Atom or AtomGroups
+        The groups represented by their COM. Use AtomGroups.from_molecule_index if topology is not available
+    dt : float, optional
+        The time interval between frames in ps.
+        If set to None, the simulation time recorded in the frames will be used.
+
+    Attributes
+    ----------
+    n_frame : int
+        The number of frames accumulated
+    times : list of float
+        The simulation time of each frame accumulated
+
+    Examples
+    --------
+    >>> msd = MSD(select_groups(top, by_molecule=True))
+    >>> for frame_chunk in trj.iter_frames():
+    >>>     msd.accumulate_chunk(frame_chunk)
+    >>> time, msd_mean = msd.get_msd(dims='xy')
+    >>> diffusion, stderr = msd.get_diffusion(dims='xy')
+    '''
+
+    def __init__(self, groups, dt=None):
+        self.groups = groups if isinstance(groups, AtomGroups) else AtomGroups(groups)
+        self.dt = dt
+        self._unwrapper = Unwrapper()
+        self._coms = []
+        self.times = []
+
+    @property
+    def n_frame(self):
+        return len(self.times)
+
+    def accumulate(self, frame):
+        '''
+        Add one frame.
+
+        Parameters
+        ----------
+        frame : Frame
+        '''
+        vectors = frame.cell.vectors
+        com = self.groups.calc_com(frame.positions, vectors)
+        self._coms.append(self._unwrapper.unwrap(com, vectors))
+        self.times.append(frame.time)
+
+    def accumulate_chunk(self, frame_chunk):
+        '''
+        Add a chunk of frames generated by :func:`Trajectory.iter_frames`.
+
+        Parameters
+        ----------
+        frame_chunk : FrameChunk
+        '''
+        if frame_chunk.n_frame == 0:
+            return
+        coms = self.groups.calc_com(frame_chunk.positions, frame_chunk.cells)
+        self._coms += list(self._unwrapper.unwrap_frames(coms, frame_chunk.cells))
+        self.times += list(frame_chunk.times)
+
+    def get_msd(self, dims='xyz', per_group=False):
+        '''
+        Get the MSD averaged over all time origins.
+
+        Parameters
+        ----------
+        dims : str
+            The dimensions for calculating MSD. Can be 'x', 'y', 'z', 'xy', 'xz', 'yz' or 'xyz'
+        per_group : bool
+            If set to True, the MSD of each group is returned instead of the average over groups
+
+        Returns
+        -------
+        time : np.ndarray
+            The time lags in ps
+        msd : np.ndarray
+            The MSD in nm^2 in shape of (n_frame,) or (n_frame, n_group) if per_group is True
+        '''
+        if self.n_frame < 2:
+            raise Exception('At least two frames are required')
+        msd = calc_msd(np.array(self._coms), dims)
+        if self.dt is not None:
+            time = np.arange(self.n_frame) * self.dt
+        else:
+            time = np.array(self.times) - self.times[0]
+            if np.any(np.diff(time) <= 0):
+                raise Exception('Time information not available in frames. Set dt explicitly')
+        return time, msd if per_group else msd.mean(axis=1)
+
+    def get_diffusion(self, dims='xyz', begin_fit=0.1, end_fit=0.9):
+        '''
+        Get the diffusion coefficient from the MSD with Einstein relation.
+
+        Parameters
+        ----------
+        dims : str
+        begin_fit : float
+        end_fit : float
+
+        Returns
+        -------
+        diffusion : float
+            Diffusion coefficient in unit of cm^2/s
+        stderr : float
+            Estimated error in unit of cm^2/s
+
+        See Also
+        --------
+        fit_diffusion
+        '''
+        time, msd = self.get_msd(dims)
+        return fit_diffusion(time, msd, dims, begin_fit, end_fit)
@@ -6,10 +6,284 @@ def ew_dot(vec1, vec2):
     '''
     Element-wise dot product
     '''
-    return np.sum(vec1 * vec2, axis=1)
+    return np.sum(vec1 * vec2, axis=-1)
 
 
-class HarmonicBondKernel():
+class ForceAccumulator():
+    '''
+    Scatter-add the forces on the atoms of each term back to the atoms.
+
+    The atom indexes of all terms are flattened into one array at construction,
+    so that the forces can be accumulated with one `np.bincount` call per dimension,
+    instead of looping over all atoms.
+
+    Parameters
+    ----------
+    n_atom : int
+    indexes : array_like
+        The atom indexes of all terms in shape of (n_term, n_atom_per_term)
+    '''
+
+    def __init__(self, n_atom, indexes):
+        self.n_atom = n_atom
+        # the order is a1 of all terms, then a2 of all terms...
+        self.index = np.ascontiguousarray(np.asarray(indexes, dtype=int).T).ravel()
+
+    def accumulate(self, forces_list, out=None):
+        '''
+        Sum up the forces on each atom.
+
+        Parameters
+        ----------
+        forces_list : list of array_like
+            The forces on the first, second, ... atom of all terms.
+            Each element is a np.ndarray of shape (n_term, 3), or (n_frame, n_term, 3) for a stack of frames
+        out : array_like, optional
+            If provided, the forces will be added into this array of shape (n_atom, 3) or (n_frame, n_atom, 3)
+
+        Returns
+        -------
+        forces : array_like
+        '''
+        stacked = np.concatenate(forces_list, axis=-2)
+        if stacked.ndim == 2:
+            if out is None:
+                out = np.zeros((self.n_atom, 3), dtype=np.float64)
+            for d in range(3):
+                out[:, d] += np.bincount(self.index, weights=stacked[:, d], minlength=self.n_atom)
+            return out
+
+        # offset the atom indexes of each frame so that all frames are accumulated at once
+        n_frame = stacked.shape[0]
+        index = (self.index + np.arange(n_frame)[:, np.newaxis] * self.n_atom).ravel()
+        if out is None:
+            out = np.zeros((n_frame, self.n_atom, 3), dtype=np.float64)
+        for d in range(3):
+            out[..., d] += np.bincount(index, weights=stacked[..., d].ravel(),
+                                       minlength=n_frame * self.n_atom).reshape(n_frame, self.n_atom)
+        return out
+
+
+def calc_bond_geometry(positions, a1, a2):
+    '''
+    Calculate the vectors and distances between pairs of atoms
+
+    Returns
+    -------
+    delta : array_like
+        Vectors from atom a1 to atom a2
+    rsq : array_like
+    r : array_like
+    '''
+    delta = positions[..., a2, :] - positions[..., a1, :]
+    rsq = ew_dot(delta, delta)
+    r = np.sqrt(rsq)
+    return delta, rsq, r
+
+
+def calc_angle_geometry(positions, a1, a2, a3):
+    '''
+    Calculate the vectors, lengths and cosine of angles formed by three atoms. a2 is the central atom.
+
+    Returns
+    -------
+    vec1 : array_like
+    vec2 : array_like
+    r1 : array_like
+    r2 : array_like
+    cos : array_like
+    theta : array_like
+    '''
+    vec1 = positions[..., a1, :] - positions[..., a2, :]
+    vec2 = positions[..., a3, :] - positions[..., a2, :]
+    r1 = np.sqrt(ew_dot(vec1, vec1))
+    r2 = np.sqrt(ew_dot(vec2, vec2))
+    cos = ew_dot(vec1, vec2) / r1 / r2
+    np.clip(cos, -1, 1, out=cos)
+    theta = np.arccos(cos)
+    return vec1, vec2, r1, r2, cos, theta
+
+
+def calc_dihedral_geometry(positions, a1, a2, a3, a4):
+    '''
+    Calculate the vectors, normal vectors and value of dihedrals formed by four atoms
+
+    Returns
+    -------
+    vec1 : array_like
+    vec2 : array_like
+    vec3 : array_like
+    n1 : array_like
+    n2 : array_like
+    rsq_n1 : array_like
+    rsq_n2 : array_like
+    cos : array_like
+    phi : array_like
+    '''
+    vec1 = positions[..., a1, :] - positions[..., a2, :]
+    vec2 = positions[..., a3, :] - positions[..., a2, :]
+    vec3 = positions[..., a3, :] - positions[..., a4, :]
+    n1 = np.cross(vec1, vec2)
+    n2 = np.cross(vec2, vec3)
+    rsq_n1 = ew_dot(n1, n1)
+    rsq_n2 = ew_dot(n2, n2)
+    cos = ew_dot(n1, n2) / np.sqrt(rsq_n1 * rsq_n2)
+    np.clip(cos, -1, 1, out=cos)
+    sign = np.where(ew_dot(vec1, n2) < 0, -1., 1.)
+    phi = sign * np.arccos(cos)
+    return vec1, vec2, vec3, n1, n2, rsq_n1, rsq_n2, cos, phi
+
+
+def calc_dihedral_forces(geometry, factor):
+    '''
+    Distribute (-dE / d phi) of dihedrals to the four atoms. Copied from OpenMM
+
+    Parameters
+    ----------
+    geometry : tuple
+        The result of :func:`calc_dihedral_geometry`
+    factor : array_like
+        (-dE / d phi) of each dihedral
+
+    Returns
+    -------
+    forces_list : list of array_like
+        The forces on a1, a2, a3 and a4 of each dihedral
+    '''
+    vec1, vec2, vec3, n1, n2, rsq_n1, rsq_n2, cos, phi = geometry
+    rsq2 = ew_dot(vec2, vec2)
+    r2 = np.sqrt(rsq2)
+
+    factor1 = factor * r2 / rsq_n1
+    factor4 = -factor * r2 / rsq_n2
+
+    forces_a1 = factor1[..., np.newaxis] * n1
+    forces_a4 = factor4[..., np.newaxis] * n2
+
+    factor2 = ew_dot(vec1, vec2) / rsq2
+    factor3 = ew_dot(vec3, vec2) / rsq2
+
+    s = factor2[..., np.newaxis] * forces_a1 - factor3[..., np.newaxis] * forces_a4
+
+    forces_a2 = -forces_a1 + s
+    forces_a3 = -forces_a4 - s
+
+    return [forces_a1, forces_a2, forces_a3, forces_a4]
+
+
+class EnergyKernel():
+    '''
+    Base class of energy kernels.
+
+    The evaluation is split into two steps.
+    :func:`calc_geometry` calculates the geometry (distances, angles or dihedrals) of all terms from positions,
+    then :func:`calc_energy_forces` calculates the energy of each term and the forces on the atoms of each term.
+    The forces are then summed up for each atom by a :class:`ForceAccumulator`.
+    These two methods should be implemented by subclasses.
+
+    The positions can be either a single configuration of shape (n_atom, 3)
+    or a stack of configurations of shape (n_frame, n_atom, 3).
+
+    Attributes
+    ----------
+    geometry : str
+        The type of geometry this kernel depends on. Can be 'bond', 'angle' or 'dihedral'
+    positions : array_like
+        The positions the kernel is constructed with
+    accumulator : ForceAccumulator
+    '''
+
+    geometry = None
+
+    def calc_geometry(self, positions=None):
+        '''
+        Calculate the geometry of all terms
+
+        Parameters
+        ----------
+        positions : array_like, optional
+            If not provided, the positions this kernel is constructed with will be used
+
+        Returns
+        -------
+        geometry : tuple of array_like
+        '''
+        raise NotImplementedError('Method not implemented')
+
+    def calc_energy_forces(self, geometry):
+        '''
+        Calculate the energy of each term and the forces on the atoms of each term from geometry
+
+        Parameters
+        ----------
+        geometry : tuple of array_like
+            The result of :func:`calc_geometry`
+
+        Returns
+        -------
+        value : array_like
+        energy : array_like
+        forces_list : list of array_like
+        '''
+        raise NotImplementedError('Method not implemented')
+
+    def evaluate(self):
+        '''
+        Evaluate the positions this kernel is constructed with
+
+        Returns
+        -------
+        value : array_like
+            The geometry value (distance, angle or dihedral) of each term
+        energy : array_like
+            The energy of each term
+        forces : array_like
+            The forces on all atoms. It's a np.ndarray of shape (n_atom, 3)
+        '''
+        value, energy, forces_list = self.calc_energy_forces(self.calc_geometry())
+        return value, energy, self.accumulator.accumulate(forces_list)
+
+    def evaluate_frames(self, positions, chunk=100, calc_forces=True):
+        '''
+        Evaluate a stack of configurations, e.g. the frames read from a trajectory.
+
+        The frames are evaluated in vectorized form, `chunk` frames at a time,
+        so that the memory used by the intermediate arrays is bounded.
+
+        Parameters
+        ----------
+        positions : array_like
+            The positions of all frames in shape of (n_frame, n_atom, 3)
+        chunk : int
+            Number of frames evaluated at the same time
+        calc_forces : bool
+            If set to False, the forces will not be accumulated and None will be returned for forces
+
+        Returns
+        -------
+        energies : array_like
+            The total energy of all terms in each frame. It's a np.ndarray of shape (n_frame,)
+        forces : array_like or None
+            The forces on all atoms in each frame. It's a np.ndarray of shape (n_frame, n_atom, 3)
+        '''
+        n_frame = len(positions)
+        if n_frame > 0 and np.shape(positions[0]) != (self.accumulator.n_atom, 3):
+            raise Exception('The shape of positions should be (n_frame, %i, 3)' % self.accumulator.n_atom)
+
+        energies = np.zeros(n_frame, dtype=np.float64)
+        forces = np.zeros((n_frame, self.accumulator.n_atom, 3), dtype=np.float64) if calc_forces else None
+        for begin in range(0, n_frame, chunk):
+            end = min(begin + chunk, n_frame)
+            block = np.asarray(positions[begin:end], dtype=np.float64)
+            _, energy, forces_list = self.calc_energy_forces(self.calc_geometry(block))
+            energies[begin:end] = energy.sum(axis=-1)
+            if calc_forces:
+                self.accumulator.accumulate(forces_list, out=forces[begin:end])
+
+        return energies, forces
+
+
+class HarmonicBondKernel(EnergyKernel):
     '''
     E = k (r-r0)^2
 
@@ -20,6 +294,8 @@ class HarmonicBondKernel():
     parameters : list of list of float
     '''
 
+    geometry = 'bond'
+
     def __init__(self, positions, indexes, parameters):
         self.positions = np.array(positions, dtype=np.float64)
         self.indexes = np.array(indexes, dtype=int)
@@ -28,30 +304,30 @@ class HarmonicBondKernel():
         self.parameters = np.array(parameters, dtype=np.float64)
         self.r0 = self.parameters[:, 0]
         self.k = self.parameters[:, 1]
+        self.accumulator = ForceAccumulator(len(self.positions), self.indexes)
 
-    def evaluate(self):
-        delta = self.positions[self.a2] - self.positions[self.a1]
-        rsq = ew_dot(delta, delta)
-        r = np.sqrt(rsq)
-        energy = self.k * (r - self.r0) ** 2
+    def calc_geometry(self, positions=None):
+        if positions is None:
+            positions = self.positions
+        return calc_bond_geometry(positions, self.a1, self.a2)
 
-        forces_a1 = (2 * self.k * (r - self.r0) / r)[:, np.newaxis] * delta
+    def calc_energy_forces(self, geometry):
+        delta, rsq, r = geometry
+        energy = self.k * (r - self.r0) ** 2
 
-        forces = np.zeros(self.positions.shape, dtype=np.float64)
-        # TODO vectorize this loop
-        for i in range(self.positions.shape[0]):
-            forces[i] += forces_a1[self.a1 == i].sum(axis=0)
-            forces[i] -= forces_a1[self.a2 == i].sum(axis=0)
+        forces_a1 = (2 * self.k * (r - self.r0) / r)[..., np.newaxis] * delta
 
-        return r, energy, forces
+        return r, energy, [forces_a1, -forces_a1]
 
 
-class HarmonicAngleKernel():
+class HarmonicAngleKernel(EnergyKernel):
     '''
     E = k (theta-theta0)^2
 
     '''
 
+    geometry = 'angle'
+
     def __init__(self, positions, indexes, parameters):
         self.positions = np.array(positions, dtype=np.float64)
         self.indexes = np.array(indexes, dtype=int)
@@ -61,15 +337,15 @@ class HarmonicAngleKernel():
         self.parameters = np.array(parameters, dtype=np.float64)
         self.theta0 = self.parameters[:, 0]
         self.k = self.parameters[:, 1]
+        self.accumulator = ForceAccumulator(len(self.positions), self.indexes)
 
-    def evaluate(self):
-        vec1 = self.positions[self.a1] - self.positions[self.a2]
-        vec2 = self.positions[self.a3] - self.positions[self.a2]
-        r1 = np.sqrt(ew_dot(vec1, vec1))
-        r2 = np.sqrt(ew_dot(vec2, vec2))
-        cos = ew_dot(vec1, vec2) / r1 / r2
-        np.clip(cos, -1, 1, out=cos)
-        theta = np.arccos(cos)
+    def calc_geometry(self, positions=None):
+        if positions is None:
+            positions = self.positions
+        return calc_angle_geometry(positions, self.a1, self.a2, self.a3)
+
+    def calc_energy_forces(self, geometry):
+        vec1, vec2, r1, r2, cos, theta = geometry
         energy = self.k * (theta - self.theta0) ** 2
 
         sin = np.sqrt(1 - cos * cos)
@@ -80,25 +356,20 @@ class HarmonicAngleKernel():
         c12 = factor / r1 / r2
         c31 = -factor * cos / r2 / r2
 
-        forces_a1 = c11[:, np.newaxis] * vec1 + c12[:, np.newaxis] * vec2
-        forces_a3 = c31[:, np.newaxis] * vec2 + c12[:, np.newaxis] * vec1
-
-        forces = np.zeros(self.positions.shape, dtype=np.float64)
-        # TODO vectorize this loop
-        for i in range(self.positions.shape[0]):
-            forces[i] += forces_a1[self.a1 == i].sum(axis=0)
-            forces[i] += forces_a3[self.a3 == i].sum(axis=0)
-            forces[i] -= forces_a1[self.a2 == i].sum(axis=0) + forces_a3[self.a2 == i].sum(axis=0)
+        forces_a1 = c11[..., np.newaxis] * vec1 + c12[..., np.newaxis] * vec2
+        forces_a3 = c31[..., np.newaxis] * vec2 + c12[..., np.newaxis] * vec1
 
-        return theta, energy, forces
+        return theta, energy, [forces_a1, -forces_a1 - forces_a3, forces_a3]
 
 
-class OplsTorsionKernel():
+class OplsTorsionKernel(EnergyKernel):
     '''
     E = k1 (1+cos(phi)) + k2 (1-cos(2 phi)) + k3 (1+cos(3 phi)) + k4 (1-cos(4 phi))
 
     '''
 
+    geometry = 'dihedral'
+
     def __init__(self, positions, indexes, parameters):
         self.positions = np.array(positions, dtype=np.float64)
         self.indexes = np.array(indexes, dtype=int)
@@ -111,20 +382,16 @@ class OplsTorsionKernel():
         self.k2 = self.parameters[:, 1]
         self.k3 = self.parameters[:, 2]
         self.k4 = self.parameters[:, 3]
+        self.accumulator = ForceAccumulator(len(self.positions), self.indexes)
 
-    def evaluate(self):
-        vec1 = self.positions[self.a1] - self.positions[self.a2]
-        vec2 = self.positions[self.a3] - self.positions[self.a2]
-        vec3 = self.positions[self.a3] - self.positions[self.a4]
-        n1 = np.cross(vec1, vec2)
-        n2 = np.cross(vec2, vec3)
-        rsq_n1 = ew_dot(n1, n1)
-        rsq_n2 = ew_dot(n2, n2)
-        cos = ew_dot(n1, n2) / np.sqrt(rsq_n1 * rsq_n2)
-        np.clip(cos, -1, 1, out=cos)
-        sign = np.ones(vec1.shape[0])
-        sign[ew_dot(vec1, n2) < 0] = -1
-        phi = sign * np.arccos(cos)
+    def calc_geometry(self, positions=None):
+        if positions is None:
+            positions = self.positions
+        return calc_dihedral_geometry(positions, self.a1, self.a2, self.a3, self.a4)
+
+    def calc_energy_forces(self, geometry):
+        cos = geometry[-2]
+        phi = geometry[-1]
 
         c0 = self.k1 + 2 * self.k2 + self.k3
         c1 = self.k1 - 3 * self.k3
@@ -143,42 +410,17 @@ class OplsTorsionKernel():
                   + 3 * c3 * cos2 * sin
                   + 4 * c4 * cos3 * sin)
 
-        ### (d phi / d ri) copied from OpenMM
-        rsq2 = ew_dot(vec2, vec2)
-        r2 = np.sqrt(rsq2)
-
-        factor1 = factor * r2 / rsq_n1
-        factor4 = -factor * r2 / rsq_n2
-
-        forces_a1 = factor1[:, np.newaxis] * n1
-        forces_a4 = factor4[:, np.newaxis] * n2
-
-        factor2 = ew_dot(vec1, vec2) / rsq2
-        factor3 = ew_dot(vec3, vec2) / rsq2
-
-        s = factor2[:, np.newaxis] * forces_a1 - factor3[:, np.newaxis] * forces_a4
+        return phi, energy, calc_dihedral_forces(geometry, factor)
 
-        forces_a2 = -forces_a1 + s
-        forces_a3 = -forces_a4 - s
-        ###
 
-        forces = np.zeros(self.positions.shape, dtype=np.float64)
-        # TODO vectorize this loop
-        for i in range(self.positions.shape[0]):
-            forces[i] += forces_a1[self.a1 == i].sum(axis=0)
-            forces[i] += forces_a2[self.a2 == i].sum(axis=0)
-            forces[i] += forces_a3[self.a3 == i].sum(axis=0)
-            forces[i] += forces_a4[self.a4 == i].sum(axis=0)
-
-        return phi, energy, forces
-
-
-class HarmonicTorsionKernel():
+class HarmonicTorsionKernel(EnergyKernel):
     '''
     E = k (phi-phi0)^2
 
     '''
 
+    geometry = 'dihedral'
+
     def __init__(self, positions, indexes, parameters):
         self.positions = np.array(positions, dtype=np.float64)
         self.indexes = np.array(indexes, dtype=int)
@@ -189,74 +431,38 @@ class HarmonicTorsionKernel():
         self.parameters = np.array(parameters, dtype=np.float64)
         self.phi0 = self.parameters[:, 0]
         self.k = self.parameters[:, 1]
+        self.accumulator = ForceAccumulator(len(self.positions), self.indexes)
 
-    def evaluate(self):
-        vec1 = self.positions[self.a1] - self.positions[self.a2]
-        vec2 = self.positions[self.a3] - self.positions[self.a2]
-        vec3 = self.positions[self.a3] - self.positions[self.a4]
-        n1 = np.cross(vec1, vec2)
-        n2 = np.cross(vec2, vec3)
-        rsq_n1 = ew_dot(n1, n1)
-        rsq_n2 = ew_dot(n2, n2)
-        cos = ew_dot(n1, n2) / np.sqrt(rsq_n1 * rsq_n2)
-        np.clip(cos, -1, 1, out=cos)
-        sign = np.ones(vec1.shape[0])
-        sign[ew_dot(vec1, n2) < 0] = -1
-        phi = sign * np.arccos(cos)
+    def calc_geometry(self, positions=None):
+        if positions is None:
+            positions = self.positions
+        return calc_dihedral_geometry(positions, self.a1, self.a2, self.a3, self.a4)
+
+    def calc_energy_forces(self, geometry):
+        phi = geometry[-1]
 
         d_phi = phi - self.phi0
         d_phi_abs = np.abs(d_phi)
         d_phi_2pi = 2 * np.pi - d_phi_abs
-        d_phi_min = np.min([d_phi_abs, d_phi_2pi], axis=0)
+        d_phi_min = np.minimum(d_phi_abs, d_phi_2pi)
         energy = self.k * d_phi_min ** 2
 
         ### (-dE / d phi)
         factor = - 2 * self.k * d_phi_min
+        factor[d_phi_2pi < d_phi_abs] *= -1
+        factor[d_phi < 0] *= -1
 
-        sign.fill(1)
-        sign[d_phi_2pi < d_phi_abs] = -1
-        factor *= sign
-
-        sign.fill(1)
-        sign[d_phi < 0] = -1
-        factor *= sign
-
-        ### (d phi / d ri) copied from OpenMM
-        rsq2 = ew_dot(vec2, vec2)
-        r2 = np.sqrt(rsq2)
-
-        factor1 = factor * r2 / rsq_n1
-        factor4 = -factor * r2 / rsq_n2
-
-        forces_a1 = factor1[:, np.newaxis] * n1
-        forces_a4 = factor4[:, np.newaxis] * n2
-
-        factor2 = ew_dot(vec1, vec2) / rsq2
-        factor3 = ew_dot(vec3, vec2) / rsq2
-
-        s = factor2[:, np.newaxis] * forces_a1 - factor3[:, np.newaxis] * forces_a4
+        return phi, energy, calc_dihedral_forces(geometry, factor)
 
-        forces_a2 = -forces_a1 + s
-        forces_a3 = -forces_a4 - s
-        ###
 
-        forces = np.zeros(self.positions.shape, dtype=np.float64)
-        # TODO vectorize this loop
-        for i in range(self.positions.shape[0]):
-            forces[i] += forces_a1[self.a1 == i].sum(axis=0)
-            forces[i] += forces_a2[self.a2 == i].sum(axis=0)
-            forces[i] += forces_a3[self.a3 == i].sum(axis=0)
-            forces[i] += forces_a4[self.a4 == i].sum(axis=0)
-
-        return phi, energy, forces
-
-
-class ConstrainedTorsionKernel():
+class ConstrainedTorsionKernel(EnergyKernel):
     '''
     E = k (1-cos(phi-phi0))
 
     '''
 
+    geometry = 'dihedral'
+
     def __init__(self, positions, indexes, parameters):
         self.positions = np.array(positions, dtype=np.float64)
         self.indexes = np.array(indexes, dtype=int)
@@ -267,20 +473,15 @@ class ConstrainedTorsionKernel():
         self.parameters = np.array(parameters, dtype=np.float64)
         self.phi0 = self.parameters[:, 0]
         self.k = self.parameters[:, 1]
+        self.accumulator = ForceAccumulator(len(self.positions), self.indexes)
 
-    def evaluate(self):
-        vec1 = self.positions[self.a1] - self.positions[self.a2]
-        vec2 = self.positions[self.a3] - self.positions[self.a2]
-        vec3 = self.positions[self.a3] - self.positions[self.a4]
-        n1 = np.cross(vec1, vec2)
-        n2 = np.cross(vec2, vec3)
-        rsq_n1 = ew_dot(n1, n1)
-        rsq_n2 = ew_dot(n2, n2)
-        cos = ew_dot(n1, n2) / np.sqrt(rsq_n1 * rsq_n2)
-        np.clip(cos, -1, 1, out=cos)
-        sign = np.ones(vec1.shape[0])
-        sign[ew_dot(vec1, n2) < 0] = -1
-        phi = sign * np.arccos(cos)
+    def calc_geometry(self, positions=None):
+        if positions is None:
+            positions = self.positions
+        return calc_dihedral_geometry(positions, self.a1, self.a2, self.a3, self.a4)
+
+    def calc_energy_forces(self, geometry):
+        phi = geometry[-1]
 
         d_phi = phi - self.phi0
         energy = self.k * (1 - np.cos(d_phi))
@@ -288,41 +489,16 @@ class ConstrainedTorsionKernel():
         ### (-dE / d phi)
         factor = -self.k * np.sin(d_phi)
 
-        ### (d phi / d ri) copied from OpenMM
-        rsq2 = ew_dot(vec2, vec2)
-        r2 = np.sqrt(rsq2)
-
-        factor1 = factor * r2 / rsq_n1
-        factor4 = -factor * r2 / rsq_n2
-
-        forces_a1 = factor1[:, np.newaxis] * n1
-        forces_a4 = factor4[:, np.newaxis] * n2
-
-        factor2 = ew_dot(vec1, vec2) / rsq2
-        factor3 = ew_dot(vec3, vec2) / rsq2
-
-        s = factor2[:, np.newaxis] * forces_a1 - factor3[:, np.newaxis] * forces_a4
-
-        forces_a2 = -forces_a1 + s
-        forces_a3 = -forces_a4 - s
-        ###
-
-        forces = np.zeros(self.positions.shape, dtype=np.float64)
-        # TODO vectorize this loop
-        for i in range(self.positions.shape[0]):
-            forces[i] += forces_a1[self.a1 == i].sum(axis=0)
-            forces[i] += forces_a2[self.a2 == i].sum(axis=0)
-            forces[i] += forces_a3[self.a3 == i].sum(axis=0)
-            forces[i] += forces_a4[self.a4 == i].sum(axis=0)
+        return phi, energy, calc_dihedral_forces(geometry, factor)
 
-        return phi, energy, forces
 
-
-class NonbondedKernel():
+class NonbondedKernel(EnergyKernel):
     '''
     E = 4 * eps*((sig/r)^12 - (sig/r)^6) + 138.935455 * qq/r
     '''
 
+    geometry = 'bond'
+
     def __init__(self, positions, indexes, parameters):
         self.positions = np.array(positions, dtype=np.float64)
         self.indexes = np.array(indexes, dtype=int)
@@ -333,23 +509,67 @@ class NonbondedKernel():
         self.c6 = 4 * self.parameters[:, 0] * self.parameters[:, 1] ** 6
         self.qq = self.parameters[:, 2]
         self.qqconv = constant.ONE_4PI_EPS0
+        self.accumulator = ForceAccumulator(len(self.positions), self.indexes)
 
-    def evaluate(self):
-        delta = self.positions[self.a2] - self.positions[self.a1]
-        rsq = ew_dot(delta, delta)
-        r = np.sqrt(rsq)
+    def calc_geometry(self, positions=None):
+        if positions is None:
+            positions = self.positions
+        return calc_bond_geometry(positions, self.a1, self.a2)
+
+    def calc_energy_forces(self, geometry):
+        delta, rsq, r = geometry
         r6 = r ** 6
         r12 = r6 * r6
         energy = self.c12 / r12 - self.c6 / r6 + self.qqconv * self.qq / r
 
         forces_a1 = -(12 * self.c12 / r12 / rsq - 6 * self.c6 / r6 / rsq
                       + self.qqconv * self.qq / rsq / r) \
-            [:, np.newaxis] * delta
+            [..., np.newaxis] * delta
+
+        return r, energy, [forces_a1, -forces_a1]
 
-        forces = np.zeros(self.positions.shape, dtype=np.float64)
-        # TODO vectorize this loop
-        for i in range(self.positions.shape[0]):
-            forces[i] += forces_a1[self.a1 == i].sum(axis=0)
-            forces[i] -= forces_a1[self.a2 == i].sum(axis=0)
 
-        return r, energy, forces
+def evaluate_all(kernels):
+    '''
+    Evaluate several kernels and sum up the energies and forces.
+
+    All the kernels should be constructed with the same positions.
+    The geometry (distances, angles or dihedrals) is calculated only once
+    for the kernels sharing the same type of geometry and the same atom indexes,
+    e.g. a OplsTorsionKernel and a HarmonicTorsionKernel constructed from the same list of dihedrals.
+    The forces of all kernels are accumulated into one array.
+
+    Parameters
+    ----------
+    kernels : list of kernel
+
+    Returns
+    -------
+    energy : float
+        The total energy of all terms in all kernels
+    forces : array_like
+        The total forces on all atoms. It's a np.ndarray of shape (n_atom, 3)
+    '''
+    if len(kernels) == 0:
+        raise Exception('At least one kernel should be provided')
+    positions = kernels[0].positions
+    n_atom = len(positions)
+    # the geometry is shared by atom indexes, which is valid only if the positions are identical
+    if any(kernel.positions is not positions and not np.array_equal(kernel.positions, positions)
+           for kernel in kernels):
+        raise Exception('All kernels should be constructed with the same positions')
+
+    energy = 0.
+    forces = np.zeros((n_atom, 3), dtype=np.float64)
+    _geometry_cache = {}
+    for kernel in kernels:
+        key = (kernel.geometry, kernel.indexes.shape, kernel.indexes.tobytes())
+        geometry = _geometry_cache.get(key)
+        if geometry is None:
+            geometry = kernel.calc_geometry()
+            _geometry_cache[key] = geometry
+        _, e, forces_list = kernel.calc_energy_forces(geometry)
+        energy += e.sum()
+        kernel.accumulator.accumulate(forces_list, out=forces)
+
+    return energy, forces
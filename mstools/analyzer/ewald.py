@@ -1,10 +1,11 @@
 import math
 import numpy as np
 from ..constant import *
+from .neighbors import find_pairs, find_pairs_minimum_image
 
 
 class EwaldSum():
-    def __init__(self, charges, positions, box, cutoff=1.2, tolerance=5E-4):
+    def __init__(self, charges, positions, box, cutoff=1.2, tolerance=5E-4, pme_order=5):
         self.charges = np.array(charges)
         self.positions = np.array(positions)
         self.n_atom = len(self.charges)
@@ -13,10 +14,9 @@ class EwaldSum():
         self.reciprocal_box = 2 * PI / self.box
         self.cutoff = cutoff
         self.tolerance = tolerance
+        self.pme_order = pme_order
 
         self.alpha, self.kmax_x, self.kmax_y, self.kmax_z = self.calc_ewald_parameters()
-        self.eikr = self.calc_eikr()  # exp(ikr)
-        self.eikr_conj = np.conj(self.eikr)
 
     def calc_ewald_parameters(self):
         def get_kmax(width, alpha, tolerance, guess):
@@ -48,18 +48,6 @@ class EwaldSum():
 
         return alpha, kmaxx, kmaxy, kmaxz
 
-    def calc_eikr(self):
-        kmax = max(self.kmax_x, self.kmax_y, self.kmax_z)
-        array = np.zeros((kmax, self.n_atom, 3), dtype=complex)
-        for n in range(self.n_atom):
-            for d in range(3):
-                array[0][n][d] = complex(1, 0)
-                array[1][n][d] = complex(math.cos(self.positions[n][d] * self.reciprocal_box[d]),
-                                         math.sin(self.positions[n][d] * self.reciprocal_box[d]))
-                for k in range(2, kmax):
-                    array[k][n][d] = array[k - 1][n][d] * array[1][n][d]
-        return array
-
     def distance(self, pos1, pos2, cutoff=None):
         delta = pos2 - pos1
         if cutoff is None:
@@ -72,83 +60,303 @@ class EwaldSum():
         r = 0 if r > cutoff else r
         return delta, r
 
-    def calc_energy_forces(self, ewald=True):
+    def calc_energy_forces(self, ewald=True, pme=False):
+        '''
+        Calculate the electrostatic energy and forces.
+
+        Parameters
+        ----------
+        ewald : bool
+            If set to False, the plain Coulomb interactions between all pairs without PBC will be calculated
+        pme : bool
+            If set to True, the reciprocal space part will be calculated with smooth particle mesh Ewald
+            instead of the explicit summation over k-vectors
+
+        Returns
+        -------
+        energy : float
+        forces : array_like
+        '''
         if ewald:
             e_short, f_short = self.calc_ewald_short()
-            e_long, f_long = self.calc_ewald_long()
+            if pme:
+                e_long, f_long = self.calc_pme_long()
+            else:
+                e_long, f_long = self.calc_ewald_long()
             e_self = self.calc_ewald_self()
             return e_short + e_long + e_self, f_short + f_long
 
+        return self.calc_coulomb_no_cutoff()
+
+    def calc_coulomb_no_cutoff(self, chunk=1000000):
+        '''
+        Calculate the plain Coulomb energy and forces between all pairs of atoms without cutoff and PBC.
+
+        The pairs are processed block by block in vectorized form.
+        Each block contains about `chunk` pairs so that the memory usage is bounded.
+
+        Parameters
+        ----------
+        chunk : int
+
+        Returns
+        -------
+        energy : float
+        forces : array_like
+        '''
         energy = 0
         forces = np.zeros((self.n_atom, 3))
-        for i in range(self.n_atom):
-            for j in range(i + 1, self.n_atom):
-                delta, r = self.distance(self.positions[i], self.positions[j])
-                e = ONE_4PI_EPS0 * self.charges[i] * self.charges[j] / r
-                energy += e
-                for d in range(3):
-                    dEdR = e / r / r * delta[d]
-                    forces[i][d] -= dEdR
-                    forces[j][d] += dEdR
+        n_row = max(1, chunk // max(self.n_atom, 1))
+        for begin in range(0, self.n_atom, n_row):
+            rows = np.arange(begin, min(begin + n_row, self.n_atom))
+            delta = self.positions[np.newaxis, :, :] - self.positions[rows, np.newaxis, :]
+            mask = np.arange(self.n_atom)[np.newaxis, :] > rows[:, np.newaxis]
+            rsq = np.sum(delta * delta, axis=-1)
+            rsq[~mask] = 1
+            e = ONE_4PI_EPS0 * self.charges[rows, np.newaxis] * self.charges[np.newaxis, :] / np.sqrt(rsq)
+            e[~mask] = 0
+            energy += e.sum()
+            dEdR = (e / rsq)[..., np.newaxis] * delta
+            forces[rows] -= dEdR.sum(axis=1)
+            forces += dEdR.sum(axis=0)
         return energy, forces
 
+    def find_pairs_minimum_image(self, chunk=1000000):
+        '''
+        Find the pairs within cutoff by checking all pairs of atoms with minimum image convention.
+
+        It is used for the short-range interactions when the cutoff is not smaller than half of the box,
+        in which case the cell list is not applicable.
+        Only the minimum image of each pair is considered.
+        The pairs are processed block by block so that the memory usage is bounded.
+
+        Parameters
+        ----------
+        chunk : int
+
+        Returns
+        -------
+        i : np.ndarray of int
+        j : np.ndarray of int
+        delta : np.ndarray of float
+        r : np.ndarray of float
+        '''
+        return find_pairs_minimum_image(self.positions, self.cutoff, np.diag(self.box), chunk=chunk)
+
     def calc_ewald_short(self):
-        energy = 0
+        '''
+        Calculate the short-range part of Ewald summation.
+
+        The pairs within cutoff are found with cell list.
+        If the cutoff is not smaller than half of the box, all pairs are checked with minimum image convention instead.
+
+        Returns
+        -------
+        energy : float
+        forces : array_like
+        '''
+        from scipy.special import erfc
+
+        if self.cutoff < self.box.min() / 2:
+            i, j, delta, r = find_pairs(self.positions, self.cutoff, np.diag(self.box))
+        else:
+            i, j, delta, r = self.find_pairs_minimum_image()
+        mask = r > 0
+        i, j, delta, r = i[mask], j[mask], delta[mask], r[mask]
+        e = ONE_4PI_EPS0 * self.charges[i] * self.charges[j] / r
+        alpha_r = self.alpha * r
+        erfc_alpha_r = erfc(alpha_r)
+        energy = (e * erfc_alpha_r).sum()
+        dEdR = (e / r / r * erfc_alpha_r
+                + e * (-2 / PI_SQRT * np.exp(-alpha_r * alpha_r)) * self.alpha * (-1 / r))[:, np.newaxis] * delta
         forces = np.zeros((self.n_atom, 3))
-        for i in range(self.n_atom):
-            for j in range(i + 1, self.n_atom):
-                delta, r = self.distance(self.positions[i], self.positions[j], self.cutoff)
-                if r > 0:
-                    e = ONE_4PI_EPS0 * self.charges[i] * self.charges[j] / r
-                    alpha_r = self.alpha * r
-                    energy += e * math.erfc(alpha_r)
-                    for d in range(3):
-                        dEdR = e / r / r * delta[d] * math.erfc(alpha_r) \
-                               + e * (-2 / PI_SQRT * math.exp(-alpha_r * alpha_r)) \
-                               * self.alpha * (-delta[d] / r)
-                        forces[i][d] -= dEdR
-                        forces[j][d] += dEdR
+        for d in range(3):
+            forces[:, d] -= np.bincount(i, weights=dEdR[:, d], minlength=self.n_atom)
+            forces[:, d] += np.bincount(j, weights=dEdR[:, d], minlength=self.n_atom)
         return energy, forces
 
-    def calc_ewald_long(self):
+    def get_k_vectors(self):
+        '''
+        Get all the k-vectors in half of the reciprocal space.
+
+        Because S(-k) is the conjugate of S(k), only the k-vectors with
+        ix > 0, or ix = 0 and iy > 0, or ix = iy = 0 and iz > 0 are required.
+
+        Returns
+        -------
+        k_vectors : array_like
+            It's a np.ndarray of shape (n_k, 3)
+        '''
+        ix, iy, iz = np.meshgrid(np.arange(0, self.kmax_x),
+                                 np.arange(1 - self.kmax_y, self.kmax_y),
+                                 np.arange(1 - self.kmax_z, self.kmax_z), indexing='ij')
+        ix, iy, iz = ix.ravel(), iy.ravel(), iz.ravel()
+        mask = (ix > 0) | ((ix == 0) & (iy > 0)) | ((ix == 0) & (iy == 0) & (iz > 0))
+        return np.array([ix[mask], iy[mask], iz[mask]]).T * self.reciprocal_box
+
+    def calc_ewald_long(self, chunk=1000000):
+        '''
+        Calculate the reciprocal space energy and forces by explicit summation over k-vectors.
+
+        The structure factors of a bunch of k-vectors are calculated at the same time in vectorized form.
+        Each bunch contains about `chunk` (k-vector, atom) pairs so that the memory usage is bounded.
+
+        Parameters
+        ----------
+        chunk : int
+
+        Returns
+        -------
+        energy : float
+        forces : array_like
+        '''
         factor_ewald = -1 / (4 * self.alpha ** 2)
         factor_energy = 1 / (2 * self.volume * VACUUM_PERMITTIVITY) \
                         * ELEMENTARY_CHARGE ** 2 / NANO / 1000 * AVOGADRO
         energy = 0
         forces = np.zeros((self.n_atom, 3))
-        qxyz = np.zeros(self.n_atom, dtype=complex)
-        # for ix in range(-self.kmax_x + 1, self.kmax_x):
-        #     for iy in range(-self.kmax_y + 1, self.kmax_y):
-        #         for iz in range(-self.kmax_z + 1, self.kmax_z):
-        iy_low = 0
-        iz_low = 1
-        for ix in range(0, self.kmax_x):
-            kx = ix * self.reciprocal_box[0]
-            for iy in range(iy_low, self.kmax_y):
-                ky = iy * self.reciprocal_box[1]
-                for iz in range(iz_low, self.kmax_z):
-                    kz = iz * self.reciprocal_box[2]
-                    S_k = complex(0, 0)
-                    for j in range(self.n_atom):
-                        eikr_x = self.eikr[ix][j][0] if ix >= 0 else self.eikr_conj[-ix][j][0]
-                        eikr_y = self.eikr[iy][j][1] if iy >= 0 else self.eikr_conj[-iy][j][1]
-                        eikr_z = self.eikr[iz][j][2] if iz >= 0 else self.eikr_conj[-iz][j][2]
-                        qxyz[j] = self.charges[j] * eikr_x * eikr_y * eikr_z
-                        S_k += qxyz[j]
-                    k2 = kx * kx + ky * ky + kz * kz
-                    ak = math.exp(k2 * factor_ewald) / k2
-                    energy += ak * (S_k.real ** 2 + S_k.imag ** 2)
-                    for j in range(self.n_atom):
-                        # force = -1/(2V*eps0)*ak*d(S(k)S(-k))/dRj
-                        # f*k=dS(k)/dRj*S(-k)+S(K)*dS(-k)/dRj
-                        f = 2 * (qxyz[j].real * S_k.imag - qxyz[j].imag * S_k.real)
-                        forces[j][0] -= ak * f * kx
-                        forces[j][1] -= ak * f * ky
-                        forces[j][2] -= ak * f * kz
-                iz_low = 1 - self.kmax_z
-            iy_low = 1 - self.kmax_y
+        k_vectors = self.get_k_vectors()
+        n_k = max(1, chunk // max(self.n_atom, 1))
+        for begin in range(0, len(k_vectors), n_k):
+            kvec = k_vectors[begin:begin + n_k]
+            phase = kvec.dot(self.positions.T)
+            qxyz_real = self.charges * np.cos(phase)
+            qxyz_imag = self.charges * np.sin(phase)
+            S_k_real = qxyz_real.sum(axis=1)
+            S_k_imag = qxyz_imag.sum(axis=1)
+            k2 = np.sum(kvec * kvec, axis=1)
+            ak = np.exp(k2 * factor_ewald) / k2
+            energy += np.sum(ak * (S_k_real ** 2 + S_k_imag ** 2))
+            # force = -1/(2V*eps0)*ak*d(S(k)S(-k))/dRj
+            # f*k=dS(k)/dRj*S(-k)+S(K)*dS(-k)/dRj
+            f = 2 * (qxyz_real * S_k_imag[:, np.newaxis] - qxyz_imag * S_k_real[:, np.newaxis])
+            forces -= (ak[:, np.newaxis] * f).T.dot(kvec)
         return energy * factor_energy * 2, forces * factor_energy * 2
 
+    def calc_pme_grid(self):
+        '''
+        Determine the number of grid points in each dimension for smooth particle mesh Ewald.
+
+        The same empirical formula as OpenMM is used,
+        and the numbers are rounded up to products of 2, 3, 5 and 7 for the efficiency of FFT.
+
+        Returns
+        -------
+        grid : tuple of int
+        '''
+
+        def is_fft_friendly(n):
+            for factor in (2, 3, 5, 7):
+                while n % factor == 0:
+                    n //= factor
+            return n == 1
+
+        grid = []
+        for width in self.box:
+            n = max(math.ceil(2 * self.alpha * width / (3 * self.tolerance ** 0.2)), self.pme_order)
+            while not is_fft_friendly(n):
+                n += 1
+            grid.append(n)
+        return tuple(grid)
+
+    @staticmethod
+    def bspline(x, order):
+        '''
+        Evaluate the cardinal B-spline M_n(x) and its derivative.
+
+        Parameters
+        ----------
+        x : array_like
+        order : int
+
+        Returns
+        -------
+        value : array_like
+        derivative : array_like
+        '''
+
+        def _M(x, n):
+            if n == 2:
+                return np.where((x >= 0) & (x <= 2), 1 - np.abs(x - 1), 0.)
+            return (x * _M(x, n - 1) + (n - x) * _M(x - 1, n - 1)) / (n - 1)
+
+        return _M(x, order), _M(x, order - 1) - _M(x - 1, order - 1)
+
+    def calc_pme_long(self, grid=None):
+        '''
+        Calculate the reciprocal space energy and forces with smooth particle mesh Ewald.
+
+        The charges are spread on a grid with cardinal B-splines,
+        then the structure factors are obtained by FFT of the charge grid.
+
+        Parameters
+        ----------
+        grid : tuple of int, optional
+            The number of grid points in each dimension.
+            If not provided, it will be determined by :func:`calc_pme_grid`
+
+        Returns
+        -------
+        energy : float
+        forces : array_like
+        '''
+        if grid is None:
+            grid = self.calc_pme_grid()
+        grid = np.array(grid, dtype=int)
+        order = self.pme_order
+        factor_ewald = -1 / (4 * self.alpha ** 2)
+        factor_energy = 1 / (2 * self.volume * VACUUM_PERMITTIVITY) \
+                        * ELEMENTARY_CHARGE ** 2 / NANO / 1000 * AVOGADRO
+
+        # scaled fractional coordinates. The spline of atom covers grid point floor(u)-t with weight M(frac(u)+t)
+        u = self.positions / self.box * grid
+        u_floor = np.floor(u)
+        t = np.arange(order)
+        theta, dtheta = self.bspline((u - u_floor)[..., np.newaxis] + t, order)  # (n_atom, 3, order)
+        index = (u_floor.astype(int)[..., np.newaxis] - t) % grid[:, np.newaxis]  # (n_atom, 3, order)
+        flat_index = ((index[:, 0, :, np.newaxis, np.newaxis] * grid[1]
+                       + index[:, 1, np.newaxis, :, np.newaxis]) * grid[2]
+                      + index[:, 2, np.newaxis, np.newaxis, :]).reshape(self.n_atom, -1)
+        tx, ty, tz = theta[:, 0, :, np.newaxis, np.newaxis], theta[:, 1, np.newaxis, :, np.newaxis], \
+                     theta[:, 2, np.newaxis, np.newaxis, :]
+        dx, dy, dz = dtheta[:, 0, :, np.newaxis, np.newaxis], dtheta[:, 1, np.newaxis, :, np.newaxis], \
+                     dtheta[:, 2, np.newaxis, np.newaxis, :]
+
+        weights = (self.charges[:, np.newaxis, np.newaxis, np.newaxis] * tx * ty * tz).reshape(self.n_atom, -1)
+        Q = np.bincount(flat_index.ravel(), weights=weights.ravel(), minlength=grid.prod()).reshape(grid)
+        FQ = np.fft.fftn(Q)
+
+        # |b(m)|^2 of the Euler exponential splines in each dimension
+        M_k, _ = self.bspline(np.arange(1, order), order)
+        b2_list = []
+        for n in grid:
+            m = np.arange(n)
+            denom = np.abs(np.exp(2j * PI * np.outer(m, np.arange(order - 1)) / n).dot(M_k)) ** 2
+            # the denominator vanishes at m=n/2 for odd order. Interpolate from neighbors
+            for i in np.where(denom < 1E-10)[0]:
+                denom[i] = (denom[i - 1] + denom[(i + 1) % n]) / 2
+            b2_list.append(1 / denom)
+
+        kx, ky, kz = [np.fft.fftfreq(n, 1 / n) * 2 * PI / width for n, width in zip(grid, self.box)]
+        k2 = kx[:, np.newaxis, np.newaxis] ** 2 + ky[np.newaxis, :, np.newaxis] ** 2 \
+             + kz[np.newaxis, np.newaxis, :] ** 2
+        k2[0, 0, 0] = 1
+        C = np.exp(k2 * factor_ewald) / k2 \
+            * b2_list[0][:, np.newaxis, np.newaxis] * b2_list[1][np.newaxis, :, np.newaxis] \
+            * b2_list[2][np.newaxis, np.newaxis, :]
+        C[0, 0, 0] = 0
+
+        energy = np.sum(C * (FQ.real ** 2 + FQ.imag ** 2)) * factor_energy
+        # dE/dQ on each grid point
+        phi = (np.fft.ifftn(C * FQ).real * grid.prod() * 2 * factor_energy).ravel()[flat_index]
+        phi = phi.reshape(self.n_atom, order, order, order)
+        forces = np.zeros((self.n_atom, 3))
+        forces[:, 0] = -np.sum(phi * dx * ty * tz, axis=(1, 2, 3)) * grid[0] / self.box[0]
+        forces[:, 1] = -np.sum(phi * tx * dy * tz, axis=(1, 2, 3)) * grid[1] / self.box[1]
+        forces[:, 2] = -np.sum(phi * tx * ty * dz, axis=(1, 2, 3)) * grid[2] / self.box[2]
+        forces *= self.charges[:, np.newaxis]
+        return energy, forces
+
     def calc_ewald_self(self):
         return - ONE_4PI_EPS0 * (self.charges * self.charges).sum() * self.alpha / PI_SQRT
 
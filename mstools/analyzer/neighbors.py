@@ -0,0 +1,333 @@
+import itertools
+import numpy as np
+
+_PBC = ('', 'x', 'y', 'z', 'xy', 'xz', 'yz', 'xyz')
+
+
+def _parse_pbc(pbc):
+    if pbc not in _PBC:
+        raise Exception('Invalid pbc: %s' % pbc)
+    return np.array(['x' in pbc, 'y' in pbc, 'z' in pbc])
+
+
+def perpendicular_widths(vectors):
+    '''
+    Get the distances between the opposite faces of a orthorhombic or triclinic box.
+
+    Parameters
+    ----------
+    vectors : array_like
+        The box vectors
+
+    Returns
+    -------
+    widths : np.ndarray
+    '''
+    vectors = np.asarray(vectors, dtype=float)
+    volume = abs(np.linalg.det(vectors))
+    return np.array([volume / np.linalg.norm(np.cross(vectors[(d + 1) % 3], vectors[(d + 2) % 3]))
+                      for d in range(3)])
+
+
+def minimum_image(delta, vectors, pbc='xyz'):
+    '''
+    Apply the minimum image convention on displacement vectors in a orthorhombic or triclinic box.
+
+    The displacements are wrapped in the fractional coordinates along the periodic dimensions.
+    For triclinic box, it gives the real minimum image for vectors shorter than half of the perpendicular widths of the box.
+
+    Parameters
+    ----------
+    delta : array_like
+        The displacement vectors in shape of (n, 3) or (n_frame, n, 3)
+    vectors : array_like
+        The box vectors in shape of (3, 3) or (n_frame, 3, 3)
+    pbc : str
+        The periodic dimensions. Can be '', 'x', 'y', 'z', 'xy', 'xz', 'yz' or 'xyz'
+
+    Returns
+    -------
+    delta : np.ndarray
+    '''
+    vectors = np.asarray(vectors, dtype=float)
+    periodic = _parse_pbc(pbc)
+    frac = np.asarray(delta, dtype=float) @ np.linalg.inv(vectors)
+    # the shifts are masked by multiplication and applied in place, which is much faster for stacks of frames
+    shift = frac + 0.5
+    np.floor(shift, out=shift)
+    shift *= periodic
+    frac -= shift
+    return frac @ vectors
+
+
+class _Grid():
+    '''
+    The cells in fractional coordinates with perpendicular widths no shorter than cutoff.
+
+    Along the periodic dimensions, the cells span the box and the neighbor cells are wrapped.
+    Along the non-periodic dimensions, the cells span the range of the points and the neighbor cells are not wrapped.
+    '''
+
+    def __init__(self, fracs, vectors, periodic, cutoff):
+        widths = perpendicular_widths(vectors)
+        if any(cutoff >= widths[periodic] / 2):
+            raise Exception('cutoff should be smaller than half of the box along periodic dimensions')
+
+        self.periodic = periodic
+        self.lower = np.zeros(3)
+        extent = np.ones(3)
+        for d in np.flatnonzero(~periodic):
+            values = np.concatenate([frac[:, d] for frac in fracs])
+            self.lower[d] = values.min() if len(values) > 0 else 0
+            extent[d] = max(values.max() - self.lower[d], 1E-12) if len(values) > 0 else 1
+        self.extent = extent
+        n_cell = np.maximum(np.floor(extent * widths / cutoff).astype(int), 1)
+        # avoid too many empty cells for sparse points. Larger cells are always valid
+        n_point = sum(map(len, fracs))
+        while n_cell.prod() > max(8 * n_point, 27):
+            d = np.argmax(n_cell)
+            n_cell[d] = max(n_cell[d] // 2, 1)
+        self.n_cell = n_cell
+
+    def assign(self, frac):
+        cell_xyz = ((frac - self.lower) / self.extent * self.n_cell).astype(int)
+        return np.clip(cell_xyz, 0, self.n_cell - 1)
+
+    def shifts(self):
+        # the neighbor cells may coincide if there are less than three cells in one periodic dimension
+        shifts = [np.unique(np.array([-1, 0, 1]) % n) if p else np.array([-1, 0, 1]) if n > 1 else np.array([0])
+                  for n, p in zip(self.n_cell, self.periodic)]
+        return itertools.product(*shifts)
+
+
+def find_pairs(positions, cutoff, vectors=None, pbc='xyz', positions2=None):
+    '''
+    Find all pairs of points within cutoff with a cell list.
+
+    The points are assigned into cells in fractional coordinates,
+    and the cells have perpendicular widths no shorter than cutoff,
+    so that only the points in the same or adjacent cells need to be checked.
+    The candidate pairs between all cells and one of their neighbor cells are checked at once in vectorized form.
+    Both orthorhombic and triclinic boxes are supported.
+    The periodic boundary condition can be applied on part of the dimensions, e.g. for slab or surface systems.
+    The cutoff should be smaller than half of the perpendicular widths of the box along periodic dimensions.
+
+    Parameters
+    ----------
+    positions : array_like
+        The positions of points in shape of (n, 3)
+    cutoff : float
+    vectors : array_like, optional
+        The box vectors. Required if pbc is not ''
+    pbc : str
+        The periodic dimensions. Can be '', 'x', 'y', 'z', 'xy', 'xz', 'yz' or 'xyz'.
+        If vectors is None, it will be ignored and no periodic boundary condition will be applied
+    positions2 : array_like, optional
+        If provided, the pairs between `positions` and `positions2` are searched.
+        Otherwise, the pairs inside `positions` are searched.
+
+    Returns
+    -------
+    i : np.ndarray of int
+        The index of the first point of each pair in `positions`
+    j : np.ndarray of int
+        The index of the second point of each pair in `positions2` (or `positions`, in which case j is always larger than i)
+    delta : np.ndarray of float
+        The minimum image vector from point i to point j
+    r : np.ndarray of float
+        The distance between point i and point j
+    '''
+    periodic = _parse_pbc(pbc) if vectors is not None else np.zeros(3, dtype=bool)
+    if vectors is None or abs(np.linalg.det(vectors)) == 0:
+        if periodic.any():
+            raise Exception('Valid box is required for periodic boundary condition')
+        vectors = np.identity(3)
+    vectors = np.asarray(vectors, dtype=float)
+    inv = np.linalg.inv(vectors)
+
+    frac1 = np.asarray(positions, dtype=float).reshape(-1, 3) @ inv
+    frac1[:, periodic] -= np.floor(frac1[:, periodic])
+    if positions2 is None:
+        frac2 = frac1
+    else:
+        frac2 = np.asarray(positions2, dtype=float).reshape(-1, 3) @ inv
+        frac2[:, periodic] -= np.floor(frac2[:, periodic])
+
+    grid = _Grid([frac1] if positions2 is None else [frac1, frac2], vectors, periodic, cutoff)
+    n_cell = grid.n_cell
+    cell_xyz1 = grid.assign(frac1)
+    cell_xyz2 = cell_xyz1 if positions2 is None else grid.assign(frac2)
+    cell_id2 = np.ravel_multi_index(cell_xyz2.T, n_cell)
+    order = np.argsort(cell_id2, kind='stable')
+    counts = np.bincount(cell_id2, minlength=n_cell.prod())
+    starts = np.cumsum(counts) - counts
+
+    i_list, j_list, delta_list, r_list = [], [], [], []
+    for shift in grid.shifts():
+        neighbor_xyz = cell_xyz1 + shift
+        neighbor_xyz[:, periodic] %= n_cell[periodic]
+        valid = np.all((neighbor_xyz >= 0) & (neighbor_xyz < n_cell), axis=1)
+        source = np.flatnonzero(valid)
+        neighbor = np.ravel_multi_index(neighbor_xyz[source].T, n_cell)
+        n_candidate = counts[neighbor]
+        i = np.repeat(source, n_candidate)
+        offset = np.arange(len(i)) - np.repeat(np.cumsum(n_candidate) - n_candidate, n_candidate)
+        j = order[np.repeat(starts[neighbor], n_candidate) + offset]
+        if positions2 is None:
+            mask = i < j
+            i, j = i[mask], j[mask]
+
+        delta = frac2[j] - frac1[i]
+        delta[:, periodic] -= np.floor(delta[:, periodic] + 0.5)
+        delta = delta @ vectors
+        rsq = np.sum(delta * delta, axis=1)
+        mask = rsq <= cutoff * cutoff
+        i_list.append(i[mask])
+        j_list.append(j[mask])
+        delta_list.append(delta[mask])
+        r_list.append(np.sqrt(rsq[mask]))
+
+    return np.concatenate(i_list), np.concatenate(j_list), np.concatenate(delta_list), np.concatenate(r_list)
+
+
+def find_pairs_minimum_image(positions, cutoff, vectors, pbc='xyz', chunk=1000000):
+    '''
+    Find all pairs of points within cutoff by checking all pairs with minimum image convention.
+
+    It is used when the cutoff is not smaller than half of the box along periodic dimensions,
+    in which case the cell list of :func:`find_pairs` is not applicable, e.g. for small primitive cells.
+    Only the minimum image of each pair is considered.
+    The pairs are processed block by block so that the memory usage is bounded.
+
+    Parameters
+    ----------
+    positions : array_like
+        The positions of points in shape of (n, 3)
+    cutoff : float
+    vectors : array_like
+        The box vectors
+    pbc : str
+        The periodic dimensions. Can be '', 'x', 'y', 'z', 'xy', 'xz', 'yz' or 'xyz'
+    chunk : int
+        The maximum number of pairs checked at once
+
+    Returns
+    -------
+    i : np.ndarray of int
+    j : np.ndarray of int
+        j is always larger than i
+    delta : np.ndarray of float
+    r : np.ndarray of float
+
+    See Also
+    --------
+    find_pairs
+    '''
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    n_point = len(positions)
+    # start with empty arrays in case there is no point
+    i_list, j_list = [np.zeros(0, dtype=int)], [np.zeros(0, dtype=int)]
+    delta_list, r_list = [np.zeros((0, 3))], [np.zeros(0)]
+    n_row = max(1, chunk // max(n_point, 1))
+    for begin in range(0, n_point, n_row):
+        rows = np.arange(begin, min(begin + n_row, n_point))
+        i, j = np.nonzero(np.arange(n_point)[np.newaxis, :] > rows[:, np.newaxis])
+        i = rows[i]
+        delta = minimum_image(positions[j] - positions[i], vectors, pbc)
+        r = np.sqrt(np.sum(delta * delta, axis=1))
+        mask = r <= cutoff
+        i_list.append(i[mask])
+        j_list.append(j[mask])
+        delta_list.append(delta[mask])
+        r_list.append(r[mask])
+    return np.concatenate(i_list), np.concatenate(j_list), np.concatenate(delta_list), np.concatenate(r_list)
+
+
+class VerletList():
+    '''
+    Verlet neighbor list with a skin for reusing the candidate pairs across frames.
+
+    The candidate pairs within `cutoff + skin` are searched with cell list when the list is built.
+    For the following frames, only the candidate pairs are checked,
+    until any point moves more than half of the skin or the box changes, in which case the list is rebuilt.
+
+    Parameters
+    ----------
+    cutoff : float
+    skin : float
+    pbc : str
+        The periodic dimensions. Can be '', 'x', 'y', 'z', 'xy', 'xz', 'yz' or 'xyz'
+
+    Attributes
+    ----------
+    n_build : int
+        The number of times the list has been built
+
+    Examples
+    --------
+    >>> verlet = VerletList(1.2, skin=0.1)
+    >>> for i in range(trj.n_frame):
+    >>>     frame = trj.read_frame(i)
+    >>>     i, j, delta, r = verlet.update(frame.positions, frame.cell.vectors)
+    '''
+
+    def __init__(self, cutoff, skin=0.1, pbc='xyz'):
+        _parse_pbc(pbc)
+        self.cutoff = cutoff
+        self.skin = skin
+        self.pbc = pbc
+        self.n_build = 0
+        self._positions = None
+        self._vectors = None
+        self._i = None
+        self._j = None
+
+    def _need_rebuild(self, positions, vectors):
+        if self._positions is None or len(positions) != len(self._positions):
+            return True
+        if (vectors is None) != (self._vectors is None) or \
+                (vectors is not None and not np.allclose(vectors, self._vectors, rtol=0, atol=1E-10)):
+            return True
+        displacement = positions - self._positions
+        if vectors is not None:
+            displacement = minimum_image(displacement, vectors, self.pbc)
+        return np.max(np.sum(displacement * displacement, axis=1), initial=0) > (self.skin / 2) ** 2
+
+    def update(self, positions, vectors=None):
+        '''
+        Get the pairs within cutoff for a new frame, rebuilding the list if required.
+
+        Parameters
+        ----------
+        positions : array_like
+            The positions of points in shape of (n, 3)
+        vectors : array_like, optional
+            The box vectors. Required if pbc is not ''
+
+        Returns
+        -------
+        i : np.ndarray of int
+        j : np.ndarray of int
+            It is always larger than i
+        delta : np.ndarray of float
+            The minimum image vector from point i to point j
+        r : np.ndarray of float
+
+        See Also
+        --------
+        find_pairs
+        '''
+        positions = np.asarray(positions, dtype=float)
+        vectors = None if vectors is None else np.asarray(vectors, dtype=float)
+        if self._need_rebuild(positions, vectors):
+            self._i, self._j, _, _ = find_pairs(positions, self.cutoff + self.skin, vectors, self.pbc)
+            self._positions = positions.copy()
+            self._vectors = None if vectors is None else vectors.copy()
+            self.n_build += 1
+
+        delta = positions[self._j] - positions[self._i]
+        if vectors is not None:
+            delta = minimum_image(delta, vectors, self.pbc)
+        rsq = np.sum(delta * delta, axis=1)
+        mask = rsq <= self.cutoff * self.cutoff
+        return self._i[mask], self._j[mask], delta[mask], np.sqrt(rsq[mask])
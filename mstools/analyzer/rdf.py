@@ -0,0 +1,354 @@
+import itertools
+import numpy as np
+from .neighbors import find_pairs
+from .reduction import MoleculeIndex
+
+
+def select_groups(topology, atom_types=None, molecule_names=None, by_molecule=False):
+    '''
+    Select groups of atoms from a topology for analyzing structures like RDF.
+
+    Parameters
+    ----------
+    topology : Topology
+    atom_types : list of str, optional
+        Only the atoms with these types are selected. If set to None, atoms of all types are selected
+    molecule_names : list of str, optional
+        Only the atoms in molecules with these names are selected.
+        If set to None, atoms in all molecules are selected
+    by_molecule : bool
+        If set to True, the selected atoms in each molecule form one group, which is usually represented by its COM.
+        Otherwise, each selected atom forms one group.
+
+    Returns
+    -------
+    groups : list of list of Atom
+    '''
+    groups = []
+    for mol in topology.molecules:
+        if molecule_names is not None and mol.name not in molecule_names:
+            continue
+        atoms = [atom for atom in mol.atoms if atom_types is None or atom.type in atom_types]
+        if len(atoms) == 0:
+            continue
+        if by_molecule:
+            groups.append(atoms)
+        else:
+            groups += [[atom] for atom in atoms]
+    return groups
+
+
+class AtomGroups():
+    '''
+    A set of groups of atoms represented by their center of mass, which are precomputed as segment indices.
+
+    The atoms of all groups are flattened into one index array.
+    The COMs of all groups are calculated at once by a :class:`MoleculeIndex` over the flattened atoms,
+    in which each group is treated as one molecule.
+    The atoms in one group are made whole with the minimum image convention relative to the first atom of the group,
+    therefore the extent of a group should be smaller than half of the box.
+
+    Parameters
+    ----------
+    groups : list of list of Atom
+        Each group is made of one or more atoms. A single Atom will be treated as a group of one atom.
+    labels : list of str, optional
+        The label of each group, which is used for partial analysis.
+        If set to None, the atom type is used for single-atom groups,
+        and the molecule name is used for multi-atom groups.
+
+    Attributes
+    ----------
+    n_group : int
+    atom_index : np.ndarray of int
+        The indexes of atoms of all groups
+    segment_start : np.ndarray of int
+        The start of each group in `atom_index`
+    weights : np.ndarray of float
+        The normalized mass weight of each atom in `atom_index`.
+        If the total mass of a group is zero, all the atoms in the group are equally weighted.
+    labels : list of str
+        The unique labels of groups
+    label_index : np.ndarray of int
+        The index of label of each group
+    molecule_index : np.ndarray of int
+        The index of the molecule which the first atom of each group belongs to
+    keys : list of tuple of int
+        The indexes of atoms in each group. Groups with the same key are treated as the same group.
+    '''
+
+    def __init__(self, groups, labels=None):
+        groups = [[g] if not isinstance(g, (list, tuple)) else list(g) for g in groups]
+        if len(groups) == 0 or any(len(g) == 0 for g in groups):
+            raise Exception('Groups should not be empty')
+
+        if labels is None:
+            labels = [g[0].type if len(g) == 1 else g[0].molecule.name for g in groups]
+        self._setup(atom_index=[atom.id for g in groups for atom in g],
+                    sizes=[len(g) for g in groups],
+                    masses=[atom.mass for g in groups for atom in g],
+                    labels=labels,
+                    molecule_index=[g[0].molecule.id for g in groups])
+
+    @staticmethod
+    def from_molecule_index(molecule_index, masses=None, label='MOL'):
+        '''
+        Build the groups from the molecule index of each atom, so that each molecule forms one group.
+
+        This is useful when the topology is not available (e.g. only the residue numbers in a GRO file are known).
+
+        Parameters
+        ----------
+        molecule_index : array_like of int
+            The index of molecule of each atom. The atoms in one molecule should be consecutive.
+            The atoms with negative molecule index are ignored.
+        masses : array_like of float, optional
+            The masses of atoms. If set to None, all the atoms are equally weighted.
+        label : str
+            The label of all the groups
+
+        Returns
+        -------
+        groups : AtomGroups
+        '''
+        molecule_index = np.asarray(molecule_index, dtype=int)
+        atom_index = np.flatnonzero(molecule_index >= 0)
+        if len(atom_index) == 0:
+            raise Exception('Groups should not be empty')
+        # a new group starts where the molecule index changes
+        is_start = np.ones(len(atom_index), dtype=bool)
+        is_start[1:] = np.diff(molecule_index[atom_index]) != 0
+        starts = np.flatnonzero(is_start)
+        sizes = np.diff(np.append(starts, len(atom_index)))
+        masses = np.ones(len(atom_index)) if masses is None else np.asarray(masses, dtype=float)[atom_index]
+
+        groups = AtomGroups.__new__(AtomGroups)
+        groups._setup(atom_index, sizes, masses, [label] * len(starts), molecule_index[atom_index[starts]])
+        return groups
+
+    def _setup(self, atom_index, sizes, masses, labels, molecule_index):
+        sizes = np.asarray(sizes, dtype=int)
+        self.n_group = len(sizes)
+        self.segment_start = np.cumsum(sizes) - sizes
+        self.atom_index = np.asarray(atom_index, dtype=int)
+        self._index = MoleculeIndex(np.repeat(np.arange(self.n_group), sizes), masses=masses)
+        self.weights = self._index.weights
+        self._is_single = sizes.max() == 1
+
+        if len(labels) != self.n_group:
+            raise Exception('Number of labels should equal to the number of groups')
+        self.labels = sorted(set(labels))
+        label_map = {label: i for i, label in enumerate(self.labels)}
+        self.label_index = np.array([label_map[label] for label in labels], dtype=int)
+        self.molecule_index = np.asarray(molecule_index, dtype=int)
+        self.keys = [tuple(self.atom_index[start:start + size]) for start, size in zip(self.segment_start, sizes)]
+
+    def calc_com(self, positions, vectors=None, chunk=250000):
+        '''
+        Calculate the COM of all groups.
+
+        A stack of frames is processed in one call. The frames are processed block by block,
+        so that the intermediate arrays stay small enough to be efficient.
+
+        Parameters
+        ----------
+        positions : array_like
+            The positions of all atoms in the system in shape of (n_atom, 3) or (n_frame, n_atom, 3)
+        vectors : array_like, optional
+            The box vectors in shape of (3, 3) or (n_frame, 3, 3).
+            If provided, the atoms in each group will be made whole before calculating COM.
+        chunk : int
+            The maximum number of coordinates processed at once for a stack of frames
+
+        Returns
+        -------
+        com : np.ndarray
+            The COM of groups in shape of (n_group, 3) or (n_frame, n_group, 3)
+        '''
+        positions = np.asarray(positions)
+        n_frame = max(1, chunk // max(positions[0].size, 1)) if positions.ndim == 3 and len(positions) > 0 else 1
+        if positions.ndim == 3 and len(positions) > n_frame:
+            vectors = None if vectors is None else np.asarray(vectors)
+            per_frame = vectors is not None and vectors.ndim == 3
+            return np.concatenate([self.calc_com(positions[i:i + n_frame],
+                                                 vectors[i:i + n_frame] if per_frame else vectors, chunk)
+                                   for i in range(0, len(positions), n_frame)])
+
+        positions = np.take(positions, self.atom_index, axis=-2)
+        if self._is_single:
+            return positions.astype(float)
+        return self._index.com(positions, vectors)
+
+
+class RDF():
+    '''
+    Calculate the radial distribution function between two sets of groups incrementally frame by frame.
+
+    Each group is represented by its center of mass.
+    The pairs within `r_max` are found with a cell list and binned at once with `np.bincount`.
+    The partial RDFs between labels of groups (e.g. atom types) are accumulated at the same time.
+    A group never pairs with itself, so the same selection can be used for both sets.
+
+    Parameters
+    ----------
+    groups1 : list of list of Atom or AtomGroups
+        The central groups
+    groups2 : list of list of Atom or AtomGroups, optional
+        The coordinate groups. If set to None, `groups1` will be used
+    r_max : float
+        The maximum distance in nm
+    dr : float
+        The width of bins in nm
+    exclude_same_molecule : bool
+        If set to True, the pairs between groups in the same molecule are excluded
+
+    Attributes
+    ----------
+    n_frame : int
+        The number of frames accumulated
+    edges : np.ndarray
+        The edges of bins
+    r : np.ndarray
+        The centers of bins
+
+    Examples
+    --------
+    >>> groups1 = select_groups(top, molecule_names=['emim'], by_molecule=True)
+    >>> groups2 = select_groups(top, atom_types=['OW'])
+    >>> rdf = RDF(groups1, groups2, r_max=1.0, dr=0.01)
+    >>> for i in range(trj.n_frame):
+    >>>     rdf.accumulate(trj.read_frame(i))
+    >>> g = rdf.get_rdf()
+    >>> cn = rdf.get_coordination_number()
+    '''
+
+    def __init__(self, groups1, groups2=None, r_max=1.0, dr=0.01, exclude_same_molecule=False):
+        self.groups1 = groups1 if isinstance(groups1, AtomGroups) else AtomGroups(groups1)
+        if groups2 is None:
+            self.groups2 = self.groups1
+        else:
+            self.groups2 = groups2 if isinstance(groups2, AtomGroups) else AtomGroups(groups2)
+        self.r_max = r_max
+        self.n_bin = int(np.ceil(r_max / dr - 1E-6))
+        self.edges = np.arange(self.n_bin + 1) * dr
+        self.r = (self.edges[1:] + self.edges[:-1]) / 2
+        self.exclude_same_molecule = exclude_same_molecule
+
+        g1, g2 = self.groups1, self.groups2
+        self._n_label1 = len(g1.labels)
+        self._n_label2 = len(g2.labels)
+        self._count1 = np.bincount(g1.label_index, minlength=self._n_label1)
+        self._count2 = np.bincount(g2.label_index, minlength=self._n_label2)
+
+        # the pairs between the same group or the groups in the same molecule are excluded
+        if exclude_same_molecule:
+            owner1, owner2 = g1.molecule_index, g2.molecule_index
+        else:
+            key_map = {}
+            owner1 = np.array([key_map.setdefault(key, len(key_map)) for key in g1.keys], dtype=int)
+            owner2 = np.array([key_map.get(key, -1 - i) for i, key in enumerate(g2.keys)], dtype=int)
+        self._owner1, self._owner2 = owner1, owner2
+        # number of excluded pairs between labels
+        owners = np.unique(np.concatenate([owner1, owner2]))
+        m1 = np.zeros((len(owners), self._n_label1))
+        m2 = np.zeros((len(owners), self._n_label2))
+        np.add.at(m1, (np.searchsorted(owners, owner1), g1.label_index), 1)
+        np.add.at(m2, (np.searchsorted(owners, owner2), g2.label_index), 1)
+        self._n_pair = np.outer(self._count1, self._count2) - m1.T @ m2
+
+        self.n_frame = 0
+        self._counts = np.zeros((self._n_label1, self._n_label2, self.n_bin))
+        self._scaled = np.zeros((self._n_label1, self._n_label2, self.n_bin))
+
+    def accumulate(self, frame):
+        '''
+        Accumulate the pairs of one frame.
+
+        Parameters
+        ----------
+        frame : Frame
+        '''
+        self.accumulate_positions(frame.positions, frame.cell.vectors)
+
+    def accumulate_positions(self, positions, vectors):
+        '''
+        Accumulate the pairs from the positions of all atoms and box vectors.
+
+        Parameters
+        ----------
+        positions : array_like
+        vectors : array_like
+            The box vectors
+        '''
+        vectors = np.asarray(vectors, dtype=float)
+        com1 = self.groups1.calc_com(positions, vectors)
+        com2 = com1 if self.groups2 is self.groups1 else self.groups2.calc_com(positions, vectors)
+        i, j, _, r = find_pairs(com1, self.r_max, vectors, positions2=com2)
+        mask = (self._owner1[i] != self._owner2[j]) & (r < self.edges[-1])
+        i, j, r = i[mask], j[mask], r[mask]
+
+        i_bin = np.minimum((r / self.edges[1]).astype(int), self.n_bin - 1)
+        index = (self.groups1.label_index[i] * self._n_label2 + self.groups2.label_index[j]) * self.n_bin + i_bin
+        counts = np.bincount(index, minlength=self._counts.size).reshape(self._counts.shape)
+
+        volume = abs(np.linalg.det(vectors))
+        self._counts += counts
+        self._scaled += counts * volume
+        self.n_frame += 1
+
+    def _shell_volume(self):
+        return 4 / 3 * np.pi * (self.edges[1:] ** 3 - self.edges[:-1] ** 3)
+
+    def get_rdf(self, partial=False):
+        '''
+        Get the RDF averaged over all frames accumulated.
+
+        Parameters
+        ----------
+        partial : bool
+            If set to True, the partial RDFs between each pair of labels will be returned
+
+        Returns
+        -------
+        rdf : np.ndarray or dict
+            If partial is False, the total RDF is returned.
+            Otherwise, a dict with (label1, label2) as key and partial RDF as value is returned.
+        '''
+        if self.n_frame == 0:
+            raise Exception('No frame accumulated')
+        if not partial:
+            return self._scaled.sum(axis=(0, 1)) / self._n_pair.sum() / self._shell_volume() / self.n_frame
+
+        result = {}
+        for a, b in itertools.product(range(self._n_label1), range(self._n_label2)):
+            n_pair = self._n_pair[a, b]
+            rdf = self._scaled[a, b] / n_pair / self._shell_volume() / self.n_frame if n_pair > 0 \
+                else np.zeros(self.n_bin)
+            result[(self.groups1.labels[a], self.groups2.labels[b])] = rdf
+        return result
+
+    def get_coordination_number(self, partial=False):
+        '''
+        Get the average number of coordinate groups within the outer edge of each bin around one central group.
+
+        Parameters
+        ----------
+        partial : bool
+            If set to True, the partial coordination numbers between each pair of labels will be returned
+
+        Returns
+        -------
+        cn : np.ndarray or dict
+            If partial is False, the total coordination number is returned.
+            Otherwise, a dict with (label1, label2) as key and partial coordination number as value is returned.
+        '''
+        if self.n_frame == 0:
+            raise Exception('No frame accumulated')
+        cumsum = np.cumsum(self._counts, axis=-1) / self.n_frame
+        if not partial:
+            return cumsum.sum(axis=(0, 1)) / self.groups1.n_group
+
+        result = {}
+        for a, b in itertools.product(range(self._n_label1), range(self._n_label2)):
+            result[(self.groups1.labels[a], self.groups2.labels[b])] = cumsum[a, b] / self._count1[a]
+        return result
@@ -0,0 +1,182 @@
+import numpy as np
+from .neighbors import minimum_image
+
+
+class MoleculeIndex():
+    '''
+    Precomputed segment index for calculating per-molecule properties with vectorized reductions.
+
+    The atoms are sorted by molecule (which is a no-op for atoms from a Topology),
+    so that the sum over the atoms of each molecule is done by one `np.add.reduceat` call.
+    All the methods accept a single frame in shape of (n_atom, 3),
+    or a stack of frames in shape of (n_frame, n_atom, 3).
+
+    Parameters
+    ----------
+    molecule_index : array_like of int
+        The index of molecule of each atom, ranging from 0 to n_molecule - 1
+    masses : array_like of float, optional
+        The masses of atoms. If set to None, all the atoms are equally weighted
+    charges : array_like of float, optional
+        The charges of atoms. If set to None, all the atoms are neutral
+
+    Attributes
+    ----------
+    n_atom : int
+    n_molecule : int
+    molecule_index : np.ndarray of int
+        The index of molecule of each atom
+    offsets : np.ndarray of int
+        The atoms of molecule i are `order[offsets[i]:offsets[i+1]]`
+    order : np.ndarray of int
+        The indexes of atoms sorted by molecule
+    masses : np.ndarray of float
+    charges : np.ndarray of float
+    molecule_masses : np.ndarray of float
+        The total mass of each molecule
+    total_charge : np.ndarray of float
+        The total charge of each molecule
+    weights : np.ndarray of float
+        The normalized mass weight of each atom in its molecule.
+        If the total mass of a molecule is zero, all the atoms in the molecule are equally weighted.
+
+    Examples
+    --------
+    >>> index = MoleculeIndex.from_topology(top)
+    >>> for frame_chunk in trj.iter_frames():
+    >>>     com = index.com(frame_chunk.positions, frame_chunk.cells)
+    >>>     dipole = index.dipole(frame_chunk.positions, frame_chunk.cells)
+    '''
+
+    def __init__(self, molecule_index, masses=None, charges=None):
+        self.molecule_index = np.asarray(molecule_index, dtype=int)
+        self.n_atom = len(self.molecule_index)
+        if self.n_atom == 0:
+            raise Exception('No atom in molecule index')
+        self.n_molecule = int(self.molecule_index.max()) + 1
+        sizes = np.bincount(self.molecule_index, minlength=self.n_molecule)
+        if self.molecule_index.min() < 0 or sizes.min() == 0:
+            raise Exception('Molecule index should be continuous integers starting from 0')
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)])
+        self.order = np.argsort(self.molecule_index, kind='stable')
+        self._is_sorted = bool(np.all(np.diff(self.molecule_index) >= 0))
+        self._first = self.order[self.offsets[:-1]]
+
+        self.masses = np.ones(self.n_atom) if masses is None else np.asarray(masses, dtype=float)
+        self.charges = np.zeros(self.n_atom) if charges is None else np.asarray(charges, dtype=float)
+        if len(self.masses) != self.n_atom or len(self.charges) != self.n_atom:
+            raise Exception('Length of masses or charges is different from the number of atoms')
+        self.molecule_masses = self.reduce(self.masses)
+        self.total_charge = self.reduce(self.charges)
+        # molecules without mass are equally weighted
+        weights = self.masses.copy()
+        massless = self.molecule_masses[self.molecule_index] <= 0
+        weights[massless] = 1.0
+        self.weights = weights / self.reduce(weights)[self.molecule_index]
+
+    @staticmethod
+    def from_topology(top):
+        '''
+        Build the molecule index from a topology. The masses and charges of atoms are taken from the topology.
+
+        Parameters
+        ----------
+        top : Topology
+
+        Returns
+        -------
+        index : MoleculeIndex
+        '''
+        atoms = top.atoms
+        return MoleculeIndex([atom.molecule.id for atom in atoms],
+                             masses=[atom.mass for atom in atoms],
+                             charges=[atom.charge for atom in atoms])
+
+    def reduce(self, values):
+        '''
+        Sum the per-atom values over the atoms of each molecule.
+
+        Parameters
+        ----------
+        values : array_like
+            The values in shape of (n_atom,), (n_atom, k) or (n_frame, n_atom, k)
+
+        Returns
+        -------
+        sums : np.ndarray
+            The sums in shape of (n_molecule,), (n_molecule, k) or (n_frame, n_molecule, k)
+        '''
+        values = np.asarray(values, dtype=float)
+        axis = 0 if values.ndim == 1 else values.ndim - 2
+        if not self._is_sorted:
+            values = np.take(values, self.order, axis=axis)
+        return np.add.reduceat(values, self.offsets[:-1], axis=axis)
+
+    def _get_delta(self, positions, vectors):
+        '''
+        Get the displacements of atoms from the first atom of their molecule with minimum image convention.
+        '''
+        positions = np.asarray(positions, dtype=float)
+        # np.take along the atom axis is much faster than fancy indexing for stacks of frames
+        delta = positions - np.take(positions, self._first[self.molecule_index], axis=-2)
+        if vectors is not None:
+            delta = minimum_image(delta, vectors)
+        return positions, delta
+
+    def com(self, positions, vectors=None):
+        '''
+        Calculate the center of mass of each molecule.
+
+        Parameters
+        ----------
+        positions : array_like
+            The positions in shape of (n_atom, 3) or (n_frame, n_atom, 3)
+        vectors : array_like, optional
+            The box vectors in shape of (3, 3) or (n_frame, 3, 3).
+            If provided, the molecules are made whole relative to their first atom with minimum image convention.
+
+        Returns
+        -------
+        com : np.ndarray
+            The COM in shape of (n_molecule, 3) or (n_frame, n_molecule, 3)
+        '''
+        positions, delta = self._get_delta(positions, vectors)
+        return np.take(positions, self._first, axis=-2) + self.reduce(delta * self.weights[:, np.newaxis])
+
+    def dipole(self, positions, vectors=None):
+        '''
+        Calculate the dipole of each molecule relative to its center of mass.
+
+        Parameters
+        ----------
+        positions : array_like
+            The positions in shape of (n_atom, 3) or (n_frame, n_atom, 3)
+        vectors : array_like, optional
+            The box vectors in shape of (3, 3) or (n_frame, 3, 3).
+            If provided, the molecules are made whole relative to their first atom with minimum image convention.
+
+        Returns
+        -------
+        dipole : np.ndarray
+            The dipole in e*nm in shape of (n_molecule, 3) or (n_frame, n_molecule, 3)
+        '''
+        positions, delta = self._get_delta(positions, vectors)
+        delta_com = self.reduce(delta * self.weights[:, np.newaxis])
+        return self.reduce(delta * self.charges[:, np.newaxis]) - delta_com * self.total_charge[:, np.newaxis]
+
+    def com_velocity(self, velocities):
+        '''
+        Calculate the velocity of center of mass of each molecule.
+
+        Parameters
+        ----------
+        velocities : array_like
+            The velocities in shape of (n_atom, 3) or (n_frame, n_atom, 3)
+
+        Returns
+        -------
+        velocities : np.ndarray
+            The COM velocities in shape of (n_molecule, 3) or (n_frame, n_molecule, 3)
+        '''
+        velocities = np.asarray(velocities, dtype=float)
+        return self.reduce(velocities * self.weights[:, np.newaxis])
@@ -0,0 +1,375 @@
+import numpy as np
+from ..constant import BOLTZMANN, ELEMENTARY_CHARGE, NANO, PICO
+
+
+class StreamingACF():
+    '''
+    Calculate the autocorrelation function of a long time series chunk by chunk using FFT.
+
+    Each chunk is correlated with itself and the last `n_lag - 1` samples of previous chunks,
+    so that the result is exactly the same as correlating the whole series at once,
+    while the memory cost is limited by the size of chunk.
+    If the series has several components (e.g. Pxy, Pxz and Pyz), the ACF is averaged over components.
+
+    The series can also be divided into blocks of fixed size.
+    The ACFs of the blocks are calculated independently from each other,
+    which can be used for estimating the statistical error.
+
+    Parameters
+    ----------
+    n_lag : int
+        The number of time lags for the ACF, including lag 0
+    block_size : int, optional
+        The number of samples in each block. If not provided, the ACFs of blocks will not be calculated
+
+    Attributes
+    ----------
+    n_sample : int
+        The number of samples accumulated
+
+    Examples
+    --------
+    >>> acf = StreamingACF(1000, block_size=100000)
+    >>> for frame_chunk in trj.iter_frames():
+    >>>     acf.accumulate(frame_chunk.velocities.reshape(frame_chunk.n_frame, -1))
+    >>> vacf = acf.get_acf()
+    >>> block_vacfs = acf.get_block_acfs()
+    '''
+
+    def __init__(self, n_lag, block_size=None):
+        if n_lag < 1:
+            raise Exception('n_lag should be positive')
+        if block_size is not None and block_size < n_lag:
+            raise Exception('block_size should not be smaller than n_lag')
+        self.n_lag = n_lag
+        self.block_size = block_size
+        self.n_sample = 0
+        self._n_component = None
+        self._history = None
+        self._sum = np.zeros(n_lag)
+        self._count = np.zeros(n_lag)
+        self._block_history = None
+        self._block_sums = []
+        self._block_counts = []
+
+    def _correlate(self, history, chunk):
+        '''
+        Correlate a chunk with itself and the samples before it.
+
+        Returns
+        -------
+        sums : np.ndarray
+            The sum of products at each lag
+        counts : np.ndarray
+            The number of products at each lag
+        history : np.ndarray
+            The last `n_lag - 1` samples for correlating next chunk
+        '''
+        n_history = len(history)
+        data = np.concatenate([history, chunk])
+        # long enough so that the lags without sample won't be aliased to other lags
+        n_fft = 1 << (len(data) + max(len(chunk), self.n_lag)).bit_length()
+        f_data = np.fft.rfft(data, n=n_fft, axis=0)
+        f_chunk = np.fft.rfft(chunk, n=n_fft, axis=0)
+        # corr[k] = sum_s data[s+k] * chunk[s]
+        corr = np.fft.irfft(f_data * f_chunk.conjugate(), n=n_fft, axis=0).sum(axis=-1)
+        lags = np.arange(self.n_lag)
+        sums = corr[(n_history - lags) % n_fft]
+        counts = np.clip(len(chunk) - np.maximum(lags - n_history, 0), 0, None) * chunk.shape[1]
+        return sums, counts, data[len(data) - min(len(data), self.n_lag - 1):]
+
+    def accumulate(self, data):
+        '''
+        Add a chunk of the series.
+
+        Parameters
+        ----------
+        data : array_like
+            The samples in shape of (n,) or (n, n_component)
+        '''
+        data = np.asarray(data, dtype=float)
+        data = data.reshape(len(data), -1)
+        if len(data) == 0:
+            return
+        if self._n_component is None:
+            self._n_component = data.shape[1]
+            self._history = np.zeros((0, self._n_component))
+        elif data.shape[1] != self._n_component:
+            raise Exception('Number of components is different from the previous chunks')
+
+        sums, counts, self._history = self._correlate(self._history, data)
+        self._sum += sums
+        self._count += counts
+
+        if self.block_size is not None:
+            start = 0
+            n_sample = self.n_sample
+            while start < len(data):
+                pos = n_sample % self.block_size
+                if pos == 0:
+                    self._block_history = np.zeros((0, self._n_component))
+                    self._block_sums.append(np.zeros(self.n_lag))
+                    self._block_counts.append(np.zeros(self.n_lag))
+                end = min(len(data), start + self.block_size - pos)
+                sums, counts, self._block_history = self._correlate(self._block_history, data[start:end])
+                self._block_sums[-1] += sums
+                self._block_counts[-1] += counts
+                n_sample += end - start
+                start = end
+
+        self.n_sample += len(data)
+
+    def get_acf(self):
+        '''
+        Get the ACF of the whole series.
+
+        Returns
+        -------
+        acf : np.ndarray
+            The ACF in shape of (n_lag,). Lags without any sample are set to NaN
+        '''
+        if self.n_sample == 0:
+            raise Exception('No data accumulated')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self._count > 0, self._sum / self._count, np.nan)
+
+    def get_block_acfs(self):
+        '''
+        Get the ACFs of the blocks.
+
+        Only the complete blocks are considered.
+
+        Returns
+        -------
+        acfs : np.ndarray
+            The ACFs in shape of (n_block, n_lag)
+        '''
+        if self.block_size is None:
+            raise Exception('block_size is required for calculating ACFs of blocks')
+        n_block = self.n_sample // self.block_size
+        acfs = [s / c for s, c in zip(self._block_sums[:n_block], self._block_counts[:n_block])]
+        return np.array(acfs).reshape(n_block, self.n_lag)
+
+
+def calc_acf(data, n_lag=None):
+    '''
+    Calculate the autocorrelation function of a time series with all time origins using FFT.
+
+    Parameters
+    ----------
+    data : array_like
+        The samples in shape of (n,) or (n, n_component)
+    n_lag : int, optional
+        The number of time lags for the ACF. If not provided, all the lags will be calculated
+
+    Returns
+    -------
+    acf : np.ndarray
+        The ACF averaged over components in shape of (n_lag,)
+    '''
+    data = np.asarray(data, dtype=float)
+    acf = StreamingACF(n_lag or len(data))
+    acf.accumulate(data)
+    return acf.get_acf()
+
+
+def integrate_acf(acf, dt):
+    '''
+    Integrate the ACF with trapezoidal rule.
+
+    Parameters
+    ----------
+    acf : array_like
+        The ACF in shape of (n_lag,) or (n_block, n_lag)
+    dt : float
+        The time interval between samples
+
+    Returns
+    -------
+    integral : np.ndarray
+        The running integral with the same shape as acf. The first element is always zero
+    '''
+    acf = np.asarray(acf, dtype=float)
+    integral = np.zeros(acf.shape)
+    integral[..., 1:] = np.cumsum((acf[..., 1:] + acf[..., :-1]) / 2 * dt, axis=-1)
+    return integral
+
+
+def green_kubo(data, dt, t_corr, factor=1., n_block=5, chunk=10000):
+    '''
+    Integrate the ACF of a time series according to Green-Kubo relation.
+
+    The series is streamed in chunks to limit the memory cost.
+    The error is estimated from the integrals of `n_block` independent blocks.
+
+    Parameters
+    ----------
+    data : array_like
+        The samples in shape of (n,) or (n, n_component)
+    dt : float
+        The time interval between samples in ps
+    t_corr : float
+        The maximum correlation time in ps
+    factor : float
+        The prefactor multiplied to the integral
+    n_block : int
+        The number of blocks for estimating the error. Set to 1 to disable error estimation
+    chunk : int
+        The number of samples to be correlated at one time
+
+    Returns
+    -------
+    time : np.ndarray
+        The correlation time in ps
+    integral : np.ndarray
+        The running integral multiplied by factor
+    stderr : np.ndarray
+        The standard error of the running integral. NaN if it cannot be estimated
+    '''
+    n_sample = len(data)
+    n_lag = int(round(t_corr / dt)) + 1
+    if n_lag > n_sample:
+        raise Exception('Correlation time is longer than the series')
+    block_size = n_sample // n_block if n_block > 1 else None
+    if block_size is not None and block_size < n_lag:
+        raise Exception('Blocks are too short for the correlation time. Use less blocks')
+
+    acf = StreamingACF(n_lag, block_size)
+    for i in range(0, n_sample, chunk):
+        acf.accumulate(data[i:i + chunk])
+
+    time = np.arange(n_lag) * dt
+    integral = integrate_acf(acf.get_acf(), dt) * factor
+    stderr = np.full(n_lag, np.nan)
+    if block_size is not None:
+        integrals = integrate_acf(acf.get_block_acfs(), dt) * factor
+        if len(integrals) > 1:
+            stderr = np.std(integrals, axis=0, ddof=1) / np.sqrt(len(integrals))
+    return time, integral, stderr
+
+
+def calc_viscosity(pressures, dt, volume, temperature, t_corr, n_block=5, chunk=10000):
+    '''
+    Calculate the shear viscosity from the autocorrelation of the off-diagonal pressure tensor.
+
+    Parameters
+    ----------
+    pressures : array_like
+        The off-diagonal components of pressure tensor in bar, e.g. Pxy, Pxz and Pyz, in shape of (n, n_component)
+    dt : float
+        The time interval between samples in ps
+    volume : float
+        The volume of the box in nm^3
+    temperature : float
+        The temperature in K
+    t_corr : float
+        The maximum correlation time in ps
+    n_block : int
+    chunk : int
+
+    Returns
+    -------
+    time : np.ndarray
+        The correlation time in ps
+    viscosity : np.ndarray
+        The running integral of viscosity in mPa*s
+    stderr : np.ndarray
+        The standard error of viscosity in mPa*s
+
+    See Also
+    --------
+    green_kubo
+    '''
+    # bar^2*nm^3*ps/J -> Pa*s -> mPa*s
+    factor = volume * NANO ** 3 * 1E5 ** 2 * PICO / BOLTZMANN / temperature * 1000
+    return green_kubo(pressures, dt, t_corr, factor, n_block, chunk)
+
+
+def calc_current(velocities, charges):
+    '''
+    Calculate the charge current of the system.
+
+    Parameters
+    ----------
+    velocities : array_like
+        The velocities of atoms in nm/ps in shape of (n_atom, 3) or (n_frame, n_atom, 3)
+    charges : array_like
+        The charges of atoms in shape of (n_atom,)
+
+    Returns
+    -------
+    current : np.ndarray
+        The charge current in e*nm/ps in shape of (3,) or (n_frame, 3)
+    '''
+    return np.einsum('...ij,i->...j', np.asarray(velocities, dtype=float), np.asarray(charges, dtype=float))
+
+
+def calc_conductivity(currents, dt, volume, temperature, t_corr, n_block=5, chunk=10000):
+    '''
+    Calculate the electrical conductivity from the autocorrelation of the charge current.
+
+    Parameters
+    ----------
+    currents : array_like
+        The charge current in e*nm/ps in shape of (n, 3). It can be calculated with :func:`calc_current`
+    dt : float
+        The time interval between samples in ps
+    volume : float
+        The volume of the box in nm^3
+    temperature : float
+        The temperature in K
+    t_corr : float
+        The maximum correlation time in ps
+    n_block : int
+    chunk : int
+
+    Returns
+    -------
+    time : np.ndarray
+        The correlation time in ps
+    conductivity : np.ndarray
+        The running integral of conductivity in S/m
+    stderr : np.ndarray
+        The standard error of conductivity in S/m
+
+    See Also
+    --------
+    green_kubo
+    '''
+    # the ACF is averaged over x, y and z, which takes care of the 1/3 prefactor
+    # e^2*nm^2/ps/nm^3/J -> S/m
+    factor = ELEMENTARY_CHARGE ** 2 * NANO ** 2 / PICO / (volume * NANO ** 3) / BOLTZMANN / temperature
+    return green_kubo(currents, dt, t_corr, factor, n_block, chunk)
+
+
+def calc_vacf_diffusion(velocities, dt, t_corr, n_block=5, chunk=1000):
+    '''
+    Calculate the diffusion coefficient from the velocity autocorrelation function.
+
+    Parameters
+    ----------
+    velocities : array_like
+        The velocities of particles (e.g. COM of molecules) in nm/ps in shape of (n_frame, n_particle, 3)
+    dt : float
+        The time interval between frames in ps
+    t_corr : float
+        The maximum correlation time in ps
+    n_block : int
+    chunk : int
+
+    Returns
+    -------
+    time : np.ndarray
+        The correlation time in ps
+    diffusion : np.ndarray
+        The running integral of diffusion coefficient in cm^2/s
+    stderr : np.ndarray
+        The standard error of diffusion coefficient in cm^2/s
+
+    See Also
+    --------
+    green_kubo
+    '''
+    velocities = np.asarray(velocities, dtype=float)
+    # the ACF is averaged over particles and x, y, z. nm^2/ps -> cm^2/s
+    return green_kubo(velocities.reshape(len(velocities), -1), dt, t_corr, 1E-2, n_block, chunk)
@@ -0,0 +1,133 @@
+import numpy as np
+from collections import deque
+from .neighbors import minimum_image
+
+
+class WholeMolecules():
+    '''
+    Make the molecules whole across periodic boundaries based on the bonds in topology.
+
+    The bond graph of each molecule is traversed with breadth-first search from its first atom,
+    and the edges (parent, child) are grouped by the depth of child in the BFS tree.
+    This plan is built only once for a topology.
+    To make the molecules whole, the displacement of each child from its parent is wrapped with minimum image convention,
+    level by level from the root, so that the cost is only a few array operations for each level.
+    The atoms not bonded to any other atom in its molecule (e.g. virtual sites) are attached to the first atom.
+
+    Both orthorhombic and triclinic boxes are supported.
+    A single frame or a batch of frames can be processed at once.
+
+    Parameters
+    ----------
+    topology : Topology
+    subset : list of int, optional
+        The indexes of atoms stored in the positions to be processed.
+        If provided, the positions should only contain these atoms in the same order,
+        and the bonds involving atoms not in subset are ignored.
+
+    Attributes
+    ----------
+    n_level : int
+        The maximum depth of the BFS trees
+    parents : np.ndarray of int
+        The index of parent atom of each edge
+    children : np.ndarray of int
+        The index of child atom of each edge
+    level_offsets : np.ndarray of int
+        The edges of level i are `parents[level_offsets[i]:level_offsets[i+1]]`
+
+    Examples
+    --------
+    >>> whole = WholeMolecules(top)
+    >>> for frame_chunk in trj.iter_frames():
+    >>>     positions = whole.make_whole(frame_chunk.positions, frame_chunk.cells)
+    '''
+
+    def __init__(self, topology, subset=None):
+        if subset is None:
+            index = None
+            n_atom = topology.n_atom
+        else:
+            n_atom = len(subset)
+            index = np.full(topology.n_atom, -1, dtype=int)
+            index[subset] = np.arange(n_atom)
+
+        parents = []
+        children = []
+        depths = []
+        for mol in topology.molecules:
+            ids = [atom.id for atom in mol.atoms]
+            if index is not None:
+                ids = [index[i] for i in ids if index[i] >= 0]
+            if len(ids) < 2:
+                continue
+            neighbours = {i: [] for i in ids}
+            for bond in mol.bonds:
+                i, j = bond.atom1.id, bond.atom2.id
+                if index is not None:
+                    i, j = index[i], index[j]
+                    if i < 0 or j < 0:
+                        continue
+                neighbours[i].append(j)
+                neighbours[j].append(i)
+
+            root = ids[0]
+            depth = {root: 0}
+            queue = deque([root])
+            while queue:
+                i = queue.popleft()
+                for j in neighbours[i]:
+                    if j not in depth:
+                        depth[j] = depth[i] + 1
+                        parents.append(i)
+                        children.append(j)
+                        depths.append(depth[j])
+                        queue.append(j)
+            for i in ids:
+                if i not in depth:
+                    depth[i] = 1
+                    parents.append(root)
+                    children.append(i)
+                    depths.append(1)
+
+        order = np.argsort(depths, kind='stable')
+        self.n_atom = n_atom
+        self.parents = np.array(parents, dtype=int)[order]
+        self.children = np.array(children, dtype=int)[order]
+        depths = np.array(depths, dtype=int)[order]
+        self.n_level = int(depths[-1]) if len(depths) > 0 else 0
+        self.level_offsets = np.searchsorted(depths, np.arange(1, self.n_level + 2))
+
+    def make_whole(self, positions, vectors, inplace=False):
+        '''
+        Make the molecules whole.
+
+        The position of the first atom of each molecule is kept unchanged.
+
+        Parameters
+        ----------
+        positions : array_like
+            The positions in shape of (n_atom, 3) or (n_frame, n_atom, 3)
+        vectors : array_like
+            The box vectors in shape of (3, 3) or (n_frame, 3, 3)
+        inplace : bool
+            If set to True, positions should be a np.ndarray and it will be modified in place
+
+        Returns
+        -------
+        positions : np.ndarray
+            The positions with molecules made whole
+        '''
+        if not inplace:
+            positions = np.array(positions, dtype=float)
+        if positions.shape[-2] != self.n_atom:
+            raise Exception('Number of atoms in positions is different from the topology')
+        vectors = np.asarray(vectors, dtype=float)
+
+        for level in range(self.n_level):
+            begin, end = self.level_offsets[level], self.level_offsets[level + 1]
+            parents = self.parents[begin:end]
+            children = self.children[begin:end]
+            delta = positions[..., children, :] - positions[..., parents, :]
+            positions[..., children, :] = positions[..., parents, :] + minimum_image(delta, vectors)
+        return positions
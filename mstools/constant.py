@@ -7,6 +7,7 @@ PI_SQRT = PI ** 0.5
 VACUUM_PERMITTIVITY = 8.854_187_812_8E-12  # farad/meter
 ELEMENTARY_CHARGE = 1.602_176_62E-19  # coulomb
 AVOGADRO = 6.022_140_76E23
+BOLTZMANN = 1.380_649E-23  # joule/kelvin
 MILLI = 1E-3
 MICRO = 1E-6
 NANO = 1E-9
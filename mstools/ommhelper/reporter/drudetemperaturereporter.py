@@ -2,6 +2,7 @@ import numpy as np
 import simtk.openmm as mm
 from simtk.openmm.app import Simulation
 from ..unit import *
+from ...analyzer.reduction import MoleculeIndex
 
 class DrudeTemperatureReporter(object):
     '''
@@ -64,12 +65,12 @@ class DrudeTemperatureReporter(object):
             self.n_atom = system.getNumParticles()
             self.molecules: [[int]] = [list(atoms) for atoms in simulation.context.getMolecules()]
             self.n_mol = len(self.molecules)
-            self.mol_atoms = np.zeros(self.n_atom, dtype=int)  # record which molecule the atoms are in
-            self.mass_molecules = np.zeros(self.n_mol) # record the mass of molecules
+            self.masses = np.array([system.getParticleMass(i).value_in_unit(unit.dalton) for i in range(self.n_atom)])
+            mol_atoms = np.zeros(self.n_atom, dtype=int)  # record which molecule the atoms are in
             for i, atoms in enumerate(self.molecules):
-                for atom in atoms:
-                    self.mol_atoms[atom] = i
-                    self.mass_molecules[i] += system.getParticleMass(atom).value_in_unit(unit.dalton)
+                mol_atoms[atoms] = i
+            self.mol_index = MoleculeIndex(mol_atoms, masses=self.masses)
+            self.mass_molecules = self.mol_index.molecule_masses  # record the mass of molecules
 
             self.dof_com = np.count_nonzero(self.mass_molecules) * 3
             self.dof_atom = self.dof_drude = 0
@@ -91,38 +92,33 @@ class DrudeTemperatureReporter(object):
                 drude_set.add(i_drude)
                 self.pair_set.add((i_drude, i_core))
             self.drude_array = np.array(list(drude_set))
+            self.drude_index, self.core_index = np.array(sorted(self.pair_set), dtype=int).reshape(-1, 2).T
             self.atom_array = np.array(list(set(range(self.n_atom)) - drude_set))
 
             self._hasInitialized = True
             print('#"Step"\t"T_COM"\t"T_Atom"\t"T_Drude"\t"KE_COM"\t"KE_Atom"\t"KE_Drude"', file=self._out)
 
         velocities = state.getVelocities(asNumpy=True).value_in_unit(unit.nanometer / unit.picosecond)
-        masses = np.array([system.getParticleMass(i).value_in_unit(unit.dalton) for i in range(self.n_atom)])
-
-        vel_mol = np.zeros([self.n_mol, 3])
-        for i, atoms in enumerate(self.molecules):
-            if self.mass_molecules[i] == 0:
-                continue
-            mv = masses[atoms][:, np.newaxis] * velocities[atoms]
-            vel_mol[i] = np.sum(mv, axis=0) / self.mass_molecules[i]
+        masses = self.masses.copy()
+
+        vel_mol = self.mol_index.com_velocity(velocities)
+        vel_mol[self.mass_molecules == 0] = 0
         mvv_com = self.mass_molecules * np.sum(vel_mol ** 2, axis=1)
         ke_com = mvv_com.sum() / 2 * (unit.nanometer / unit.picosecond) ** 2 * unit.dalton
         t_com = (2 * ke_com / (self.dof_com * unit.MOLAR_GAS_CONSTANT_R))
 
-        velocities -= np.array([vel_mol[self.mol_atoms[i]] for i in range(self.n_atom)])
-        for i_drude, i_core in self.pair_set:
-            v_drude = velocities[i_drude]
-            v_core = velocities[i_core]
-            m_drude = masses[i_drude]
-            m_core = masses[i_core]
-            m_com = m_drude + m_core
-            m_rel = m_drude * m_core / m_com
-            v_com = (m_drude * v_drude + m_core * v_core) / m_com
-            v_rel = v_drude - v_core
-            velocities[i_drude] = v_rel
-            velocities[i_core] = v_com
-            masses[i_drude] = m_rel
-            masses[i_core] = m_com
+        # use the relative motion of Drude particles and the COM motion of Drude pairs
+        velocities -= vel_mol[self.mol_index.molecule_index]
+        v_drude = velocities[self.drude_index]
+        v_core = velocities[self.core_index]
+        m_drude = masses[self.drude_index]
+        m_core = masses[self.core_index]
+        m_com = m_drude + m_core
+        velocities[self.drude_index] = v_drude - v_core
+        velocities[self.core_index] = (m_drude[:, np.newaxis] * v_drude + m_core[:, np.newaxis] * v_core) \
+                                      / m_com[:, np.newaxis]
+        masses[self.drude_index] = m_drude * m_core / m_com
+        masses[self.core_index] = m_com
         mvv = masses * np.sum(velocities ** 2, axis=1)
         ke = mvv[self.atom_array].sum() / 2 * (unit.nanometer / unit.picosecond) ** 2 * unit.dalton
         ke_drude = mvv[self.drude_array].sum() / 2 * (unit.nanometer / unit.picosecond) ** 2 * unit.dalton
@@ -86,7 +86,7 @@ class GromacsExporter():
 
     @staticmethod
     def _export_top(system: System, top_out='topol.top'):
-        mols_unique = system._topology.get_unique_molecules(deepcopy=False)
+        mols_unique, mol_index = system._topology.get_unique_molecule_index()
 
         string = '; GROMACS topol file created by mstools\n'
 
@@ -125,7 +125,7 @@ class GromacsExporter():
             else:
                 raise Exception('Unsupported vdW term')
 
-        for i, mol in enumerate(mols_unique.keys()):
+        for i, mol in enumerate(mols_unique):
             mol: Molecule
             string += '\n[ moleculetype ]\n'
             string += '; Name            nrexcl\n'
@@ -340,9 +340,10 @@ class GromacsExporter():
 
         string += '\n[ system ]\n'
 
+        # the molecules should be listed in the same sequence as in the topology
         string += '\n[ molecules ]\n'
-        for i, (mol, count) in enumerate(mols_unique.items()):
-            string += '%s_%i %6i\n' % (mol.name, i + 1, count)
+        for i, group in itertools.groupby(mol_index):
+            string += '%s_%i %6i\n' % (mols_unique[i].name, i + 1, len(list(group)))
 
         with open(top_out, 'wb') as f:
             f.write(string.encode())
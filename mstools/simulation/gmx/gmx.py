@@ -275,6 +275,50 @@ class GmxSimulation(metaclass=DocstringMeta):
         '''
         raise NotImplementedError('Method not implemented')
 
+    @staticmethod
+    def calc_com_diffusion(xtc, top, duration=None):
+        '''
+        Calculate the diffusion coefficient of the COM of molecules from a trajectory without calling GROMACS.
+
+        The molecules and the masses of atoms are read from the `topol` file,
+        so that the result is consistent with the mass weighted COM calculated by `gmx msd -mol`.
+
+        Parameters
+        ----------
+        xtc : str
+        top : str
+            The `topol` file which contains the same atoms as the trajectory
+        duration : float, optional
+            Only use the last period of trajectory in ps. If set to None, the whole trajectory is used
+
+        Returns
+        -------
+        diffusion : float
+            Diffusion coefficient in unit of cm^2/s.
+        stderr : float
+            Standard error.
+        '''
+        from ...trajectory import Trajectory
+        from ...analyzer.rdf import AtomGroups
+        from ...analyzer.diffusion import MSD
+
+        masses, _ = GMX.get_top_atom_properties(top)
+        molecule_index = GMX.get_top_molecule_index(top)
+
+        trj = Trajectory(xtc)
+        if trj.n_atom != len(masses):
+            raise Exception('Number of atoms in trajectory and topol file do not match')
+        begin = 0
+        if duration is not None and trj.n_frame > 1:
+            dt = trj.read_frame(1).time - trj.read_frame(0).time
+            begin = max(0, trj.n_frame - 1 - int(round(duration / dt)))
+
+        msd = MSD(AtomGroups.from_molecule_index(molecule_index, masses=masses))
+        for frame_chunk in trj.iter_frames(begin=begin):
+            msd.accumulate_chunk(frame_chunk)
+        trj.close()
+        return msd.get_diffusion()
+
     def check_finished(self, logs=None):
         '''
         Check whether or not the GROMACS simulation is successfully finished.
@@ -224,7 +224,7 @@ class Npt(GmxSimulation):
             }
 
         ### Check structure freezing using Diffusion of COM of molecules. Only use last 400 ps data
-        diffusion, _ = self.gmx.diffusion('npt.xtc', 'npt.tpr', mol=True, begin=length - 400)
+        diffusion, _ = self.calc_com_diffusion('npt.xtc', 'topol.top', duration=400)
         if diffusion < 1E-8:  # cm^2/s
             return {
                 'failed': True,
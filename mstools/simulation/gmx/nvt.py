@@ -124,3 +124,54 @@ class Nvt(GmxSimulation):
 
     def run(self):
         super().run()
+
+    def analyze(self, gro='npt.gro', n_vis=0, t_corr=20, begin=0):
+        '''
+        Calculate the shear viscosity from the `nvt-vis*.edr` files with Green-Kubo relation.
+
+        The viscosity of each run is integrated from the autocorrelation of Pxy, Pxz and Pyz.
+        The error is estimated from the variance between runs, or from blocks if there is only one run.
+
+        Parameters
+        ----------
+        gro : str
+            The gro file for getting the volume of box
+        n_vis : int
+            The number of runs for viscosity
+        t_corr : float
+            The maximum correlation time in ps
+        begin : float
+            The data before this time in ps will be discarded
+
+        Returns
+        -------
+        result : dict
+        '''
+        import numpy as np
+        from ...panedr import edr_to_df
+        from ...trajectory import Trajectory
+        from ...analyzer.transport import calc_viscosity
+
+        volume = Trajectory.read_frame_from_file(gro).cell.volume
+        vis_list = []
+        stderr_list = []
+        for i in range(n_vis):
+            df = edr_to_df('nvt-vis%i.edr' % i).loc[begin:]
+            dt = df.index[1] - df.index[0]
+            pressures = df[['Pres-XY', 'Pres-XZ', 'Pres-YZ']].values
+            _, vis, stderr = calc_viscosity(pressures, dt, volume, df['Temperature'].mean(), t_corr)
+            vis_list.append(vis)
+            stderr_list.append(stderr)
+
+        if len(vis_list) == 0:
+            return {}
+        vis = np.mean(vis_list, axis=0)
+        if len(vis_list) > 1:
+            stderr = np.std(vis_list, axis=0, ddof=1) / np.sqrt(len(vis_list))
+        else:
+            stderr = stderr_list[0]
+
+        return {
+            'viscosity': [vis[-1], stderr[-1]],  # mPa*s
+            'vis_list' : [v[-1] for v in vis_list],  # mPa*s
+        }
@@ -158,8 +158,11 @@ class NvtSlab(GmxSimulation):
         return commands
 
     def analyze(self, debug=False, **kwargs):
+        import numpy as np
         import pandas as pd
         from ...panedr import edr_to_df
+        from ...trajectory import Trajectory
+        from ...analyzer.density import DensityProfile
         from ...analyzer.series import is_converged
         from ...analyzer.structure import check_vle_density
 
@@ -168,7 +171,7 @@ class NvtSlab(GmxSimulation):
         length = potential_series.index[-1]
 
         ### Check structure freezing using Diffusion of COM of molecules. Only use last 400 ps of data
-        diffusion, _ = self.gmx.diffusion('nvt.xtc', 'nvt.tpr', mol=True, begin=length - 400)
+        diffusion, _ = self.calc_com_diffusion('nvt.xtc', 'topol.top', duration=400)
         if diffusion < 1E-8:  # cm^2/s
             return {
                 'failed': True,
@@ -221,20 +224,30 @@ class NvtSlab(GmxSimulation):
                     return True
                 return False
 
+        # read the trajectory once and accumulate the density profiles of all pieces
+        masses, _ = self.gmx.get_top_atom_properties('topol.top')
+        trj = Trajectory.open('nvt.xtc')
+        profile = DensityProfile(trj.n_atom, masses=masses, axis='z', n_bin=50)
+        for frame_chunk in trj.iter_frames():
+            blocks = np.floor((frame_chunk.times - when) / dt_piece + 1E-6).astype(int)
+            blocks[blocks >= n_pieces] = -1
+            profile.accumulate_chunk(frame_chunk, blocks)
+        trj.close()
+
         dliq_series = pd.Series()  # density of liquid phase timeseries
         dgas_series = pd.Series()  # density of liquid phase timeseries
         for n in range(n_pieces):
-            xvg = 'density-%i.xvg' % n
             begin = when + dt_piece * n
             end = when + dt_piece * (n + 1) - dt
             if debug:
                 print('Time: ', begin, end)
 
-            self.gmx.density('nvt.xtc', 'nvt.tpr', xvg=xvg, begin=begin, end=end, silent=True)
-            df = pd.read_table(xvg, skiprows=24, names=['Density'], index_col=0, sep='\s+')
-            density_series = df.Density
-            if not debug:
-                os.remove(xvg)
+            if n not in profile.blocks:
+                continue
+            z, density = profile.get_profile('mass', block=n)
+            density_series = pd.Series(density, index=z)
+            if debug:
+                density_series.to_csv('density-%i.txt' % n, sep='\t', header=False)
 
             dz = density_series.index[1] - density_series.index[0]
             lz = dz * len(density_series)
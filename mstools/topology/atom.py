@@ -1,6 +1,129 @@
+import bisect
 import numpy as np
 
 
+class _AtomArrays():
+    '''
+    Contiguous storage for the numerical fields of the atoms in a topology.
+
+    The atoms bound to this storage read and write their positions, masses, charges and position flags
+    in these arrays, so that the fields of all atoms can be retrieved or assigned at once.
+    The arrays are over-allocated so that appending atoms is amortized O(1).
+
+    The position of an atom is handed out as a view into the positions, so the positions are never moved.
+    They are enlarged in place if there is no view alive. Otherwise, a new block is allocated for the new rows,
+    and the positions are gathered from the blocks when retrieved at once.
+
+    Attributes
+    ----------
+    n_atom : int
+        Number of atoms bound to this storage
+    stale : bool
+        Whether or not some atoms have been rebound to another storage since they were added
+    '''
+    __slots__ = ('masses', 'charges', 'has_positions', '_blocks', '_starts', 'n_atom', 'stale')
+
+    def __init__(self):
+        self.masses = np.zeros(0)
+        self.charges = np.zeros(0)
+        self.has_positions = np.zeros(0, dtype=bool)
+        self._blocks = [np.zeros((0, 3), dtype=np.float32)]
+        self._starts = [0]
+        self.n_atom = 0
+        self.stale = False
+
+    def _reserve(self, n_atom):
+        old_capacity = len(self.masses)
+        if n_atom <= old_capacity:
+            return
+        capacity = max(n_atom, old_capacity * 2)
+        for name in self.__slots__[:3]:
+            array = getattr(self, name)
+            new = np.zeros(capacity, dtype=array.dtype)
+            new[:self.n_atom] = array[:self.n_atom]
+            setattr(self, name, new)
+
+        block = self._blocks.pop()
+        try:
+            # the block is enlarged without copying only if there is no view into it
+            block.resize((len(block) + capacity - old_capacity, 3), refcheck=True)
+            self._blocks.append(block)
+        except ValueError:
+            self._blocks.append(block)
+            self._starts.append(self._starts[-1] + len(block))
+            self._blocks.append(np.zeros((capacity - old_capacity, 3), dtype=np.float32))
+
+    def position(self, row):
+        '''
+        Get the position of the atom at the row as a view into the positions.
+        '''
+        if len(self._blocks) == 1:
+            return self._blocks[0][row]
+        i = bisect.bisect_right(self._starts, row) - 1
+        return self._blocks[i][row - self._starts[i]]
+
+    def get_positions(self, rows):
+        '''
+        Get the positions of the atoms at the rows. It is a view if rows is a slice and there is only one block.
+        '''
+        if len(self._blocks) == 1:
+            return self._blocks[0][rows]
+        return np.concatenate(self._blocks)[rows]
+
+    def set_positions(self, rows, positions):
+        '''
+        Set the positions of the atoms at the rows.
+        '''
+        if len(self._blocks) == 1:
+            self._blocks[0][rows] = positions
+            return
+        rows = np.arange(len(self.masses))[rows]
+        positions = np.broadcast_to(positions, (len(rows), 3))
+        for start, block in zip(self._starts, self._blocks):
+            mask = (rows >= start) & (rows < start + len(block))
+            block[rows[mask] - start] = positions[mask]
+
+    def append(self, atoms, sources=None):
+        '''
+        Copy the fields of atoms into this storage and bind the atoms to the appended rows.
+
+        Parameters
+        ----------
+        atoms : list of Atom
+        sources : list of Atom, optional
+            If provided, the fields are copied from these atoms instead, e.g. when the atoms are replicas of them.
+            A source can be an atom appended earlier in the same call,
+            in which case the fields are copied with vectorized gathering.
+        '''
+        start = self.n_atom
+        self._reserve(start + len(atoms))
+        groups = {}
+        for row, atom, source in zip(range(start, start + len(atoms)), atoms, sources or atoms):
+            arrays = source._arrays
+            if arrays is None:
+                self.position(row)[:] = source._position
+                self.masses[row] = source._mass
+                self.charges[row] = source._charge
+                self.has_positions[row] = source._has_position
+                if source is atom:
+                    atom._position = atom._mass = atom._charge = atom._has_position = None
+            else:
+                if source is atom:
+                    arrays.stale = True
+                rows = groups.setdefault(id(arrays), (arrays, [], []))
+                rows[1].append(row)
+                rows[2].append(source._row)
+            atom._arrays = self
+            atom._row = row
+        # the rows copied from this storage itself are gathered at last, after their sources are filled
+        for arrays, rows, old_rows in sorted(groups.values(), key=lambda x: x[0] is self):
+            self.set_positions(rows, arrays.get_positions(old_rows))
+            self.masses[rows] = arrays.masses[old_rows]
+            self.charges[rows] = arrays.charges[old_rows]
+            self.has_positions[rows] = arrays.has_positions[old_rows]
+        self.n_atom += len(atoms)
+
+
 class Atom():
     '''
     An atom is a particle in simulation.
@@ -42,7 +165,15 @@ class Atom():
         Otherwise the instance of subclass of VirtualSite
     has_position : bool
         Whether or not the position of this atom is set
+
+    Notes
+    -----
+    Once the atom is added into a topology, its position, mass and charge are stored
+    in the contiguous arrays of the topology, and the atom only keeps the index to the arrays.
     '''
+    __slots__ = ('id', 'id_in_mol', 'name', 'type', 'symbol', 'alpha', 'thole', 'formal_charge', 'is_drude',
+                 'virtual_site', '_mass', '_charge', '_position', '_has_position', '_arrays', '_row',
+                 '_molecule', '_bonds')
 
     def __init__(self, name='UNK'):
         self.id = -1
@@ -50,16 +181,18 @@ class Atom():
         self.name = name
         self.type = ''
         self.symbol = 'UNK'
-        self.mass = 0.
-        self.charge = 0.
         self.alpha = 0.  # this property is set for parent atom, not Drude particle
         self.thole = 0.  # this property is set for parent atom, not Drude particle
         self.formal_charge = 0.
         self.is_drude = False
         self.virtual_site = None
-        self.has_position = False
 
+        self._mass = 0.
+        self._charge = 0.
         self._position = np.zeros(3, dtype=np.float32)
+        self._has_position = False
+        self._arrays: _AtomArrays = None
+        self._row = -1
         self._molecule = None
         self._bonds = []
 
@@ -87,7 +220,33 @@ class Atom():
         atom.formal_charge = self.formal_charge
         atom.is_drude = self.is_drude
         atom.has_position = self.has_position
-        atom._position[:] = self._position[:]
+        atom._position[:] = self.position
+        return atom
+
+    def _replicate(self):
+        '''
+        Create a lightweight copy of this atom for replicating molecules.
+
+        The position, mass and charge are not copied. The copy should be bound to contiguous arrays
+        with this atom as the source by calling `_AtomArrays.append`.
+        id, id_in_mol, virtual_site etc are not copied, same as deepcopy.
+        '''
+        atom = Atom.__new__(Atom)
+        atom.id = -1
+        atom.id_in_mol = -1
+        atom.name = self.name
+        atom.type = self.type
+        atom.symbol = self.symbol
+        atom.alpha = self.alpha
+        atom.thole = self.thole
+        atom.formal_charge = self.formal_charge
+        atom.is_drude = self.is_drude
+        atom.virtual_site = None
+        atom._mass = atom._charge = atom._position = atom._has_position = None
+        atom._arrays = None
+        atom._row = -1
+        atom._molecule = None
+        atom._bonds = []
         return atom
 
     @property
@@ -127,6 +286,72 @@ class Atom():
         '''
         return [bond.atom2 if bond.atom1 == self else bond.atom1 for bond in self._bonds]
 
+    @property
+    def mass(self):
+        '''
+        Mass assigned. Required for output simulation files
+
+        :setter: Set the mass of this atom
+
+        Returns
+        -------
+        mass : float
+        '''
+        if self._arrays is None:
+            return self._mass
+        return float(self._arrays.masses[self._row])
+
+    @mass.setter
+    def mass(self, value):
+        if self._arrays is None:
+            self._mass = value
+        else:
+            self._arrays.masses[self._row] = value
+
+    @property
+    def charge(self):
+        '''
+        Charge assigned. Required for output simulation files
+
+        :setter: Set the charge of this atom
+
+        Returns
+        -------
+        charge : float
+        '''
+        if self._arrays is None:
+            return self._charge
+        return float(self._arrays.charges[self._row])
+
+    @charge.setter
+    def charge(self, value):
+        if self._arrays is None:
+            self._charge = value
+        else:
+            self._arrays.charges[self._row] = value
+
+    @property
+    def has_position(self):
+        '''
+        Whether or not the position of this atom is set
+
+        :setter: Set whether or not the position of this atom is set
+
+        Returns
+        -------
+        has : bool
+        '''
+        if self._arrays is None:
+            return self._has_position
+        return bool(self._arrays.has_positions[self._row])
+
+    @has_position.setter
+    def has_position(self, value):
+        if self._arrays is None:
+            self._has_position = bool(value)
+        else:
+            self._arrays.has_positions[self._row] = value
+
     @property
     def position(self):
         '''
@@ -137,13 +362,17 @@ class Atom():
         Returns
         -------
         position : array_like
-            The position is a numpy array of shape (3,)
+            The position is a numpy array of shape (3,).
+            If the atom belongs to a topology, it is a view into the positions of the topology,
+            which stays valid after more atoms are added into the topology
         '''
-        return self._position
+        if self._arrays is None:
+            return self._position
+        return self._arrays.position(self._row)
 
     @position.setter
     def position(self, value):
         if not isinstance(value, (list, tuple, np.ndarray)) or len(value) != 3:
             raise ValueError('position should has three elements')
-        self._position[:] = value
+        self.position[:] = value
         self.has_position = True
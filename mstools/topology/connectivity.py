@@ -22,6 +22,7 @@ class Bond():
     atom1 : Atom
     atom2 : Atom
     '''
+    __slots__ = ('atom1', 'atom2')
 
     def __init__(self, atom1, atom2):
         self.atom1 = atom1
@@ -100,6 +101,7 @@ class Angle():
     atom2 : Atom
     atom3 : Atom
     '''
+    __slots__ = ('atom1', 'atom2', 'atom3')
 
     def __init__(self, atom1, atom2, atom3):
         self.atom1 = atom1
@@ -172,6 +174,7 @@ class Dihedral():
     atom3 : Atom
     atom4 : Atom
     '''
+    __slots__ = ('atom1', 'atom2', 'atom3', 'atom4')
 
     def __init__(self, atom1, atom2, atom3, atom4):
         self.atom1 = atom1
@@ -255,6 +258,7 @@ class Improper():
     atom3 : Atom
     atom4 : Atom
     '''
+    __slots__ = ('atom1', 'atom2', 'atom3', 'atom4')
 
     def __init__(self, atom1, atom2, atom3, atom4):
         self.atom1 = atom1
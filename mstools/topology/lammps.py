@@ -173,6 +173,7 @@ class LammpsData():
 
     def _parse_atoms(self, lines, n_atom):
         atoms = [Atom() for i in range(n_atom)]
+        mol_ids = [0] * n_atom  # for identifying molecules
         mol_names: {int: str} = {}
         for i in range(n_atom):
             words = lines[i].strip().split()
@@ -195,7 +196,7 @@ class LammpsData():
                         len(words) > 9 and words[7] == '#') else 'M%i' % mol_id
 
             atom = atoms[atom_id - 1]
-            atom._mol_id = mol_id  # temporary attribute for identifying molecules
+            mol_ids[atom_id - 1] = mol_id
             atom.id = atom_id - 1  # atom.id starts from 0
             atom.charge = charge
             atom.mass = self.type_masses[type_id]
@@ -211,7 +212,7 @@ class LammpsData():
 
         molecules = [Molecule(name) for id, name in sorted(mol_names.items())]
         for atom in sorted(atoms, key=lambda x: x.id):
-            mol = molecules[atom._mol_id - 1]
+            mol = molecules[mol_ids[atom.id] - 1]
             mol.add_atom(atom, update_topology=False)
         for mol in molecules:
             for i, atom in enumerate(mol.atoms):
@@ -43,6 +43,7 @@ class Molecule():
         self._dihedrals: [Dihedral] = []
         self._impropers: [Improper] = []
         self._obmol = None  # this is for typing based on SMARTS
+        self._template: _MoleculeTemplate = None  # shared by the replicas of this molecule
 
     def __repr__(self):
         return f'<Molecule: {self.name} {self.id}>'
@@ -51,46 +52,22 @@ class Molecule():
         '''
         If there are virtual sites, they will be constructed with new atoms also
         '''
-        mol = Molecule()
-        mol.id = self.id
-        mol.name = self.name
-        if self._obmol is not None:
-            import openbabel
-            mol._obmol = openbabel.OBMol(self._obmol)
-        for atom in self._atoms:
-            atom_new = copy.deepcopy(atom)
-            mol.add_atom(atom_new)
-        for bond in self._bonds:
-            idx1 = bond.atom1.id_in_mol
-            idx2 = bond.atom2.id_in_mol
-            mol.add_bond(mol._atoms[idx1], mol._atoms[idx2])
-        for angle in self._angles:
-            idx1 = angle.atom1.id_in_mol
-            idx2 = angle.atom2.id_in_mol
-            idx3 = angle.atom3.id_in_mol
-            mol.add_angle(mol._atoms[idx1], mol._atoms[idx2], mol._atoms[idx3])
-        for dihedral in self._dihedrals:
-            idx1 = dihedral.atom1.id_in_mol
-            idx2 = dihedral.atom2.id_in_mol
-            idx3 = dihedral.atom3.id_in_mol
-            idx4 = dihedral.atom4.id_in_mol
-            mol.add_dihedral(mol._atoms[idx1], mol._atoms[idx2], mol._atoms[idx3], mol._atoms[idx4])
-        for improper in self._impropers:
-            idx1 = improper.atom1.id_in_mol
-            idx2 = improper.atom2.id_in_mol
-            idx3 = improper.atom3.id_in_mol
-            idx4 = improper.atom4.id_in_mol
-            mol.add_improper(mol._atoms[idx1], mol._atoms[idx2], mol._atoms[idx3], mol._atoms[idx4])
+        return self._get_template().create(self, [copy.deepcopy(atom) for atom in self._atoms])
 
-        for i, atom in enumerate(self._atoms):
-            vsite = atom.virtual_site
-            if vsite is not None:
-                new_atom = mol.atoms[i]
-                new_parents = [mol.atoms[p.id_in_mol] for p in vsite.parents]
-                new_atom.virtual_site = VirtualSiteFactory.create(vsite.__class__.__name__, new_parents,
-                                                                  vsite.parameters)
+    def _get_template(self):
+        '''
+        Get the connectivity template of this molecule for replicating it.
 
-        return mol
+        The template is cached, and it is shared by the replicas created from it.
+        It is discarded once the atoms or connectivity of this molecule are changed.
+
+        Returns
+        -------
+        template : _MoleculeTemplate
+        '''
+        if self._template is None:
+            self._template = _MoleculeTemplate(self)
+        return self._template
 
     @staticmethod
     def from_smiles(smiles):
@@ -209,7 +186,9 @@ class Molecule():
         update_topology : bool
             If update_topology is True, the topology this molecule belongs to will update its atom list and assign id for all atoms.
             Otherwise, you have to re-init the topology manually so that the topological information is correct.
+            If the topology is in `Topology.batch_edit`, the update is deferred until the batch edit finishes.
         '''
+        self._template = None
         atom._molecule = self
         if index is None:
             self._atoms.append(atom)
@@ -219,7 +198,7 @@ class Molecule():
             for i, at in enumerate(self._atoms):
                 at.id_in_mol = i
         if self._topology is not None and update_topology:
-            self._topology.update_molecules(self._topology.molecules, deepcopy=False)
+            self._topology._reindex()
 
     def remove_atom(self, atom, update_topology=True):
         '''
@@ -232,15 +211,48 @@ class Molecule():
         update_topology : bool
             If update_topology is True, the topology this molecule belongs to will update its atom list and assign id for all atoms.
             Otherwise, you have to re-init the topology manually so that the topological information is correct.
+            If the topology is in `Topology.batch_edit`, the update is deferred until the batch edit finishes.
         '''
         for bond in atom._bonds[:]:
             self.remove_connectivity(bond)
+        self._template = None
         self._atoms.remove(atom)
         atom._molecule = None
         for i, at in enumerate(self._atoms):
             at.id_in_mol = i
         if self._topology is not None and update_topology:
-            self._topology.update_molecules(self._topology.molecules, deepcopy=False)
+            self._topology._reindex()
+
+    def _remove_atoms(self, atoms):
+        '''
+        Remove several atoms and all the bonds connected to them from this molecule in one pass.
+
+        It is equivalent to calling `remove_atom` for each atom without updating topology,
+        but the atom list and bond list are rebuilt only once.
+
+        Parameters
+        ----------
+        atoms : list of Atom
+        '''
+        if len(atoms) == 0:
+            return
+        self._template = None
+        bonds_removed = set()
+        for atom in atoms:
+            for bond in atom._bonds:
+                if id(bond) in bonds_removed:
+                    continue
+                bonds_removed.add(id(bond))
+                partner = bond.atom2 if bond.atom1 is atom else bond.atom1
+                if partner is not atom:
+                    partner._bonds.remove(bond)
+            atom._bonds = []
+            atom._molecule = None
+        self._bonds = [bond for bond in self._bonds if id(bond) not in bonds_removed]
+        atoms_removed = set(atoms)
+        self._atoms = [atom for atom in self._atoms if atom not in atoms_removed]
+        for i, at in enumerate(self._atoms):
+            at.id_in_mol = i
 
     def add_bond(self, atom1, atom2, check_existence=False):
         '''
@@ -264,6 +276,7 @@ class Molecule():
         if check_existence and bond in self._bonds:
             return None
 
+        self._template = None
         self._bonds.append(bond)
         atom1._bonds.append(bond)
         atom2._bonds.append(bond)
@@ -292,6 +305,7 @@ class Molecule():
         if check_existence and angle in self._angles:
             return None
 
+        self._template = None
         self._angles.append(angle)
         return angle
 
@@ -318,6 +332,7 @@ class Molecule():
         if check_existence and dihedral in self._dihedrals:
             return None
 
+        self._template = None
         self._dihedrals.append(dihedral)
         return dihedral
 
@@ -345,6 +360,7 @@ class Molecule():
         if check_existence and improper in self._impropers:
             return None
 
+        self._template = None
         self._impropers.append(improper)
         return improper
 
@@ -359,6 +375,7 @@ class Molecule():
         ----------
         connectivity : [Bond, Angle, Dihedral, Improper]
         '''
+        self._template = None
         if type(connectivity) is Bond:
             bond = connectivity
             self._bonds.remove(bond)
@@ -407,6 +424,38 @@ class Molecule():
                 return False
         return True
 
+    def get_fingerprint(self):
+        '''
+        Get the fingerprint of this molecule for grouping similar molecules with hashing.
+
+        The fingerprint consists of the symbol, type and charge of atoms and the bonds between atoms.
+        Two molecules have the same fingerprint if and only if they are similar.
+        It depends on the sequence of atoms, same as `is_similar_to`.
+        The bond graph is cached in the connectivity template shared by the replicas of this molecule,
+        while the properties of atoms are always retrieved, because they are prone to changing.
+
+        Returns
+        -------
+        fingerprint : tuple
+
+        See Also
+        --------
+        is_similar_to
+        '''
+        charges = np.array([atom.charge for atom in self._atoms], dtype=float) + 0.0  # -0.0 is treated as 0.0
+        return self._get_fingerprint(charges.tobytes())
+
+    def _get_fingerprint(self, charges):
+        '''
+        Get the fingerprint with the charges of atoms provided as the bytes of float64 array,
+        e.g. taken from the contiguous arrays of topology.
+        '''
+        atoms = self._atoms
+        return (tuple([atom.symbol for atom in atoms]),
+                tuple([atom.type for atom in atoms]),
+                charges,
+                self._get_template().bond_graph)
+
     @property
     def n_atom(self):
         '''
@@ -603,6 +652,7 @@ class Molecule():
         The existing angles, dihedrals and impropers will be removed first
         The atoms and bonds concerning Drude particles will be ignored
         '''
+        self._template = None
         self._angles = []
         self._dihedrals = []
         self._impropers = []
@@ -639,10 +689,10 @@ class Molecule():
 
         PBC is supported for determining bonds across the periodic cell
         This is useful for simulating infinite structures
-        pbc can be '', 'x', 'y', 'xy', 'xz', 'xyz', which means check bonds cross specific boundaries
-        cell should also be provided if pbc is not ''
-
-        * TODO Add support for triclinic cell
+        pbc can be '', 'x', 'y', 'z', 'xy', 'xz', 'yz', 'xyz', which means check bonds cross specific boundaries
+        cell should also be provided if pbc is not ''. Both rectangular and triclinic cells are supported.
+        The pairs of nearby atoms are found with cell list, so the cost is linear to the number of atoms.
+        If the cell is narrower than twice of bond_limit, all pairs are checked with minimum image convention instead.
 
         Parameters
         ----------
@@ -659,56 +709,53 @@ class Molecule():
         if any(atom.is_drude for atom in self._atoms):
             raise Exception('Drude particles should be removed before guess connectivity')
 
+        from ..analyzer.neighbors import find_pairs, find_pairs_minimum_image, minimum_image, perpendicular_widths
+
         if pbc != '':
             if cell is None or cell.volume == 0:
                 raise Exception('PBC required but valid cell not provided')
-            elif not cell.is_rectangular:
-                raise Exception('Triclinic cell haven\'t been implemented')
-            else:
-                box = cell.size
+            vectors = cell.vectors
+        else:
+            vectors = None
 
+        self._template = None
         self._bonds = []
+        for atom in self._atoms:
+            atom._bonds = []
         self._angles = []
         self._dihedrals = []
         self._impropers = []
 
-        for i in range(self.n_atom):
-            atom1 = self.atoms[i]
+        eqt_bonds = []
+        for atom in self._atoms:
             try:
-                at1 = ff.atom_types[atom1.type].eqt_bond
+                eqt_bonds.append(ff.atom_types[atom.type].eqt_bond)
             except:
-                raise Exception(f'AtomType {atom1.type} not found in FF')
-
-            for j in range(i, self.n_atom):
-                atom2 = self.atoms[j]
-                try:
-                    at2 = ff.atom_types[atom2.type].eqt_bond
-                except:
-                    raise Exception(f'AtomType {atom2.type} not found in FF')
-
-                delta = atom2.position - atom1.position
-                if pbc != '':
-                    if any((delta > bond_limit) & (delta < box - bond_limit)):
-                        continue
-                    if 'x' in pbc:
-                        delta[0] -= math.ceil(delta[0] / box[0] - 0.5) * box[0]
-                    if 'y' in pbc:
-                        delta[1] -= math.ceil(delta[1] / box[1] - 0.5) * box[1]
-                    if 'z' in pbc:
-                        delta[2] -= math.ceil(delta[2] / box[2] - 0.5) * box[2]
-                if any(delta > bond_limit):
-                    continue
-
-                bterm = BondTerm(at1, at2, 0)
-                if bterm.name not in ff.bond_terms.keys():
-                    continue
-
-                bterm: BondTerm = ff.bond_terms[bterm.name]
-                if any(delta - bterm.length > bond_tolerance):
-                    continue
-
-                if abs(np.sqrt(delta.dot(delta)) - bterm.length) <= bond_tolerance:
-                    self.add_bond(atom1, atom2)
+                raise Exception(f'AtomType {atom.type} not found in FF')
+
+        # the equilibrium length between each pair of eqt_bond. NaN means BondTerm not found
+        eqt_names, eqt_index = np.unique(eqt_bonds, return_inverse=True)
+        length_table = np.full((len(eqt_names), len(eqt_names)), np.nan)
+        for a, b in itertools.combinations_with_replacement(range(len(eqt_names)), 2):
+            bterm = ff.bond_terms.get(BondTerm(eqt_names[a], eqt_names[b], 0).name)
+            if bterm is not None:
+                length_table[a, b] = length_table[b, a] = bterm.length
+
+        # only the pairs within bond_limit are checked. Keep the order of bonds as (i, j) with i < j
+        positions = np.array([atom.position for atom in self._atoms]).reshape(-1, 3)
+        periodic = [d in pbc for d in 'xyz']
+        if pbc != '' and any(bond_limit >= perpendicular_widths(vectors)[periodic] / 2):
+            # the cell list is not applicable for small cells, e.g. the primitive cells of frameworks
+            i_list, j_list, _, r_list = find_pairs_minimum_image(positions, bond_limit, vectors, pbc)
+        else:
+            i_list, j_list, _, r_list = find_pairs(positions, bond_limit, vectors, pbc)
+        lengths = length_table[eqt_index[i_list], eqt_index[j_list]]
+        with np.errstate(invalid='ignore'):
+            mask = np.abs(r_list - lengths) <= bond_tolerance
+        i_list, j_list = i_list[mask], j_list[mask]
+        order = np.lexsort((j_list, i_list))
+        for i, j in zip(i_list[order], j_list[order]):
+            self.add_bond(self._atoms[i], self._atoms[j])
 
         # generate angles etc..., and then remove them if requirements are not satisfied
         self.generate_angle_dihedral_improper()
@@ -716,55 +763,62 @@ class Molecule():
         angles_removed = []
         dihedrals_removed = []
         impropers_removed = []
-        if angle_tolerance is not None:
-            for angle in self._angles[:]:
-                at1 = ff.atom_types[angle.atom1.type].eqt_ang_s
-                at2 = ff.atom_types[angle.atom2.type].eqt_ang_c
-                at3 = ff.atom_types[angle.atom3.type].eqt_ang_s
-                aterm = AngleTerm(at1, at2, at3, 0)
-                if aterm.name not in ff.angle_terms.keys():
-                    raise Exception(
-                        f'{str(angle)} constructed but {str(aterm)} not found in FF')
-
-                aterm: AngleTerm = ff.angle_terms[aterm.name]
-                delta21 = angle.atom1.position - angle.atom2.position
-                delta23 = angle.atom3.position - angle.atom2.position
-                if 'x' in pbc:
-                    delta21[0] -= math.ceil(delta21[0] / box[0] - 0.5) * box[0]
-                    delta23[0] -= math.ceil(delta23[0] / box[0] - 0.5) * box[0]
-                if 'y' in pbc:
-                    delta21[1] -= math.ceil(delta21[1] / box[1] - 0.5) * box[1]
-                    delta23[1] -= math.ceil(delta23[1] / box[1] - 0.5) * box[1]
-                if 'z' in pbc:
-                    delta21[2] -= math.ceil(delta21[2] / box[2] - 0.5) * box[2]
-                    delta23[2] -= math.ceil(delta23[2] / box[2] - 0.5) * box[2]
-                cos = delta21.dot(delta23) / math.sqrt(delta21.dot(delta21) * delta23.dot(delta23))
-                theta = np.arccos(np.clip(cos, -1, 1))
-                if abs(theta * 180 / math.pi - aterm.theta) > angle_tolerance:
-                    self.remove_connectivity(angle)
-                    angles_removed.append(angle)
-
-        for dihedral in self._dihedrals[:]:
-            # consider wildcards in force field
-            ats_list = ff.get_eqt_for_dihedral(dihedral)
-            for ats in ats_list:
-                dterm = DihedralTerm(*ats)
-                if dterm.name in ff.dihedral_terms.keys():
-                    break
+        if angle_tolerance is not None and len(self._angles) > 0:
+            aterms = {}
+            thetas = []
+            for angle in self._angles:
+                key = (angle.atom1.type, angle.atom2.type, angle.atom3.type)
+                if key not in aterms:
+                    at1 = ff.atom_types[angle.atom1.type].eqt_ang_s
+                    at2 = ff.atom_types[angle.atom2.type].eqt_ang_c
+                    at3 = ff.atom_types[angle.atom3.type].eqt_ang_s
+                    aterm = AngleTerm(at1, at2, at3, 0)
+                    if aterm.name not in ff.angle_terms.keys():
+                        raise Exception(
+                            f'{str(angle)} constructed but {str(aterm)} not found in FF')
+                    aterms[key] = ff.angle_terms[aterm.name].theta
+                thetas.append(aterms[key])
+
+            ids = np.array([(angle.atom1.id_in_mol, angle.atom2.id_in_mol, angle.atom3.id_in_mol)
+                            for angle in self._angles])
+            delta21 = positions[ids[:, 0]] - positions[ids[:, 1]]
+            delta23 = positions[ids[:, 2]] - positions[ids[:, 1]]
+            if pbc != '':
+                delta21 = minimum_image(delta21, vectors, pbc)
+                delta23 = minimum_image(delta23, vectors, pbc)
+            cos = np.sum(delta21 * delta23, axis=1) / np.sqrt(np.sum(delta21 * delta21, axis=1)
+                                                              * np.sum(delta23 * delta23, axis=1))
+            theta = np.arccos(np.clip(cos, -1, 1)) * 180 / math.pi
+            is_far = np.abs(theta - np.array(thetas)) > angle_tolerance
+            angles_removed = [angle for angle, far in zip(self._angles, is_far) if far]
+            self._angles = [angle for angle, far in zip(self._angles, is_far) if not far]
+
+        # consider wildcards in force field. The result is cached for each combination of atom types
+        dterm_found = {}
+        dihedrals_kept = []
+        for dihedral in self._dihedrals:
+            key = (dihedral.atom1.type, dihedral.atom2.type, dihedral.atom3.type, dihedral.atom4.type)
+            if key not in dterm_found:
+                dterm_found[key] = any(DihedralTerm(*ats).name in ff.dihedral_terms.keys()
+                                       for ats in ff.get_eqt_for_dihedral(dihedral))
+            if dterm_found[key]:
+                dihedrals_kept.append(dihedral)
             else:
-                self.remove_connectivity(dihedral)
                 dihedrals_removed.append(dihedral)
+        self._dihedrals = dihedrals_kept
 
-        for improper in self._impropers[:]:
-            # consider wildcards in force field
-            ats_list = ff.get_eqt_for_improper(improper)
-            for ats in ats_list:
-                iterm = ImproperTerm(*ats)
-                if iterm.name in ff.improper_terms.keys():
-                    break
+        iterm_found = {}
+        impropers_kept = []
+        for improper in self._impropers:
+            key = (improper.atom1.type, improper.atom2.type, improper.atom3.type, improper.atom4.type)
+            if key not in iterm_found:
+                iterm_found[key] = any(ImproperTerm(*ats).name in ff.improper_terms.keys()
+                                       for ats in ff.get_eqt_for_improper(improper))
+            if iterm_found[key]:
+                impropers_kept.append(improper)
             else:
-                self.remove_connectivity(improper)
                 impropers_removed.append(improper)
+        self._impropers = impropers_kept
 
         if angles_removed != []:
             msg = '%i angles not added because value far from equilibrium: ' \
@@ -857,11 +911,22 @@ class Molecule():
             raise Exception(f'Generating Drude particles {str(self)} failed')
 
         for parent, drude in drude_pairs.items():
-            self.add_atom(drude, index=self._atoms.index(parent) + 1, update_topology=False)
+            self.add_atom(drude, update_topology=False)
             self.add_bond(parent, drude)
+        # move each Drude particle right after its parent in one pass
+        atoms = []
+        for atom in self._atoms:
+            if atom.is_drude:
+                continue
+            atoms.append(atom)
+            if atom in drude_pairs:
+                atoms.append(drude_pairs[atom])
+        self._atoms = atoms
+        for i, atom in enumerate(atoms):
+            atom.id_in_mol = i
 
         if self._topology is not None and update_topology:
-            self._topology.update_molecules(self._topology.molecules, deepcopy=False)
+            self._topology._reindex()
 
         dtype = ff.atom_types.get(type_drude)
         if dtype is None:
@@ -890,13 +955,14 @@ class Molecule():
         ----------
         update_topology : bool
         '''
+        drudes = []
         for parent, drude in self.get_drude_pairs():
             parent.mass += drude.mass
             parent.charge += drude.charge
-            self.remove_connectivity(drude._bonds[0])
-            self.remove_atom(drude, update_topology=False)
+            drudes.append(drude)
+        self._remove_atoms(drudes)
         if self._topology is not None and update_topology:
-            self._topology.update_molecules(self._topology.molecules, deepcopy=False)
+            self._topology._reindex()
 
     def generate_virtual_sites(self, ff, update_topology=True):
         '''
@@ -936,7 +1002,7 @@ class Molecule():
                 self.add_atom(atom_vsite, update_topology=False)
 
         if self._topology is not None and update_topology:
-            self._topology.update_molecules(self._topology.molecules, deepcopy=False)
+            self._topology._reindex()
 
     def remove_virtual_sites(self, update_topology=True):
         '''
@@ -946,11 +1012,9 @@ class Molecule():
         ----------
         update_topology : bool
         '''
-        for atom in self._atoms:
-            if atom.virtual_site is not None:
-                self.remove_atom(atom, update_topology=False)
+        self._remove_atoms([atom for atom in self._atoms if atom.virtual_site is not None])
         if self._topology is not None and update_topology:
-            self._topology.update_molecules(self._topology.molecules, deepcopy=False)
+            self._topology._reindex()
 
     def assign_mass_from_ff(self, ff):
         '''
@@ -980,3 +1044,96 @@ class Molecule():
         ForceField.assign_charge
         '''
         ff.assign_charge(self, transfer_bci_terms)
+
+
+class _MoleculeTemplate():
+    '''
+    The connectivity of a molecule in the form of indexes of atoms in the molecule.
+
+    It is immutable and shared by all the replicas of a molecule,
+    so that replicating a molecule does not need to deep copy the connectivity objects one by one.
+    The per-copy state (atom names, types, virtual sites, positions, etc.) is still taken from the source molecule.
+
+    Parameters
+    ----------
+    molecule : Molecule
+    '''
+    __slots__ = ('n_atom', 'bonds', 'angles', 'dihedrals', 'impropers', 'bond_graph')
+
+    def __init__(self, molecule):
+        self.n_atom = molecule.n_atom
+        self.bonds = [(bond.atom1.id_in_mol, bond.atom2.id_in_mol) for bond in molecule.bonds]
+        self.angles = [(angle.atom1.id_in_mol, angle.atom2.id_in_mol, angle.atom3.id_in_mol)
+                       for angle in molecule.angles]
+        self.dihedrals = [(dihedral.atom1.id_in_mol, dihedral.atom2.id_in_mol,
+                           dihedral.atom3.id_in_mol, dihedral.atom4.id_in_mol) for dihedral in molecule.dihedrals]
+        self.impropers = [(improper.atom1.id_in_mol, improper.atom2.id_in_mol,
+                           improper.atom3.id_in_mol, improper.atom4.id_in_mol) for improper in molecule.impropers]
+        # the bonds regardless of the sequence of atoms in each bond, for fingerprinting
+        self.bond_graph = tuple(sorted((min(bond), max(bond)) for bond in self.bonds))
+
+    def create(self, molecule, atoms):
+        '''
+        Create a replica of a molecule from the copies of its atoms.
+
+        Parameters
+        ----------
+        molecule : Molecule
+            The source molecule. It should have the same connectivity as this template
+        atoms : list of Atom
+            The copies of atoms of the source molecule
+
+        Returns
+        -------
+        replica : Molecule
+        '''
+        mol = Molecule(molecule.name)
+        mol.id = molecule.id
+        mol._template = self
+        if molecule._obmol is not None:
+            import openbabel
+            mol._obmol = openbabel.OBMol(molecule._obmol)
+
+        for i, atom in enumerate(atoms):
+            atom.id_in_mol = i
+            atom._molecule = mol
+        mol._atoms = atoms
+        for idx1, idx2 in self.bonds:
+            atom1 = atoms[idx1]
+            atom2 = atoms[idx2]
+            bond = Bond(atom1, atom2)
+            mol._bonds.append(bond)
+            atom1._bonds.append(bond)
+            atom2._bonds.append(bond)
+        mol._angles = [Angle(atoms[idx1], atoms[idx2], atoms[idx3]) for idx1, idx2, idx3 in self.angles]
+        mol._dihedrals = [Dihedral(atoms[idx1], atoms[idx2], atoms[idx3], atoms[idx4])
+                          for idx1, idx2, idx3, idx4 in self.dihedrals]
+        mol._impropers = [Improper(atoms[idx1], atoms[idx2], atoms[idx3], atoms[idx4])
+                          for idx1, idx2, idx3, idx4 in self.impropers]
+
+        for i, atom in enumerate(molecule._atoms):
+            vsite = atom.virtual_site
+            if vsite is not None:
+                new_parents = [atoms[p.id_in_mol] for p in vsite.parents]
+                atoms[i].virtual_site = VirtualSiteFactory.create(vsite.__class__.__name__, new_parents,
+                                                                  vsite.parameters)
+
+        return mol
+
+    def replicate(self, molecule):
+        '''
+        Create a lightweight replica of a molecule.
+
+        The positions, masses and charges of atoms are not copied.
+        The atoms of the replica should be bound to contiguous arrays by calling `_AtomArrays.append`
+        with the atoms of the source molecule as the sources.
+
+        Parameters
+        ----------
+        molecule : Molecule
+
+        Returns
+        -------
+        replica : Molecule
+        '''
+        return self.create(molecule, [atom._replicate() for atom in molecule._atoms])
@@ -59,6 +59,7 @@ class Msd():
 
         n_atom = int(lines[n_header])
         atoms = [Atom() for i in range(n_atom)]
+        mol_ids = [0] * n_atom  # for identifying molecules
         mol_names = {}
         for i in range(n_atom):
             line = lines[n_header + 1 + i]
@@ -78,11 +79,11 @@ class Msd():
             mol_name = words[10]
             if mol_id not in mol_names:
                 mol_names[mol_id] = mol_name
-            atom._mol_id = mol_id  # temporary attribute for identifying molecules
+            mol_ids[atom_id - 1] = mol_id
 
         molecules = [Molecule(name) for id, name in sorted(mol_names.items())]
-        for atom in atoms:
-            mol = molecules[atom._mol_id - 1]
+        for atom, mol_id in zip(atoms, mol_ids):
+            mol = molecules[mol_id - 1]
             mol.add_atom(atom, update_topology=False)
 
         n_bond = int(lines[n_header + n_atom + 1])
@@ -53,6 +53,7 @@ class Pdb():
             lines = f.read().splitlines()
 
         atoms = []
+        mol_ids = []  # for identifying molecules
         mol_names = {}
         for line in lines:
             line = line.rstrip()
@@ -72,7 +73,7 @@ class Pdb():
                 mol_id = int(line[22:26])
                 if mol_id not in mol_names:
                     mol_names[mol_id] = mol_name
-                atom._mol_id = mol_id  # temporary attribute for identifying molecules
+                mol_ids.append(mol_id)
 
                 x = float(line[30:38]) / 10
                 y = float(line[38:46]) / 10
@@ -87,8 +88,8 @@ class Pdb():
                 atom.mass = element.mass
 
         molecules = [Molecule(name) for id, name in sorted(mol_names.items())]
-        for atom in atoms:
-            mol = molecules[atom._mol_id - 1]
+        for atom, mol_id in zip(atoms, mol_ids):
+            mol = molecules[mol_id - 1]
             mol.add_atom(atom, update_topology=False)
 
         prev_section = ''
@@ -97,6 +97,7 @@ class Psf():
         '''
         n_atom = int(lines[0].strip().split()[0])
         atoms = [Atom() for i in range(n_atom)]
+        mol_ids = [0] * n_atom  # for identifying molecules
         mol_names = {}
         for i in range(n_atom):
             words = lines[1 + i].strip().split()
@@ -120,7 +121,7 @@ class Psf():
             atom.charge = charge
             atom.mass = mass
             atom.type = atom_type
-            atom._mol_id = mol_id  # temporary attribute for identifying molecules
+            mol_ids[atom_id - 1] = mol_id
             atom.alpha = -alpha / 1000  # convert A^3 to nm^3
             atom.thole = thole * 2
             if parse_drude and atom.type.startswith('D'):
@@ -130,8 +131,8 @@ class Psf():
                 atom.symbol = Element.guess_from_atom_type(atom.type).symbol
 
         molecules = [Molecule(name) for id, name in sorted(mol_names.items())]
-        for atom in atoms:
-            mol = molecules[atom._mol_id - 1]
+        for atom, mol_id in zip(atoms, mol_ids):
+            mol = molecules[mol_id - 1]
             mol.add_atom(atom, update_topology=False)
 
         self.topology.update_molecules(molecules)
@@ -1,8 +1,9 @@
 import shutil
 import numpy as np
 import copy
+import contextlib
 import tempfile
-from .atom import Atom
+from .atom import Atom, _AtomArrays
 from .connectivity import *
 from .molecule import Molecule
 from .unitcell import UnitCell
@@ -26,6 +27,7 @@ class Topology():
     -----
     All the molecules will be deep copied if there are identical molecules in the list, or if numbers is not None.
     The cell will always be deep copied if provided.
+    The positions, masses and charges of atoms are stored in contiguous arrays owned by the topology.
 
     Attributes
     ----------
@@ -39,6 +41,9 @@ class Topology():
         self.remark = ''
         self._molecules: [Molecule] = []
         self._atoms: [Atom] = []
+        self._arrays = _AtomArrays()
+        self._n_batch = 0  # depth of nested batch edits
+        self._reindex_pending = False
         if molecules is not None:
             self.update_molecules(molecules, numbers)
         if cell is not None:
@@ -70,6 +75,7 @@ class Topology():
         -----
         The molecules and atoms are deep copied if numbers is not None or deepcopy is True.
         The molecules and atoms are deep copied if there are identical molecules in the list.
+        The copies of one molecule are replicated from a connectivity template shared by all of them.
         '''
         if not isinstance(molecules, (list, tuple)) \
                 or any(type(mol) is not Molecule for mol in molecules):
@@ -80,22 +86,83 @@ class Topology():
 
         if numbers is None and not deepcopy:
             self._molecules = molecules[:]
+            self._atoms = [atom for mol in self._molecules for atom in mol.atoms]
+            self._arrays = _AtomArrays()
+            self._arrays.append(self._atoms)
         else:
             if numbers is None:
                 numbers = [1] * len(molecules)
             elif len(molecules) != len(numbers):
                 raise Exception('Elements in molecules and numbers do not match')
-            self._molecules = []
-            for mol, number in zip(molecules, numbers):
-                for i in range(number):
-                    self._molecules.append(copy.deepcopy(mol))
+            self._replicate_molecules(molecules, numbers)
 
         for mol in self._molecules:
             mol._topology = self
-        self._atoms = [atom for mol in self._molecules for atom in mol.atoms]
 
         self._assign_id()
 
+    def _replicate_molecules(self, molecules, numbers):
+        '''
+        Replicate the molecules with their connectivity templates instead of deep copying them one by one.
+
+        The replicas of one molecule share the same template.
+        The positions, masses and charges of the first replica are copied from the source molecule,
+        and those of the other replicas are filled from the first replica at once.
+        '''
+        self._molecules = []
+        atoms = []
+        sources = []
+        for mol, number in zip(molecules, numbers):
+            if number == 0:
+                continue
+            template = mol._get_template()
+            replicas = [template.replicate(mol) for i in range(number)]
+            self._molecules += replicas
+            atoms += replicas[0].atoms
+            sources += mol.atoms
+            for replica in replicas[1:]:
+                atoms += replica.atoms
+            sources += replicas[0].atoms * (number - 1)
+        self._atoms = atoms
+        self._arrays = _AtomArrays()
+        self._arrays.append(atoms, sources)
+
+    @contextlib.contextmanager
+    def batch_edit(self):
+        '''
+        A context for editing the atoms of molecules in this topology without re-indexing after each edit.
+
+        Inside this context, `Molecule.add_atom`, `Molecule.remove_atom`, etc. do not update the topology immediately.
+        Instead, the atom list and the index of molecules and atoms are updated in one pass when the context exits.
+        The ids of atoms are therefore out of date inside this context.
+        The contexts can be nested, in which case the update is performed when the outermost context exits.
+
+        Examples
+        --------
+        >>> with top.batch_edit():
+        >>>     for mol in top.molecules:
+        >>>         mol.generate_drude_particles(ff)
+        '''
+        self._n_batch += 1
+        try:
+            yield self
+        finally:
+            self._n_batch -= 1
+            if self._n_batch == 0 and self._reindex_pending:
+                self._reindex()
+
+    def _reindex(self):
+        '''
+        Update the atom list and the index of molecules and atoms after the molecules are edited.
+
+        If the topology is in batch edit, the update is deferred until the batch edit finishes.
+        '''
+        if self._n_batch > 0:
+            self._reindex_pending = True
+            return
+        self._reindex_pending = False
+        self.update_molecules(self._molecules, deepcopy=False)
+
     def _assign_id(self):
         '''
         Assign the id of molecules and atoms belongs to this topology
@@ -126,6 +193,7 @@ class Topology():
         for atom in molecule.atoms:
             atom.id = self.n_atom
             self._atoms.append(atom)
+        self._arrays.append(molecule.atoms)
 
     def set_positions(self, positions):
         '''
@@ -137,6 +205,10 @@ class Topology():
         '''
         if self.n_atom != len(positions):
             raise Exception('Length of positions should equal to the number of atoms')
+        if self._arrays_valid and np.shape(positions) == (self.n_atom, 3):
+            self._arrays.set_positions(slice(0, self.n_atom), positions)
+            self._arrays.has_positions[:self.n_atom] = True
+            return
         for i, atom in enumerate(self.atoms):
             atom.position = np.array(positions[i])
 
@@ -146,6 +218,7 @@ class Topology():
 
         This is mainly used for exporting GROMACS topol file.
         By default, the unique molecules are deep copied.
+        The similar molecules are grouped together even if they are not consecutive.
 
         Parameters
         ----------
@@ -154,22 +227,52 @@ class Topology():
         Returns
         -------
         molecule_number : dict [Molecule, int]
+
+        See Also
+        --------
+        get_unique_molecule_index
+        '''
+        mols_unique, index = self.get_unique_molecule_index()
+        counts = np.bincount(np.array(index, dtype=int), minlength=len(mols_unique))
+        if deepcopy:
+            mols_unique = [copy.deepcopy(mol) for mol in mols_unique]
+        return {mol: int(count) for mol, count in zip(mols_unique, counts)}
+
+    def get_unique_molecule_index(self):
+        '''
+        Group the similar molecules in this topology by their fingerprints.
+
+        The grouping is done in one pass with hashing, and the molecules do not need to be consecutive.
+
+        Returns
+        -------
+        molecules : list of Molecule
+            The first molecule of each group. They are not deep copied
+        index : list of int
+            The index of the group in `molecules` for each molecule in this topology
+
+        See Also
+        --------
+        Molecule.get_fingerprint
         '''
         mols_unique = []
-        flags = [-1] * self.n_molecule
-        mol_last: Molecule = None
-        for i, mol in enumerate(self._molecules):
-            if mol_last is not None and mol.is_similar_to(mol_last):
-                flags[mol.id] = flags[mol_last.id]
+        index = []
+        groups = {}
+        arrays = self._arrays
+        for mol in self._molecules:
+            # the charges are taken from the rows of the atoms in the arrays of this topology.
+            # the rows are not assumed to be consecutive, because the molecule can be edited without updating topology
+            rows = [atom._row for atom in mol.atoms if atom._arrays is arrays]
+            if len(rows) == len(mol.atoms):
+                fingerprint = mol._get_fingerprint((arrays.charges[rows] + 0.0).tobytes())  # -0.0 is treated as 0.0
             else:
+                fingerprint = mol.get_fingerprint()
+            i = groups.get(fingerprint)
+            if i is None:
+                i = groups[fingerprint] = len(mols_unique)
                 mols_unique.append(mol)
-                flags[mol.id] = mol.id
-            mol_last = mol
-
-        if deepcopy:
-            return {copy.deepcopy(mol): flags.count(mol.id) for mol in mols_unique}
-        else:
-            return {mol: flags.count(mol.id) for mol in mols_unique}
+            index.append(i)
+        return mols_unique, index
 
     def scale_with_packmol(self, numbers, packmol=None):
         '''
@@ -377,6 +480,15 @@ class Topology():
         '''
         return [improper for mol in self._molecules for improper in mol.impropers]
 
+    @property
+    def _arrays_valid(self):
+        '''
+        Whether or not the contiguous arrays are in sync with the atoms of this topology.
+
+        They are out of sync if some atoms have been added into another topology after they were added into this one.
+        '''
+        return not self._arrays.stale and self._arrays.n_atom == self.n_atom
+
     @property
     def has_position(self):
         '''
@@ -386,6 +498,8 @@ class Topology():
         -------
         has : bool
         '''
+        if self._arrays_valid:
+            return bool(self._arrays.has_positions[:self.n_atom].all())
         return all(atom.has_position for atom in self.atoms)
 
     @property
@@ -397,6 +511,8 @@ class Topology():
         -------
         positions : array_like
         '''
+        if self._arrays_valid:
+            return self._arrays.get_positions(slice(0, self.n_atom)).copy()
         return np.array([atom.position for atom in self.atoms])
 
     @property
@@ -657,9 +773,9 @@ class Topology():
         Molecule.generate_drude_particles
         '''
         mol: Molecule
-        for mol in self._molecules:
-            mol.generate_drude_particles(ff, update_topology=False)
-        self.update_molecules(self._molecules, deepcopy=False)
+        with self.batch_edit():
+            for mol in self._molecules:
+                mol.generate_drude_particles(ff)
 
     def remove_drude_particles(self):
         '''
@@ -672,9 +788,9 @@ class Topology():
         Molecule.remove_drude_particles
         '''
         mol: Molecule
-        for mol in self._molecules:
-            mol.remove_drude_particles(update_topology=False)
-        self.update_molecules(self._molecules, deepcopy=False)
+        with self.batch_edit():
+            for mol in self._molecules:
+                mol.remove_drude_particles()
 
     def generate_virtual_sites(self, ff, **kwargs):
         '''
@@ -690,9 +806,9 @@ class Topology():
         Molecule.generate_virtual_sites
         '''
         mol: Molecule
-        for mol in self._molecules:
-            mol.generate_virtual_sites(ff, update_topology=False)
-        self.update_molecules(self._molecules, deepcopy=False)
+        with self.batch_edit():
+            for mol in self._molecules:
+                mol.generate_virtual_sites(ff)
 
     def remove_virtual_sites(self):
         '''
@@ -705,9 +821,9 @@ class Topology():
         Molecule.remove_virtual_sites
         '''
         mol: Molecule
-        for mol in self._molecules:
-            mol.remove_virtual_sites(update_topology=False)
-        self.update_molecules(self._molecules, deepcopy=False)
+        with self.batch_edit():
+            for mol in self._molecules:
+                mol.remove_virtual_sites()
 
     def assign_mass_from_ff(self, ff):
         '''
@@ -1,8 +1,10 @@
-from .trajectory import Frame, Trajectory
+from .trajectory import Frame, FrameChunk, Trajectory
 from .handler import TrjHandler
 from .gro import Gro
 from .lammps import LammpsTrj
 from .xyz import Xyz
 from .dcd import Dcd
 from .xtc import Xtc
+from .trr import Trr
+from .mstrj import MsTrj
 from .combined_trj import CombinedTrj
\ No newline at end of file
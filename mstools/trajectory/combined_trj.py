@@ -21,10 +21,17 @@ class CombinedTrj(TrjHandler):
             self._handlers.append(Handler(file, mode='r'))
 
     def get_info(self):
+        for handler in self._handlers:
+            handler.get_info()
+        return self._map_frames()
+
+    def _map_frames(self):
+        '''
+        Map the frames to the handlers after the information of all handlers are collected.
+        '''
         self._i_frame_handler = []
         self._i_frame_offset = []
         for handler in self._handlers:
-            handler.get_info()
             self._i_frame_handler += [handler] * handler.n_frame
             self._i_frame_offset += list(range(handler.n_frame))
 
@@ -35,6 +42,14 @@ class CombinedTrj(TrjHandler):
         self.n_atom = self._handlers[0].n_atom
         return self.n_atom, self.n_frame
 
+    def get_frame_index(self):
+        return {'handlers': [handler.get_frame_index() for handler in self._handlers]}
+
+    def set_frame_index(self, index):
+        for handler, handler_index in zip(self._handlers, index['handlers']):
+            handler.set_frame_index(handler_index)
+        self._map_frames()
+
     def close(self):
         for handler in self._handlers:
             handler.close()
@@ -43,3 +58,14 @@ class CombinedTrj(TrjHandler):
         handler = self._i_frame_handler[i_frame]
         i = self._i_frame_offset[i_frame]
         handler.read_frame(i, frame)
+
+    def read_frames(self, i_frames, frames):
+        # group the frames by handlers so that each handler can read its frames sequentially
+        groups = {}
+        for i_frame, frame in zip(i_frames, frames):
+            handler = self._i_frame_handler[i_frame]
+            _, i_frames_handler, frames_handler = groups.setdefault(id(handler), (handler, [], []))
+            i_frames_handler.append(self._i_frame_offset[i_frame])
+            frames_handler.append(frame)
+        for handler, i_frames_handler, frames_handler in groups.values():
+            handler.read_frames(i_frames_handler, frames_handler)
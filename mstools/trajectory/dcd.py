@@ -46,10 +46,25 @@ class Dcd(TrjHandler):
     def read_frame(self, i_frame, frame):
         self._dcd.seek(i_frame)
         positions, box_lengths, box_angles = self._dcd.read(1)
-        angle = box_angles[0]
-        angle[np.abs(angle - 90) < 1E-4] = 90  # in case precision issue
-        frame.positions = positions[0] / 10  # convert A to nm
-        frame.cell.set_box([box_lengths[0] / 10, angle])  # convert A to nm
+        self._fill_frame(positions[0], box_lengths[0], box_angles[0], frame)
+
+    def read_frames(self, i_frames, frames):
+        # read evenly spaced frames with one sequential read
+        strides = np.diff(i_frames)
+        if len(i_frames) < 2 or strides[0] <= 0 or np.any(strides != strides[0]):
+            super().read_frames(i_frames, frames)
+            return
+
+        self._dcd.seek(i_frames[0])
+        positions, box_lengths, box_angles = self._dcd.read(len(i_frames), stride=int(strides[0]))
+        for i, frame in enumerate(frames):
+            self._fill_frame(positions[i], box_lengths[i], box_angles[i], frame)
+
+    @staticmethod
+    def _fill_frame(positions, box_lengths, box_angles, frame):
+        box_angles[np.abs(box_angles - 90) < 1E-4] = 90  # in case precision issue
+        np.divide(positions, 10, out=frame.positions)  # convert A to nm
+        frame.cell.set_box([box_lengths / 10, box_angles])  # convert A to nm
 
     def write_frame(self, frame, subset=None, **kwargs):
         '''
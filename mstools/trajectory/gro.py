@@ -9,6 +9,8 @@ class Gro(TrjHandler):
     Read and write cell, atomic positions and optionally velocities from/to GRO file.
     '''
 
+    _index_attributes = ('_frame_offset',)
+
     def __init__(self, file, mode='r'):
         super().__init__()
         if mode not in ('r', 'w', 'a'):
@@ -31,33 +33,81 @@ class Gro(TrjHandler):
             raise
         self._file.seek(0)
 
-        # read in the file once and build a list of line offsets
-        # the last element is the length of whole file
-        self._line_offset = [0]
-        offset = 0
-        for line in self._file:
-            offset += len(line)
-            self._line_offset.append(offset)
-        self._file.seek(0)
-
         # build a list of frame offsets
-        self.n_frame = len(self._line_offset) // (3 + self.n_atom)
-        self._frame_offset = []
-        for i in range(self.n_frame + 1):
-            line_start = (3 + self.n_atom) * i
-            self._frame_offset.append(self._line_offset[line_start])
+        # the last element is the end of the last frame
+        self._frame_offset = self.load_frame_offset(self._file.name, 3 + self.n_atom)
+        self.n_frame = len(self._frame_offset) - 1
 
         return self.n_atom, self.n_frame
 
     def read_frame(self, i_frame, frame):
         # skip to frame i and read only this frame
-        self._file.seek(self._frame_offset[i_frame])
-        lines = self._file.read(self._frame_offset[i_frame + 1] - self._frame_offset[i_frame]) \
-            .decode().splitlines()
+        self._parse_frame(i_frame, self._read_frame_data(i_frame), frame)
+
+    def _parse_frame(self, i_frame, data, frame):
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        newline = np.flatnonzero(buffer == ord('\n'))
+        begin = newline[1] + 1
+        end = newline[self.n_atom + 1] + 1
+        width = (end - begin) // self.n_atom
+
+        # if all atom lines have the same width, parse the columns of all atoms at once
+        # otherwise, fall back to parse line by line
+        if width * self.n_atom == end - begin \
+                and np.all(newline[2:self.n_atom + 2] - newline[1:self.n_atom + 1] == width):
+            block = buffer[begin:end].reshape(self.n_atom, width)
+            n_char = width - 1 - int(block[0, width - 2] == ord('\r'))
+            frame.positions[:] = self._parse_columns(block, 20, 3)
+            frame.has_velocity = n_char >= 68
+            if frame.has_velocity:
+                try:
+                    frame.velocities[:] = self._parse_columns(block, 44, 3)
+                except ValueError:
+                    frame.has_velocity = False
+        else:
+            self._parse_lines(data[begin:end].decode().splitlines(), frame)
+
+        _box = tuple(map(float, data[end:].split()))
+        if len(_box) == 3:
+            frame.cell.set_box(_box)
+        elif len(_box) == 9:
+            ax, by, cz, ay, az, bx, bz, cx, cy = _box
+            frame.cell.set_box([[ax, ay, az], [bx, by, bz], [cx, cy, cz]])
+        else:
+            raise ValueError('Invalid box')
+
+    @staticmethod
+    def _parse_columns(block, start, n_column, column_width=8):
+        '''
+        Convert several fixed width columns of all lines into floats.
+
+        Parameters
+        ----------
+        block : np.ndarray of np.uint8
+            The characters of all lines in shape of (n_line, line_width)
+        start : int
+            The position of the first character of the first column
+        n_column : int
+        column_width : int
+
+        Returns
+        -------
+        values : np.ndarray of float
+            It's in shape of (n_line, n_column)
+        '''
+        columns = np.ascontiguousarray(block[:, start:start + n_column * column_width])
+        if columns.shape[1] != n_column * column_width:
+            raise ValueError('Lines are too short')
+        return columns.view('S%i' % column_width).astype(np.float32)
+
+    def _parse_lines(self, lines, frame):
+        '''
+        Parse the atom lines one by one. Only used if the lines do not have the same width.
+        '''
         # assume there are velocities. we'll see later
         frame.has_velocity = True
         for i in range(self.n_atom):
-            line = lines[i + 2]
+            line = lines[i]
             x = float(line[20:28])
             y = float(line[28:36])
             z = float(line[36:44])
@@ -72,14 +122,6 @@ class Gro(TrjHandler):
                     frame.has_velocity = False
                 else:
                     frame.velocities[i][:] = vx, vy, vz
-        _box = tuple(map(float, lines[self.n_atom + 2].split()))
-        if len(_box) == 3:
-            frame.cell.set_box(_box)
-        elif len(_box) == 9:
-            ax, by, cz, ay, az, bx, bz, cx, cy = _box
-            frame.cell.set_box([[ax, ay, az], [bx, by, bz], [cx, cy, cz]])
-        else:
-            raise ValueError('Invalid box')
 
     def write_frame(self, frame, topology, subset=None, write_velocity=False, **kwargs):
         '''
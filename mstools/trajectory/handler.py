@@ -1,5 +1,8 @@
 import os
+import mmap
+import numpy as np
 from io import IOBase
+from .. import logger
 
 
 class TrjHandler():
@@ -12,6 +15,13 @@ class TrjHandler():
 
     _klass_map = {}
 
+    #: Whether or not to save the frame offsets of text trajectories into a sidecar file for fast re-opening
+    use_index_cache = True
+    _INDEX_CACHE_VERSION = 1
+
+    # the attributes collected by get_info which are required for reading frames
+    _index_attributes = ()
+
     def __init__(self):
         self._file = IOBase()
         self.n_atom = -1
@@ -71,10 +81,145 @@ class TrjHandler():
         '''
         raise NotImplementedError('Method not implemented')
 
+    def get_frame_index(self):
+        '''
+        Get the information collected by :func:`get_info` which is required for reading frames.
+
+        It can be passed to :func:`set_frame_index` of another handler opened for the same file
+        (e.g. in another process), so that the file doesn't need to be scanned again.
+
+        Returns
+        -------
+        index : dict
+        '''
+        index = {'n_atom': self.n_atom, 'n_frame': self.n_frame}
+        for attr in self._index_attributes:
+            index[attr] = getattr(self, attr)
+        return index
+
+    def set_frame_index(self, index):
+        '''
+        Initialize the handler opened in 'r' mode with the information generated by :func:`get_frame_index`.
+
+        If the handler doesn't record any index, :func:`get_info` will be called instead.
+
+        Parameters
+        ----------
+        index : dict
+        '''
+        if not self._index_attributes:
+            self.get_info()
+            return
+        for attr, value in index.items():
+            setattr(self, attr, value)
+
+    @staticmethod
+    def scan_frame_offset(file, n_line_per_frame, chunk=1 << 26):
+        '''
+        Scan a text trajectory file and get the offsets of frames.
+
+        The file is memory mapped and the newlines are searched chunk by chunk with numpy,
+        so that the lines are never iterated in Python.
+        It assumes that all frames have the same number of lines.
+
+        Parameters
+        ----------
+        file : str
+        n_line_per_frame : int
+        chunk : int
+            The number of bytes to be scanned at one time
+
+        Returns
+        -------
+        frame_offset : np.ndarray of int
+            The offsets of all frames. The last element is the end of the last frame.
+            Therefore, the number of frames equals to the length of this array minus one.
+        '''
+        size = os.path.getsize(file)
+        if size == 0:
+            return np.zeros(1, dtype=np.int64)
+
+        offsets = [np.zeros(1, dtype=np.int64)]
+        n_line = 0  # number of lines started so far, not including the first line
+        with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            buffer = np.frombuffer(mm, dtype=np.uint8)
+            for begin in range(0, size, chunk):
+                newline = np.flatnonzero(buffer[begin:begin + chunk] == ord('\n')) + begin
+                # index of the line starting after each newline
+                i_line = np.arange(n_line + 1, n_line + 1 + len(newline))
+                offsets.append(newline[i_line % n_line_per_frame == 0] + 1)
+                n_line += len(newline)
+            ends_with_newline = buffer[-1] == ord('\n')
+            del buffer
+
+        # the end of file is also treated as the start of a line if the last line is not terminated by newline
+        if not ends_with_newline:
+            n_line += 1
+            if n_line % n_line_per_frame == 0:
+                offsets.append(np.array([size], dtype=np.int64))
+
+        frame_offset = np.concatenate(offsets).astype(np.int64)
+        n_frame = (n_line + 1) // n_line_per_frame
+        return frame_offset[:n_frame + 1]
+
+    @staticmethod
+    def load_frame_offset(file, n_line_per_frame):
+        '''
+        Get the offsets of frames in a text trajectory file with cache.
+
+        The offsets are saved into a hidden sidecar file next to the trajectory after scanning.
+        Next time the trajectory is opened, the offsets are loaded from the sidecar file directly
+        if the size and modification time of the trajectory are not changed.
+        If the sidecar file can not be written, the offsets are simply not cached.
+
+        Parameters
+        ----------
+        file : str
+        n_line_per_frame : int
+
+        Returns
+        -------
+        frame_offset : np.ndarray of int
+
+        See Also
+        --------
+        scan_frame_offset
+        '''
+        if not TrjHandler.use_index_cache:
+            return TrjHandler.scan_frame_offset(file, n_line_per_frame)
+
+        stat = os.stat(file)
+        key = np.array([TrjHandler._INDEX_CACHE_VERSION, stat.st_size, stat.st_mtime_ns, n_line_per_frame],
+                       dtype=np.int64)
+        dirname, basename = os.path.split(os.path.abspath(file))
+        cache = os.path.join(dirname, '.%s.mstools-idx' % basename)
+
+        try:
+            with np.load(cache) as data:
+                if np.array_equal(data['key'], key):
+                    return data['frame_offset']
+        except Exception:
+            pass
+
+        frame_offset = TrjHandler.scan_frame_offset(file, n_line_per_frame)
+        try:
+            tmp = cache + '.%i' % os.getpid()
+            with open(tmp, 'wb') as f:
+                np.savez(f, key=key, frame_offset=frame_offset)
+            os.replace(tmp, cache)
+        except Exception:
+            logger.debug('Cannot save frame index to %s' % cache)
+
+        return frame_offset
+
     def read_frame(self, i_frame, frame):
         '''
         Read a single frame.
 
+        The arrays of positions, velocities and charges of the frame should be filled in place
+        instead of being replaced by new arrays,
+        so that the buffers of the frame can be reused across frames without allocation.
+
         Parameters
         ----------
         i_frame : int
@@ -84,6 +229,67 @@ class TrjHandler():
         '''
         raise NotImplementedError('Method not implemented')
 
+    def read_frames(self, i_frames, frames):
+        '''
+        Read several frames.
+
+        If the handler records the offsets of frames in `_frame_offset` and implements :func:`_parse_frame`,
+        the bytes of all the frames are read with one sequential read if they are close to each other in the file.
+        Otherwise, the frames are read one by one with :func:`read_frame`.
+
+        Parameters
+        ----------
+        i_frames : list of int
+            The indexes of the frames in the trajectory
+        frames : list of Frame
+            The information read from the trajectory will be written into these Frames
+        '''
+        frame_offset = getattr(self, '_frame_offset', None)
+        if frame_offset is None or type(self)._parse_frame is TrjHandler._parse_frame or len(i_frames) < 2:
+            for i_frame, frame in zip(i_frames, frames):
+                self.read_frame(i_frame, frame)
+            return
+
+        i_frames = np.asarray(i_frames)
+        begin = frame_offset[i_frames.min()]
+        end = frame_offset[i_frames.max() + 1]
+        n_byte = (frame_offset[i_frames + 1] - frame_offset[i_frames]).sum()
+        # do not read the whole range if most of the bytes are not required
+        if end - begin > 4 * n_byte:
+            for i_frame, frame in zip(i_frames, frames):
+                self.read_frame(i_frame, frame)
+            return
+
+        self._file.seek(begin)
+        data = self._file.read(end - begin)
+        for i_frame, frame in zip(i_frames, frames):
+            self._parse_frame(i_frame, data[frame_offset[i_frame] - begin:frame_offset[i_frame + 1] - begin], frame)
+
+    def _read_frame_data(self, i_frame):
+        '''
+        Read the bytes of a frame based on the offsets of frames recorded in `_frame_offset`.
+        '''
+        self._file.seek(self._frame_offset[i_frame])
+        return self._file.read(self._frame_offset[i_frame + 1] - self._frame_offset[i_frame])
+
+    def _parse_frame(self, i_frame, data, frame):
+        '''
+        Parse the bytes of a frame.
+
+        Handlers recording the offsets of frames should implement this method
+        so that several frames can be read with one sequential read by :func:`read_frames`.
+
+        Parameters
+        ----------
+        i_frame : int
+            The index of the frame in the trajectory
+        data : bytes
+            The bytes of this frame
+        frame : Frame
+            The information parsed will be written into this Frame
+        '''
+        raise NotImplementedError('Method not implemented')
+
     def write_frame(self, frame, **kwargs):
         '''
         Write a frame into the trajectory file opened by the handler.
@@ -1,6 +1,5 @@
 import numpy as np
-import pandas as pd
-from io import StringIO
+from io import BytesIO
 from .handler import TrjHandler
 from . import Trajectory, Frame
 from .. import logger
@@ -18,12 +17,15 @@ class LammpsTrj(TrjHandler):
     Writing to LammpsDump is not supported yet.
     '''
 
+    _index_attributes = ('_frame_offset',)
+
     def __init__(self, trj_file, mode='r'):
         super().__init__()
 
         if mode == 'r':
             # open it in binary mode so that we can correctly seek despite of line ending
             self._file = open(trj_file, 'rb')
+            self._column_maps = {}
         else:
             raise Exception('Writing support for LammpsTrj haven\'t been implemented')
 
@@ -38,29 +40,63 @@ class LammpsTrj(TrjHandler):
             raise
         self._file.seek(0)
 
-        # read in the file once and build a list of line offsets
-        # the last element is the length of whole file
-        self._line_offset = [0]
-        offset = 0
-        for line in self._file:
-            offset += len(line)
-            self._line_offset.append(offset)
-        self._file.seek(0)
-
         # build a list of frame offsets
-        self.n_frame = len(self._line_offset) // (9 + self.n_atom)
-        self._frame_offset = []
-        for i in range(self.n_frame + 1):
-            line_start = (9 + self.n_atom) * i
-            self._frame_offset.append(self._line_offset[line_start])
+        # the last element is the end of the last frame
+        self._frame_offset = self.load_frame_offset(self._file.name, 9 + self.n_atom)
+        self.n_frame = len(self._frame_offset) - 1
 
         return self.n_atom, self.n_frame
 
+    def _get_column_map(self, header):
+        '''
+        Determine which columns should be read from the `ITEM: ATOMS` line.
+
+        The result is cached so that the header is parsed only once for all frames.
+
+        Parameters
+        ----------
+        header : str
+            The line starts with `ITEM: ATOMS`
+
+        Returns
+        -------
+        column_map : dict
+        '''
+        column_map = self._column_maps.get(header)
+        if column_map is not None:
+            return column_map
+
+        title = header.split()[2:]
+        for names, scaled, wrapped in [(('x', 'y', 'z'), False, True),
+                                       (('xs', 'ys', 'zs'), True, True),
+                                       (('xu', 'yu', 'zu'), False, False),
+                                       (('xsu', 'ysu', 'zsu'), True, False)]:
+            if all(name in title for name in names):
+                break
+        else:
+            raise Exception('Positions not found in lammpstrj file')
+
+        usecols = [title.index('id')] + [title.index(name) for name in names]
+        image = wrapped and all(name in title for name in ('ix', 'iy', 'iz'))
+        if wrapped and not image:
+            logger.warning('Image flag not found for wrapped positions')
+        if image:
+            usecols += [title.index(name) for name in ('ix', 'iy', 'iz')]
+        charge = 'q' in title
+        if charge:
+            usecols.append(title.index('q'))
+
+        column_map = {'usecols': usecols, 'scaled': scaled, 'image': image, 'charge': charge}
+        self._column_maps[header] = column_map
+        return column_map
+
     def read_frame(self, i_frame, frame):
         # skip to frame i and read only this frame
-        self._file.seek(self._frame_offset[i_frame])
-        string = self._file.read(self._frame_offset[i_frame + 1] - self._frame_offset[i_frame]).decode()
-        lines = string.splitlines()
+        self._parse_frame(i_frame, self._read_frame_data(i_frame), frame)
+
+    def _parse_frame(self, i_frame, data, frame):
+        # only split the header. the lines of atoms are parsed by numpy directly
+        lines = data.split(b'\n', 9)
         frame.step = int(lines[1])
         try:
             xlo, xhi = tuple(map(lambda x: float(x) / 10, lines[5].split()))  # convert from A to nm
@@ -74,44 +110,25 @@ class LammpsTrj(TrjHandler):
             zlo, zhi, cy = tuple(map(lambda x: float(x) / 10, lines[7].split()))
             frame.cell.set_box([[xhi - xlo, 0, 0], [bx, yhi - ylo, 0], [cx, cy, zhi - zlo]])
 
-        tokens = lines[8].split()
-        title = tokens[2:]
-
-        data = '\n'.join(lines[9:])
-        df = pd.read_csv(StringIO(data), header=None, index_col=None, names=title, sep=r'\s+')
-        wrapped = False
-        if 'x' in df.columns:
-            df['x'] = df['x'] / 10  # convert from A to nm
-            df['y'] = df['y'] / 10
-            df['z'] = df['z'] / 10
-            wrapped = True
-        elif 'xs' in df.columns:
-            df['x'] = df.xs * frame.cell.size[0] + xlo
-            df['y'] = df.ys * frame.cell.size[1] + ylo
-            df['z'] = df.zs * frame.cell.size[2] + zlo
-            wrapped = True
-        elif 'xu' in df.columns:
-            df['x'] = df.xu / 10  # convert from A to nm
-            df['y'] = df.yu / 10
-            df['z'] = df.zu / 10
-        elif 'xsu' in df.columns:
-            df['x'] = df.xsu * frame.cell.size[0] + xlo
-            df['y'] = df.ysu * frame.cell.size[1] + ylo
-            df['z'] = df.zsu * frame.cell.size[2] + zlo
-        if wrapped:
-            if 'ix' not in df.columns:
-                logger.warning('Image flag not found for wrapped positions')
-            else:
-                # ix is revered words for pandas, so use df['ix'] instead of df.ix
-                df['x'] += df['ix'] * frame.cell.size[0]
-                df['y'] += df['iy'] * frame.cell.size[1]
-                df['z'] += df['iz'] * frame.cell.size[2]
-
-        frame.has_charge = 'q' in df.columns
-        for row in df.itertuples():
-            frame.positions[row.id - 1] = np.array([row.x, row.y, row.z])
-            if frame.has_charge:
-                frame.charges[row.id - 1] = float(row.q)
+        column_map = self._get_column_map(lines[8].decode())
+        table = np.loadtxt(BytesIO(lines[9]), dtype=np.float64, usecols=column_map['usecols'], ndmin=2)
+        if len(table) != self.n_atom:
+            raise Exception('Number of atoms in frame %i is not %i' % (i_frame, self.n_atom))
+
+        ids = table[:, 0].astype(int) - 1
+        xyz = table[:, 1:4]
+        size = frame.cell.size
+        if column_map['scaled']:
+            xyz = xyz * size + np.array([xlo, ylo, zlo])
+        else:
+            xyz = xyz / 10  # convert from A to nm
+        if column_map['image']:
+            xyz += table[:, 4:7] * size
+
+        frame.positions[ids] = xyz
+        frame.has_charge = column_map['charge']
+        if frame.has_charge:
+            frame.charges[ids] = table[:, -1]
 
 TrjHandler.register_format('.lammpstrj', LammpsTrj)
 TrjHandler.register_format('.ltrj', LammpsTrj)
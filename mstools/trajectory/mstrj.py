@@ -0,0 +1,249 @@
+import os
+import mmap
+import zlib
+import struct
+import numpy as np
+from . import Trajectory, Frame
+from .handler import TrjHandler
+
+
+class MsTrj(TrjHandler):
+    '''
+    Read and write step, time, cell, positions and optionally velocities and charges from/to the native binary format
+    of mstools.
+
+    The file is made of a file header, the frames and an index of frames at the end of file.
+    The index allows reading arbitrary frame without scanning the file.
+    If the index is missing (e.g. the writing was interrupted), the frames will be scanned based on their headers.
+    The file is memory mapped for reading.
+
+    Each frame is made of a frame header and a payload.
+    The payload contains the cell, positions and optionally velocities and charges in float32.
+    The positions can be quantized with a given precision for lossy compression (similar to XTC),
+    in which case the positions are stored as the differences between neighbouring atoms in the smallest integer type.
+    The payload can be compressed with zlib.
+    The precision and compression are controlled per frame by the arguments of :func:`write_frame`.
+
+    All the numbers are stored in little endian.
+    '''
+
+    _index_attributes = ('_frame_offset',)
+
+    MAGIC = b'MSTRJ\x00\x00\x00'
+    INDEX_MAGIC = b'MSTRJIDX'
+    VERSION = 1
+
+    # magic, version, n_atom
+    _HEADER = struct.Struct('<8sII')
+    # tag, flags, step, time, size of payload
+    _FRAME_HEADER = struct.Struct('<4sIqdQ')
+    _FRAME_TAG = b'FRM\x00'
+    # magic, offset of index, number of frames
+    _TRAILER = struct.Struct('<8sqq')
+
+    FLAG_CELL = 1
+    FLAG_VELOCITY = 2
+    FLAG_CHARGE = 4
+    FLAG_QUANTIZED = 8
+    FLAG_COMPRESSED = 16
+
+    _INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+    def __init__(self, file, mode='r'):
+        super().__init__()
+
+        if mode not in ('r', 'w', 'a'):
+            raise Exception('Invalid mode')
+
+        self._mode = mode
+        self._mmap = None
+        if mode == 'r':
+            self._file = open(file, 'rb')
+            if os.path.getsize(file) > 0:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        elif mode == 'w':
+            self._file = open(file, 'wb')
+            self._frame_offset = []
+        elif mode == 'a':
+            if not os.path.exists(file) or os.path.getsize(file) == 0:
+                self._file = open(file, 'wb')
+                self._frame_offset = []
+            else:
+                with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    self.n_atom = self._read_header(mm)
+                    frame_offset = self._load_frame_offset(mm)
+                self._frame_offset = list(frame_offset)
+                # the index will be rewritten when closed
+                self._file = open(file, 'r+b')
+                self._file.truncate(self._frame_offset[-1])
+                self._file.seek(self._frame_offset[-1])
+
+    def close(self):
+        if self._mode == 'r':
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+        elif not self._file.closed and len(self._frame_offset) > 0:
+            index_offset = self._frame_offset[-1]
+            self._file.seek(index_offset)
+            self._file.write(self.INDEX_MAGIC)
+            self._file.write(np.array(self._frame_offset, dtype='<i8').tobytes())
+            self._file.write(self._TRAILER.pack(self.INDEX_MAGIC, index_offset, len(self._frame_offset) - 1))
+        self._file.close()
+
+    def _read_header(self, buffer):
+        magic, version, n_atom = self._HEADER.unpack_from(buffer, 0)
+        if magic != self.MAGIC:
+            raise Exception('Invalid MSTRJ file')
+        if version > self.VERSION:
+            raise Exception('MSTRJ file of version %i is not supported' % version)
+        return n_atom
+
+    def _load_frame_offset(self, buffer):
+        '''
+        Load the frame index from the end of file. If it's not valid, scan the headers of frames instead.
+        '''
+        size = len(buffer)
+        if size >= self._HEADER.size + self._TRAILER.size:
+            magic, index_offset, n_frame = self._TRAILER.unpack_from(buffer, size - self._TRAILER.size)
+            if magic == self.INDEX_MAGIC and index_offset + 8 + (n_frame + 1) * 8 + self._TRAILER.size == size:
+                return np.frombuffer(buffer, dtype='<i8', count=n_frame + 1, offset=index_offset + 8).astype(np.int64)
+
+        offsets = [self._HEADER.size]
+        while offsets[-1] + self._FRAME_HEADER.size <= size:
+            tag, _, _, _, n_byte = self._FRAME_HEADER.unpack_from(buffer, offsets[-1])
+            if tag != self._FRAME_TAG or offsets[-1] + self._FRAME_HEADER.size + n_byte > size:
+                break
+            offsets.append(offsets[-1] + self._FRAME_HEADER.size + n_byte)
+        return np.array(offsets, dtype=np.int64)
+
+    def get_info(self):
+        if self._mmap is None:
+            raise Exception('Empty MSTRJ file')
+        self.n_atom = self._read_header(self._mmap)
+        self._frame_offset = self._load_frame_offset(self._mmap)
+        self.n_frame = len(self._frame_offset) - 1
+        if self.n_frame == 0:
+            raise Exception('Empty MSTRJ file')
+
+        return self.n_atom, self.n_frame
+
+    def read_frame(self, i_frame, frame):
+        offset = int(self._frame_offset[i_frame])
+        tag, flags, step, time, n_byte = self._FRAME_HEADER.unpack_from(self._mmap, offset)
+        if tag != self._FRAME_TAG:
+            raise Exception('Corrupted frame %i in MSTRJ file' % i_frame)
+        offset += self._FRAME_HEADER.size
+        if flags & self.FLAG_COMPRESSED:
+            payload = zlib.decompress(self._mmap[offset:offset + n_byte])
+            offset = 0
+        else:
+            payload = self._mmap
+
+        n_atom = self.n_atom
+        frame.step = step
+        frame.time = time
+        if flags & self.FLAG_CELL:
+            frame.cell.set_box(np.frombuffer(payload, dtype='<f4', count=9, offset=offset).reshape(3, 3))
+            offset += 36
+
+        if flags & self.FLAG_QUANTIZED:
+            precision, i_type = struct.unpack_from('<fI', payload, offset)
+            offset += 8
+            dtype = np.dtype(self._INT_TYPES[i_type]).newbyteorder('<')
+            n_byte = n_atom * 3 * dtype.itemsize
+            # the bytes are shuffled for better compression
+            shuffled = np.frombuffer(payload, dtype=np.uint8, count=n_byte, offset=offset)
+            deltas = shuffled.reshape(dtype.itemsize, -1).T.copy().view(dtype).reshape(3, n_atom)
+            np.multiply(np.cumsum(deltas, axis=1, dtype=np.int64).T, precision, out=frame.positions, casting='unsafe')
+            offset += n_byte
+        else:
+            frame.positions[:] = np.frombuffer(payload, dtype='<f4', count=n_atom * 3, offset=offset).reshape(n_atom, 3)
+            offset += n_atom * 12
+
+        frame.has_velocity = bool(flags & self.FLAG_VELOCITY)
+        if frame.has_velocity:
+            frame.velocities[:] = np.frombuffer(payload, dtype='<f4', count=n_atom * 3,
+                                                offset=offset).reshape(n_atom, 3)
+            offset += n_atom * 12
+
+        frame.has_charge = bool(flags & self.FLAG_CHARGE)
+        if frame.has_charge:
+            frame.charges[:] = np.frombuffer(payload, dtype='<f4', count=n_atom, offset=offset)
+
+    def write_frame(self, frame, subset=None, write_velocity=False, write_charge=False, precision=None,
+                    compress=False, **kwargs):
+        '''
+        Write a frame into the opened MSTRJ file
+
+        Parameters
+        ----------
+        frame : Frame
+        subset : list of int, optional
+        write_velocity : bool
+            Whether or not velocities should be written.
+            If set to True but velocities not available in frame, an Exception will be raised.
+        write_charge : bool
+            Whether or not charges should be written.
+            If set to True but charges not available in frame, an Exception will be raised.
+        precision : float, optional
+            If set, the positions will be quantized with this precision in nm, e.g. 0.001.
+            Otherwise, the positions will be stored as float32.
+        compress : bool
+            Whether or not the payload of this frame should be compressed with zlib
+        kwargs : dict
+            Ignored
+        '''
+        if subset is None:
+            subset = slice(None)
+        if write_velocity and not frame.has_velocity:
+            raise Exception('Velocities are requested but not exist in frame')
+        if write_charge and not frame.has_charge:
+            raise Exception('Charges are requested but not exist in frame')
+
+        positions = frame.positions[subset]
+        if len(self._frame_offset) == 0:
+            self.n_atom = len(positions)
+            self._file.write(self._HEADER.pack(self.MAGIC, self.VERSION, self.n_atom))
+            self._frame_offset.append(self._HEADER.size)
+        elif len(positions) != self.n_atom:
+            raise Exception('Number of atoms in frame is different from the previous frames')
+
+        flags = 0
+        parts = []
+        if frame.cell.volume != 0:
+            flags |= self.FLAG_CELL
+            parts.append(frame.cell.vectors.astype('<f4').tobytes())
+
+        if precision is None:
+            parts.append(positions.astype('<f4').tobytes())
+        else:
+            flags |= self.FLAG_QUANTIZED
+            ints = np.round(positions.T / precision).astype(np.int64)
+            deltas = np.diff(ints, axis=1, prepend=0)
+            vmin, vmax = (deltas.min(), deltas.max()) if self.n_atom > 0 else (0, 0)
+            for i_type, int_type in enumerate(self._INT_TYPES):
+                info = np.iinfo(int_type)
+                if info.min <= vmin and vmax <= info.max:
+                    break
+            dtype = np.dtype(int_type).newbyteorder('<')
+            parts.append(struct.pack('<fI', precision, i_type))
+            parts.append(np.ascontiguousarray(deltas, dtype=dtype).view(np.uint8).reshape(-1, dtype.itemsize).T.tobytes())
+
+        if write_velocity:
+            flags |= self.FLAG_VELOCITY
+            parts.append(frame.velocities[subset].astype('<f4').tobytes())
+        if write_charge:
+            flags |= self.FLAG_CHARGE
+            parts.append(frame.charges[subset].astype('<f4').tobytes())
+
+        payload = b''.join(parts)
+        if compress:
+            flags |= self.FLAG_COMPRESSED
+            payload = zlib.compress(payload)
+
+        self._file.write(self._FRAME_HEADER.pack(self._FRAME_TAG, flags, frame.step, frame.time, len(payload)))
+        self._file.write(payload)
+        self._frame_offset.append(self._frame_offset[-1] + self._FRAME_HEADER.size + len(payload))
+
+TrjHandler.register_format('.mstrj', MsTrj)
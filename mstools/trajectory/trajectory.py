@@ -81,6 +81,84 @@ class Frame():
         self.charges.resize((n_atom, 3), refcheck=False)
 
 
+class FrameChunk():
+    '''
+    A chunk of consecutive frames stored in contiguous arrays, which is generated by :func:`Trajectory.iter_frames`.
+
+    The arrays are allocated only once and reused for all chunks.
+    The attributes are views of the first `n_frame` frames of these arrays.
+    Each frame in `frames` shares memory with the arrays, so that the trajectory handlers fill the arrays in place.
+
+    Parameters
+    ----------
+    n_frame : int
+        The maximum number of frames in the chunk.
+    n_atom : int
+        The number of atoms in each frame.
+
+    Attributes
+    ----------
+    n_frame : int
+        The number of frames in current chunk
+    i_frames : np.ndarray of int
+        The indexes of the frames in the trajectory
+    frames : list of Frame
+    positions : np.ndarray
+        The positions of atoms in shape of (n_frame, n_atom, 3)
+    has_velocity : bool
+        Whether or not there's velocity information for all frames
+    velocities : np.ndarray
+        The velocities of atoms in shape of (n_frame, n_atom, 3)
+    has_charge : bool
+        Whether or not there's charge information for all frames
+    charges : np.ndarray
+        The charges of atoms in shape of (n_frame, n_atom)
+    cells : np.ndarray
+        The box vectors of unit cells in shape of (n_frame, 3, 3)
+    steps : np.ndarray of int
+        The steps of frames. -1 means unknown
+    times : np.ndarray of float
+        The simulation time of frames. -1 means unknown
+    '''
+
+    def __init__(self, n_frame, n_atom):
+        self._positions = np.zeros((n_frame, n_atom, 3), dtype=np.float32)
+        self._velocities = np.zeros((n_frame, n_atom, 3), dtype=np.float32)
+        self._charges = np.zeros((n_frame, n_atom), dtype=np.float32)
+        self._cells = np.zeros((n_frame, 3, 3), dtype=np.float32)
+        self._steps = np.zeros(n_frame, dtype=int)
+        self._times = np.zeros(n_frame, dtype=float)
+        self._frames = []
+        for i in range(n_frame):
+            frame = Frame(0)
+            frame.positions = self._positions[i]
+            frame.velocities = self._velocities[i]
+            frame.charges = self._charges[i]
+            self._frames.append(frame)
+        self._select([])
+
+    def _select(self, i_frames):
+        '''
+        Update the views after the frames have been read into the first `len(i_frames)` Frames.
+        '''
+        n = len(i_frames)
+        self.n_frame = n
+        self.i_frames = np.array(i_frames, dtype=int)
+        self.frames = self._frames[:n]
+        self.positions = self._positions[:n]
+        self.velocities = self._velocities[:n]
+        self.charges = self._charges[:n]
+        self.cells = self._cells[:n]
+        self.steps = self._steps[:n]
+        self.times = self._times[:n]
+        for i, frame in enumerate(self.frames):
+            self.cells[i] = frame.cell.vectors
+            self.steps[i] = frame.step
+            self.times[i] = frame.time
+        self.has_velocity = n > 0 and all(frame.has_velocity for frame in self.frames)
+        self.has_charge = n > 0 and all(frame.has_charge for frame in self.frames)
+
+
 class Trajectory():
     '''
     A Trajectory is made of a series of Frames.
@@ -144,6 +222,8 @@ class Trajectory():
             except:
                 raise Exception('Cannot determine the format of the trajectory file. Try to specify the handler class')
 
+        self._file = file
+        self._Handler = Handler
         self._handler: TrjHandler = Handler(file, mode)
         self._opened: bool = True
         self._mode: str = mode
@@ -231,10 +311,226 @@ class Trajectory():
             raise Exception('i_frame should be smaller than %i' % self.n_frame)
 
         frames = [Frame(self.n_atom) for _ in i_frames]
-        for ii, i_frame in enumerate(i_frames):
-            self._handler.read_frame(i_frame, frames[ii])
+        self._handler.read_frames(i_frames, frames)
         return frames
 
+    def iter_frames(self, begin=0, end=None, stride=1, chunk=100):
+        '''
+        Iterate through the trajectory chunk by chunk.
+
+        The frames in each chunk are read with sequential reads if the format supports it,
+        and the positions, velocities and cells of all frames in the chunk are stored in contiguous arrays,
+        so that the analysis can be vectorized across frames.
+
+        For the best of performance, the arrays of the chunk are allocated only once.
+        The chunk yielded is overwritten when next chunk is read.
+        Therefore, copy the data if it is required after the iteration moves on.
+
+        Parameters
+        ----------
+        begin : int
+            The first frame to read
+        end : int, optional
+            The frame to stop at (not included). If set to None, the trajectory is read to the end
+        stride : int
+            Read every `stride` frames
+        chunk : int
+            The maximum number of frames in each chunk
+
+        Yields
+        ------
+        frame_chunk : FrameChunk
+
+        Examples
+        --------
+        >>> trj = Trajectory('input.xtc')
+        >>> for frame_chunk in trj.iter_frames(chunk=50):
+        >>>     z_mean = frame_chunk.positions[:, :, 2].mean(axis=1)
+        '''
+        if self._mode != 'r' or not self._opened:
+            raise Exception('mode != "r" or closed trajectory')
+        if stride < 1 or chunk < 1:
+            raise Exception('stride and chunk should be positive')
+
+        i_frames = range(self.n_frame)[begin:end:stride]
+        frame_chunk = FrameChunk(min(chunk, len(i_frames)), self.n_atom)
+        for i in range(0, len(i_frames), chunk):
+            i_frames_chunk = i_frames[i:i + chunk]
+            frames = frame_chunk._frames[:len(i_frames_chunk)]
+            for frame in frames:
+                frame.reset()
+            self._handler.read_frames(list(i_frames_chunk), frames)
+            frame_chunk._select(i_frames_chunk)
+            yield frame_chunk
+
+    def prefetch_frames(self, frames=None, depth=4):
+        '''
+        Iterate through frames with a background thread reading the following frames in advance.
+
+        The background thread reads the frames with its own handler into a pool of recycled Frames,
+        and feeds them into a queue of at most `depth` frames.
+        Therefore, the reading and parsing of next frames overlaps with the processing of current frame.
+        This is useful for long scans over slow or networked storage.
+
+        The Frame yielded is recycled for other frames after the iteration moves on.
+        Therefore, copy the data if it is required later.
+
+        Parameters
+        ----------
+        frames : list of int, optional
+            The indexes of frames to read. If set to None, all frames will be read
+        depth : int
+            The maximum number of frames read in advance
+
+        Yields
+        ------
+        frame : Frame
+
+        Examples
+        --------
+        >>> trj = Trajectory('input.xtc')
+        >>> for frame in trj.prefetch_frames(range(0, trj.n_frame, 10)):
+        >>>     z_mean = frame.positions[:, 2].mean()
+        '''
+        import threading
+        import queue
+
+        if self._mode != 'r' or not self._opened:
+            raise Exception('mode != "r" or closed trajectory')
+
+        if frames is None:
+            frames = range(self.n_frame)
+        frames = list(frames)
+        if any(i >= self.n_frame for i in frames):
+            raise Exception('i_frame should be smaller than %i' % self.n_frame)
+        if depth < 1:
+            raise Exception('depth should be positive')
+
+        handler = self._Handler(self._file, 'r')
+        handler.set_frame_index(self._handler.get_frame_index())
+
+        # one more frame is required for the one being processed
+        pool = queue.Queue()
+        for _ in range(depth + 1):
+            pool.put(Frame(self.n_atom))
+        ready = queue.Queue()
+
+        def _read():
+            try:
+                for i_frame in frames:
+                    frame = pool.get()
+                    if frame is None:
+                        return
+                    frame.reset()
+                    handler.read_frame(i_frame, frame)
+                    ready.put(frame)
+            except Exception as e:
+                ready.put(e)
+                return
+            ready.put(None)
+
+        thread = threading.Thread(target=_read, daemon=True)
+        thread.start()
+        frame = None
+        try:
+            while True:
+                if frame is not None:
+                    pool.put(frame)
+                frame = ready.get()
+                if frame is None:
+                    break
+                if isinstance(frame, Exception):
+                    raise frame
+                yield frame
+        finally:
+            # stop the thread if the iteration is interrupted
+            pool.put(None)
+            thread.join()
+            handler.close()
+
+    def map(self, func, frames=None, n_proc=None, reducer=None, chunk=100):
+        '''
+        Apply a function on frames of the trajectory in parallel and optionally reduce the results.
+
+        The frames are split into ranges of `chunk` frames and distributed to a pool of processes.
+        Each process re-opens the trajectory with its own handler,
+        which is initialized with the frame index of this trajectory so that the file is not scanned again.
+        The frames in each range are read with :func:`TrjHandler.read_frames`.
+
+        If `reducer` is provided, the results of frames are reduced in each process first,
+        and then the partial results from all processes are reduced in the main process.
+        The results are always reduced in the order of frames.
+        This is useful for accumulating histograms etc.
+
+        The Frame passed to `func` is reused for other frames.
+        Therefore, copy the arrays of the frame if they are going to be returned.
+
+        The processes are forked, therefore `func` can be a lambda or closure on Linux.
+        On other platforms, `func` and `reducer` should be picklable.
+
+        Parameters
+        ----------
+        func : callable
+            The function called as func(frame) for each frame.
+        frames : list of int, optional
+            The indexes of frames to be processed. If set to None, all frames will be processed
+        n_proc : int, optional
+            The number of processes. If set to None, all the CPU cores will be used.
+            If set to 1, the frames will be processed in current process.
+        reducer : callable, optional
+            The function called as reducer(result1, result2) to combine two results.
+        chunk : int
+            The number of frames in each range distributed to the processes
+
+        Returns
+        -------
+        result : list or object
+            If `reducer` is None, a list of the results of all frames is returned.
+            Otherwise, the reduced result is returned.
+
+        Examples
+        --------
+        >>> trj = Trajectory('input.xtc')
+        >>> hist = trj.map(lambda frame: np.histogram(frame.positions[:, 2], bins=50, range=(0, 5))[0],
+        >>>                n_proc=8, reducer=np.add)
+        '''
+        import multiprocessing
+
+        if self._mode != 'r' or not self._opened:
+            raise Exception('mode != "r" or closed trajectory')
+
+        if frames is None:
+            frames = range(self.n_frame)
+        frames = list(frames)
+        if any(i >= self.n_frame for i in frames):
+            raise Exception('i_frame should be smaller than %i' % self.n_frame)
+        if len(frames) == 0:
+            raise Exception('No frames to process')
+        if n_proc is None:
+            n_proc = multiprocessing.cpu_count()
+        ranges = [frames[i:i + chunk] for i in range(0, len(frames), chunk)]
+
+        if n_proc == 1 or len(ranges) == 1:
+            frame_chunk = FrameChunk(min(chunk, len(frames)), self.n_atom)
+            results = [_map_frames(self._handler, frame_chunk, func, reducer, i_frames) for i_frames in ranges]
+        else:
+            try:
+                context = multiprocessing.get_context('fork')
+            except ValueError:
+                context = multiprocessing.get_context()
+            initargs = (self._Handler, self._file, self._handler.get_frame_index(), func, reducer,
+                        min(chunk, len(frames)))
+            with context.Pool(min(n_proc, len(ranges)), initializer=_init_map_worker, initargs=initargs) as pool:
+                results = pool.map(_run_map_worker, ranges, chunksize=1)
+
+        if reducer is None:
+            return [result for partial in results for result in partial]
+
+        result = results[0]
+        for partial in results[1:]:
+            result = reducer(result, partial)
+        return result
+
     def write_frame(self, frame, topology=None, subset=None, **kwargs):
         '''
         Write one frame to the opened trajectory file.
@@ -303,3 +599,42 @@ class Trajectory():
         frame = trj.read_frame(i_frame)
         trj.close()
         return frame
+
+
+def _map_frames(handler, frame_chunk, func, reducer, i_frames):
+    '''
+    Read a range of frames with the handler and apply the function on them.
+
+    Returns a list of results if reducer is None. Otherwise, returns the reduced result.
+    '''
+    frames = frame_chunk._frames[:len(i_frames)]
+    for frame in frames:
+        frame.reset()
+    handler.read_frames(i_frames, frames)
+
+    results = []
+    for frame in frames:
+        result = func(frame)
+        if reducer is None:
+            results.append(result)
+        elif len(results) == 0:
+            results = [result]
+        else:
+            results[0] = reducer(results[0], result)
+    return results if reducer is None else results[0]
+
+
+# the states of worker process for Trajectory.map
+_map_worker_state = {}
+
+
+def _init_map_worker(Handler, file, index, func, reducer, chunk):
+    handler = Handler(file, 'r')
+    handler.set_frame_index(index)
+    _map_worker_state.update(handler=handler, frame_chunk=FrameChunk(chunk, handler.n_atom),
+                             func=func, reducer=reducer)
+
+
+def _run_map_worker(i_frames):
+    state = _map_worker_state
+    return _map_frames(state['handler'], state['frame_chunk'], state['func'], state['reducer'], i_frames)
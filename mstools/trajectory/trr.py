@@ -0,0 +1,100 @@
+import numpy as np
+from . import Trajectory, Frame
+from .handler import TrjHandler
+from .xdr import read_trr_header, get_trr_frame_size, write_trr_frame
+
+
+class Trr(TrjHandler):
+    '''
+    Read and write step, time, cell, positions and optionally velocities from/to TRR file.
+
+    Forces are ignored when reading. Both single and double precision TRR files can be read.
+    Frames are always written in single precision.
+    '''
+
+    _index_attributes = ('_frame_offset', '_headers')
+
+    def __init__(self, file, mode='r'):
+        super().__init__()
+
+        if mode not in ('r', 'w', 'a'):
+            raise Exception('Invalid mode')
+
+        if mode == 'r':
+            self._file = open(file, 'rb')
+        elif mode == 'a':
+            self._file = open(file, 'ab')
+        elif mode == 'w':
+            self._file = open(file, 'wb')
+
+    def get_info(self):
+        # build a list of frame offsets and headers by jumping over the data of each frame
+        # the last element of offsets is the end of the last frame
+        self._file.seek(0, 2)
+        size = self._file.tell()
+        offsets = [0]
+        self._headers = []
+        while offsets[-1] < size:
+            self._file.seek(offsets[-1])
+            header = read_trr_header(self._file.read(128))
+            self._headers.append(header)
+            offsets.append(offsets[-1] + get_trr_frame_size(header))
+        if offsets[-1] > size:
+            raise Exception('The last frame of TRR file is truncated')
+
+        self._frame_offset = np.array(offsets, dtype=np.int64)
+        self.n_frame = len(self._frame_offset) - 1
+        if self.n_frame == 0:
+            raise Exception('Empty TRR file')
+        self.n_atom = self._headers[0]['natoms']
+
+        return self.n_atom, self.n_frame
+
+    def read_frame(self, i_frame, frame):
+        self._parse_frame(i_frame, self._read_frame_data(i_frame), frame)
+
+    def _parse_frame(self, i_frame, data, frame):
+        header = self._headers[i_frame]
+        if header['natoms'] != self.n_atom:
+            raise Exception('Number of atoms in frame %i is different from the first frame' % i_frame)
+        dtype = '>f4' if header['float_size'] == 4 else '>f8'
+
+        offset = header['header_size']
+        if header['box_size'] != 0:
+            frame.cell.set_box(np.frombuffer(data, dtype=dtype, count=9, offset=offset).reshape(3, 3))
+        offset += header['box_size'] + header['vir_size'] + header['pres_size']
+        if header['x_size'] != 0:
+            frame.positions[:] = np.frombuffer(data, dtype=dtype, count=self.n_atom * 3,
+                                               offset=offset).reshape(self.n_atom, 3)
+        offset += header['x_size']
+        frame.has_velocity = header['v_size'] != 0
+        if frame.has_velocity:
+            frame.velocities[:] = np.frombuffer(data, dtype=dtype, count=self.n_atom * 3,
+                                                offset=offset).reshape(self.n_atom, 3)
+        frame.step = header['step']
+        frame.time = header['time']
+
+    def write_frame(self, frame, subset=None, write_velocity=False, **kwargs):
+        '''
+        Write a frame into the opened TRR file
+
+        Parameters
+        ----------
+        frame : Frame
+        subset : list of int, optional
+        write_velocity : bool
+            Whether or not velocities should be written.
+            If set to True but velocities not available in frame, an Exception will be raised.
+        kwargs : dict
+            Ignored
+        '''
+        if subset is None:
+            subset = slice(None)
+        if write_velocity and not frame.has_velocity:
+            raise Exception('Velocities are requested but not exist in frame')
+
+        velocities = frame.velocities[subset] if write_velocity else None
+        write_trr_frame(self._file, max(frame.step, 0), max(frame.time, 0), frame.cell.vectors,
+                        positions=frame.positions[subset], velocities=velocities)
+
+TrjHandler.register_format('.trr', Trr)
@@ -0,0 +1,355 @@
+'''
+Decode the XDR based trajectory formats of GROMACS (XTC and TRR) and encode TRR format without external libraries.
+
+The XTC coordinate decompression follows the algorithm of `xdrfile` library distributed with GROMACS.
+The bits are unpacked with vectorized numpy operations, and only the run-length flags are walked in Python.
+XTC compression is not implemented.
+'''
+
+import struct
+import numpy as np
+
+XTC_MAGIC = 1995
+TRR_MAGIC = 1993
+TRR_VERSION = b'GMX_trn_file'
+
+# the size of XTC frame header before the compressed coordinates: magic, natoms, step, time, box, natoms
+XTC_HEADER_SIZE = 56
+# the size of the parameters of compressed coordinates: precision, minint, maxint, smallidx, n_bytes
+XTC_COORD_HEADER_SIZE = 36
+
+_MAGICINTS = [0, 0, 0, 0, 0, 0, 0, 0, 0, 8, 10, 12, 16, 20, 25, 32, 40, 50, 64,
+              80, 101, 128, 161, 203, 256, 322, 406, 512, 645, 812, 1024, 1290,
+              1625, 2048, 2580, 3250, 4096, 5060, 6501, 8192, 10321, 13003,
+              16384, 20642, 26007, 32768, 41285, 52015, 65536, 82570, 104031,
+              131072, 165140, 208063, 262144, 330280, 416127, 524287, 660561,
+              832255, 1048576, 1321122, 1664510, 2097152, 2642245, 3329021,
+              4194304, 5284491, 6658042, 8388607, 10568983, 13316085, 16777216]
+_FIRSTIDX = 9
+
+
+def _padded(n_bytes):
+    '''
+    XDR opaque data is padded to multiple of 4 bytes
+    '''
+    return (n_bytes + 3) // 4 * 4
+
+
+def read_xtc_header(buffer):
+    '''
+    Parse the header of a XTC frame.
+
+    Parameters
+    ----------
+    buffer : bytes
+        The data starting from the beginning of a frame. It should contain at least XTC_HEADER_SIZE bytes
+
+    Returns
+    -------
+    n_atom : int
+    step : int
+    time : float
+    box : np.ndarray
+        The box vectors in shape of (3, 3)
+    '''
+    magic, n_atom, step, time = struct.unpack('>iiif', buffer[:16])
+    if magic != XTC_MAGIC:
+        raise Exception('Invalid magic number %i for XTC frame' % magic)
+    box = np.frombuffer(buffer[16:52], dtype='>f4').reshape(3, 3)
+    return n_atom, step, time, box
+
+
+def get_xtc_frame_size(buffer):
+    '''
+    Get the number of bytes of a XTC frame from the beginning of the frame.
+
+    Parameters
+    ----------
+    buffer : bytes
+        The data starting from the beginning of a frame.
+        It should contain at least XTC_HEADER_SIZE + XTC_COORD_HEADER_SIZE bytes unless there are no more than 9 atoms
+
+    Returns
+    -------
+    size : int
+    '''
+    n_atom = read_xtc_header(buffer)[0]
+    if n_atom <= 9:
+        return XTC_HEADER_SIZE + n_atom * 12
+    n_bytes = struct.unpack('>i', buffer[88:92])[0]
+    return XTC_HEADER_SIZE + XTC_COORD_HEADER_SIZE + _padded(n_bytes)
+
+
+def _gather_words(data, positions):
+    '''
+    Gather the 64 bits starting from the byte containing each bit position as big-endian unsigned integers.
+    The data should be padded with at least 8 bytes.
+    '''
+    windows = np.lib.stride_tricks.as_strided(data, shape=(len(data) - 7, 8), strides=(1, 1))
+    return windows[positions >> 3].view('>u8').ravel().astype(np.uint64)
+
+
+def _receive_bits(data, positions, n_bits):
+    '''
+    Read the unsigned integers of n_bits (no more than 57) starting from each bit position.
+    '''
+    positions = np.asarray(positions, dtype=np.int64)
+    n_bits = np.asarray(n_bits, dtype=np.uint64)
+    words = _gather_words(data, positions)
+    shifts = np.uint64(64) - (positions & 7).astype(np.uint64) - n_bits
+    return (words >> shifts) & ((np.uint64(1) << n_bits) - np.uint64(1))
+
+
+def _receive_ints(data, positions, n_bits):
+    '''
+    Read the integers of n_bits (no more than 57) starting from each bit position,
+    which are transferred byte by byte with the least significant byte first.
+    '''
+    raw = _receive_bits(data, positions, n_bits)
+    remaining = np.array(n_bits, dtype=np.uint64) + np.zeros(len(raw), dtype=np.uint64)
+    values = np.zeros(len(raw), dtype=np.uint64)
+    for shift in range(0, int(remaining.max(initial=0)), 8):
+        take = np.minimum(remaining, np.uint64(8))
+        remaining -= take
+        values |= ((raw >> remaining) & ((np.uint64(1) << take) - np.uint64(1))) << np.uint64(shift)
+    return values
+
+
+def decompress_xtc_coord(buffer, out):
+    '''
+    Decompress the coordinates of a XTC frame.
+
+    The compressed coordinates consist of records, each of which is an atom followed by a run of small differences.
+    The bit positions of records are located in a light sequential pass,
+    after which the integers of all records are unpacked and accumulated with vectorized operations.
+
+    Parameters
+    ----------
+    buffer : bytes
+        The data of the frame. The coordinates start from XTC_HEADER_SIZE
+    out : np.ndarray
+        The decompressed coordinates will be written into this array of shape (n_atom, 3)
+
+    Returns
+    -------
+    precision : float
+        The precision of coordinates. -1 if the coordinates are not compressed
+    '''
+    n_atom = struct.unpack('>i', buffer[52:56])[0]
+    if n_atom <= 9:
+        out[:] = np.frombuffer(buffer, dtype='>f4', count=n_atom * 3, offset=XTC_HEADER_SIZE).reshape(n_atom, 3)
+        return -1
+
+    precision, = struct.unpack('>f', buffer[56:60])
+    minint = struct.unpack('>iii', buffer[60:72])
+    maxint = struct.unpack('>iii', buffer[72:84])
+    smallidx, n_bytes = struct.unpack('>ii', buffer[84:92])
+    data = bytes(buffer[92:92 + n_bytes]) + b'\x00' * 8  # padding to avoid bound check when reading bits
+
+    sizeint = [maxint[d] - minint[d] + 1 for d in range(3)]
+    if (sizeint[0] | sizeint[1] | sizeint[2]) > 0xffffff:
+        bitsizeint = [s.bit_length() for s in sizeint]
+        bitsize = 0  # flag the use of large sizes
+        large_bits = sum(bitsizeint)
+    else:
+        bitsize = (sizeint[0] * sizeint[1] * sizeint[2]).bit_length()
+        large_bits = bitsize
+
+    # locate the records. Only the flag and the length of run are read here
+    large_pos = []
+    small_pos = []
+    small_idx = []
+    n_small = []
+    append_large, append_small, append_idx, append_n = \
+        large_pos.append, small_pos.append, small_idx.append, n_small.append
+    run = 0
+    pos = 0
+    i = 0
+    while i < n_atom:
+        append_large(pos)
+        pos += large_bits
+        is_smaller = 0
+        if (data[pos >> 3] >> (7 - (pos & 7))) & 1:
+            pos += 1
+            run = ((data[pos >> 3] << 8 | data[(pos >> 3) + 1]) >> (11 - (pos & 7))) & 31
+            pos += 5
+            is_smaller = run % 3
+            run -= is_smaller
+            is_smaller -= 1
+        else:
+            pos += 1
+        m = run // 3 if run > 0 else 0
+        append_n(m)
+        if m > 0:
+            append_small(pos)
+            append_idx(smallidx)
+            pos += m * smallidx
+        i += 1 + m
+        smallidx += is_smaller
+        if smallidx < _FIRSTIDX:
+            raise Exception('Corrupted XTC frame')
+
+    if i != n_atom or (pos + 7) >> 3 > n_bytes:
+        raise Exception('Corrupted XTC frame')
+
+    data = np.frombuffer(data, dtype=np.uint8)
+    large_pos = np.array(large_pos, dtype=np.int64)
+    if bitsize == 0:
+        large = np.empty((len(large_pos), 3), dtype=np.int64)
+        offset = 0
+        for d in range(3):
+            large[:, d] = _receive_bits(data, large_pos + offset, bitsizeint[d])
+            offset += bitsizeint[d]
+    elif bitsize <= 57:
+        value = _receive_ints(data, large_pos, bitsize)
+        sizeint1, sizeint2 = np.uint64(sizeint[1]), np.uint64(sizeint[2])
+        large = np.stack([value // sizeint2 // sizeint1, value // sizeint2 % sizeint1, value % sizeint2], axis=1)
+    else:
+        # the integers are too large for uint64. It happens only if the box is very large compared to precision
+        large = np.array([_receive_large_ints(data, p, bitsize, sizeint) for p in large_pos.tolist()])
+    large = large.astype(np.int64) + minint
+
+    # expand the runs. Each small integer is at the position of its record plus the bits of preceding ones
+    n_small = np.array(n_small, dtype=np.int64)
+    has_run = n_small > 0
+    counts = n_small[has_run]
+    small_idx = np.repeat(np.array(small_idx, dtype=np.int64), counts)
+    i_in_run = np.arange(len(small_idx)) - np.repeat(np.cumsum(counts) - counts, counts)
+    small = _receive_ints(data, np.repeat(np.array(small_pos, dtype=np.int64), counts) + i_in_run * small_idx,
+                          small_idx)
+    sizesmall = np.array(_MAGICINTS, dtype=np.uint64)[small_idx]
+    small = np.stack([small // sizesmall // sizesmall, small // sizesmall % sizesmall, small % sizesmall], axis=1)
+    small = small.astype(np.int64) - (sizesmall // np.uint64(2)).astype(np.int64)[:, None]
+
+    # each small integer is the difference to the previous atom in the record
+    starts = np.cumsum(n_small + 1) - (n_small + 1)
+    is_large = np.zeros(n_atom, dtype=bool)
+    is_large[starts] = True
+    coords = np.empty((n_atom, 3), dtype=np.int64)
+    coords[is_large] = large
+    coords[~is_large] = small
+    np.cumsum(coords, axis=0, out=coords)
+    bases = coords[starts] - large
+    coords -= np.repeat(bases, n_small + 1, axis=0)
+
+    # first and second atom are interchanged for better compression of water molecules
+    first = starts[has_run]
+    coords[first], coords[first + 1] = coords[first + 1], coords[first].copy()
+
+    inv_precision = np.float32(1.0 / np.float32(precision))
+    np.multiply(coords.astype(np.float32), inv_precision, out=out, casting='unsafe')
+    return precision
+
+
+def _receive_large_ints(data, position, n_bits, sizes):
+    '''
+    Read three integers packed in more than 57 bits with Python integers.
+    '''
+    value = 0
+    shift = 0
+    while n_bits > 0:
+        take = min(n_bits, 8)
+        begin = position >> 3
+        end = (position + take + 7) >> 3
+        chunk = int.from_bytes(data[begin:end].tobytes(), 'big') >> ((end << 3) - position - take)
+        value |= (chunk & ((1 << take) - 1)) << shift
+        position += take
+        shift += 8
+        n_bits -= take
+    value, z = divmod(value, sizes[2])
+    x, y = divmod(value, sizes[1])
+    return x, y, z
+
+
+def read_trr_header(buffer):
+    '''
+    Parse the header of a TRR frame.
+
+    Parameters
+    ----------
+    buffer : bytes
+        The data starting from the beginning of a frame. It should contain at least 92 bytes
+
+    Returns
+    -------
+    header : dict
+        The sizes of box, virial, pressure, positions, velocities and forces in bytes,
+        number of atoms, step, time, lambda, float size and the size of header in bytes.
+    '''
+    magic, slen, length = struct.unpack('>iii', buffer[:12])
+    if magic != TRR_MAGIC:
+        raise Exception('Invalid magic number %i for TRR frame' % magic)
+    offset = 12 + _padded(length)
+    names = ('ir_size', 'e_size', 'box_size', 'vir_size', 'pres_size', 'top_size', 'sym_size',
+             'x_size', 'v_size', 'f_size', 'natoms', 'step', 'nre')
+    header = dict(zip(names, struct.unpack('>13i', buffer[offset:offset + 52])))
+    offset += 52
+
+    n_atom = header['natoms']
+    if header['box_size'] != 0:
+        float_size = header['box_size'] // 9
+    elif header['x_size'] != 0:
+        float_size = header['x_size'] // (n_atom * 3)
+    elif header['v_size'] != 0:
+        float_size = header['v_size'] // (n_atom * 3)
+    elif header['f_size'] != 0:
+        float_size = header['f_size'] // (n_atom * 3)
+    else:
+        raise Exception('Cannot determine the precision of TRR frame')
+    if float_size not in (4, 8):
+        raise Exception('Invalid float size %i for TRR frame' % float_size)
+
+    fmt = '>ff' if float_size == 4 else '>dd'
+    header['time'], header['lambda'] = struct.unpack(fmt, buffer[offset:offset + 2 * float_size])
+    header['float_size'] = float_size
+    header['header_size'] = offset + 2 * float_size
+    return header
+
+
+def get_trr_frame_size(header):
+    '''
+    Get the number of bytes of a TRR frame from its header.
+
+    Parameters
+    ----------
+    header : dict
+        The result of :func:`read_trr_header`
+
+    Returns
+    -------
+    size : int
+    '''
+    return header['header_size'] + sum(header[key] for key in ('box_size', 'vir_size', 'pres_size',
+                                                                'x_size', 'v_size', 'f_size'))
+
+
+def write_trr_frame(file, step, time, box, positions=None, velocities=None, forces=None):
+    '''
+    Write a single precision TRR frame.
+
+    Parameters
+    ----------
+    file : file object
+        The file opened in binary mode
+    step : int
+    time : float
+    box : array_like
+        The box vectors in shape of (3, 3)
+    positions : array_like, optional
+    velocities : array_like, optional
+    forces : array_like, optional
+    '''
+    arrays = [a for a in (positions, velocities, forces) if a is not None]
+    if len(arrays) == 0:
+        raise Exception('At least one of positions, velocities and forces should be provided')
+    n_atom = len(arrays[0])
+    sizes = [0 if a is None else n_atom * 12 for a in (positions, velocities, forces)]
+
+    header = struct.pack('>iii', TRR_MAGIC, len(TRR_VERSION) + 1, len(TRR_VERSION)) + TRR_VERSION
+    header += struct.pack('>13i', 0, 0, 36, 0, 0, 0, 0, *sizes, n_atom, step, 0)
+    header += struct.pack('>ff', time, 0)
+    file.write(header)
+    file.write(np.asarray(box, dtype='>f4').tobytes())
+    for array in (positions, velocities, forces):
+        if array is not None:
+            file.write(np.asarray(array, dtype='>f4').tobytes())
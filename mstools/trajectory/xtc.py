@@ -1,53 +1,79 @@
 import numpy as np
 from . import Trajectory, Frame
 from .handler import TrjHandler
+from .xdr import XTC_HEADER_SIZE, XTC_COORD_HEADER_SIZE, read_xtc_header, get_xtc_frame_size, decompress_xtc_coord
 
 
 class Xtc(TrjHandler):
     '''
-    Read and write step, cell and positions from XTC file.
+    Read and write step, time, cell and positions from/to XTC file.
 
-    Simulation time is ignored.
+    XTC file is parsed natively. The offsets of all frames are recorded when the file is opened,
+    so that arbitrary frame can be read without decompressing preceding frames.
+    The compressed coordinates are decoded by :func:`decompress_xtc_coord` into the positions of frame in place.
 
-    Currently mstools use chemfiles to support XTC format.
+    Currently mstools use chemfiles to write XTC format.
     '''
 
+    _index_attributes = ('_frame_offset',)
+
     def __init__(self, file, mode='r'):
         super().__init__()
 
-        try:
-            import chemfiles
-        except:
-            raise ImportError('Currently mstools use chemfiles to parse XTC format. Cannot import chemfiles')
-
         if mode not in ('r', 'w', 'a'):
             raise Exception('Invalid mode')
 
-        self._xtc = chemfiles.Trajectory(file, mode)
+        self._mode = mode
+        if mode == 'r':
+            self._file = open(file, 'rb')
+        else:
+            try:
+                import chemfiles
+            except:
+                raise ImportError('Currently mstools use chemfiles to write XTC format. Cannot import chemfiles')
+            self._xtc = chemfiles.Trajectory(file, mode)
 
     def close(self):
-        try:
-            self._xtc.close()
-        except:
-            pass
+        if self._mode == 'r':
+            self._file.close()
+        else:
+            try:
+                self._xtc.close()
+            except:
+                pass
 
     def get_info(self):
-        self.n_frame = self._xtc.nsteps
+        # build a list of frame offsets by jumping over the compressed coordinates
+        # the last element is the end of the last frame
+        self._file.seek(0, 2)
+        size = self._file.tell()
+        offsets = [0]
+        while offsets[-1] < size:
+            self._file.seek(offsets[-1])
+            header = self._file.read(XTC_HEADER_SIZE + XTC_COORD_HEADER_SIZE)
+            offsets.append(offsets[-1] + get_xtc_frame_size(header))
+        if offsets[-1] > size:
+            raise Exception('The last frame of XTC file is truncated')
+
+        self._frame_offset = np.array(offsets, dtype=np.int64)
+        self.n_frame = len(self._frame_offset) - 1
         if self.n_frame == 0:
             raise Exception('Empty XTC file')
-        cf_frame = self._xtc.read()
-        self.n_atom = len(cf_frame.atoms)
+        self.n_atom = read_xtc_header(header)[0]
 
         return self.n_atom, self.n_frame
 
     def read_frame(self, i_frame, frame):
-        cf_frame = self._xtc.read_step(i_frame)
-        cf_cell = cf_frame.cell
-        lengths = [i / 10 for i in cf_cell.lengths]
-        angles = cf_cell.angles
-        frame.positions = cf_frame.positions.astype(np.float32) / 10
-        frame.cell.set_box([lengths, angles])
-        frame.step = frame.step
+        self._parse_frame(i_frame, self._read_frame_data(i_frame), frame)
+
+    def _parse_frame(self, i_frame, data, frame):
+        n_atom, step, time, box = read_xtc_header(data)
+        if n_atom != self.n_atom:
+            raise Exception('Number of atoms in frame %i is different from the first frame' % i_frame)
+        decompress_xtc_coord(data, frame.positions)
+        frame.cell.set_box(box)
+        frame.step = step
+        frame.time = time
 
     def write_frame(self, frame, subset=None, **kwargs):
         '''
@@ -10,6 +10,8 @@ class Xyz(TrjHandler):
     Read and write positions from XYZ file.
     '''
 
+    _index_attributes = ('_frame_offset',)
+
     def __init__(self, file, mode='r'):
         super().__init__()
         if mode not in ('r', 'w', 'a'):
@@ -30,29 +32,19 @@ class Xyz(TrjHandler):
             raise Exception('Invalid XYZ file')
         self._file.seek(0)
 
-        # read in the file once and build a list of line offsets
-        # the last element is the length of whole file
-        self._line_offset = [0]
-        offset = 0
-        for line in self._file:
-            offset += len(line)
-            self._line_offset.append(offset)
-        self._file.seek(0)
-
         # build a list of frame offsets
-        self.n_frame = len(self._line_offset) // (2 + self.n_atom)
-        self._frame_offset = []
-        for i in range(self.n_frame + 1):
-            line_start = (2 + self.n_atom) * i
-            self._frame_offset.append(self._line_offset[line_start])
+        # the last element is the end of the last frame
+        self._frame_offset = self.load_frame_offset(self._file.name, 2 + self.n_atom)
+        self.n_frame = len(self._frame_offset) - 1
 
         return self.n_atom, self.n_frame
 
     def read_frame(self, i_frame, frame):
         # skip to frame i and read only this frame
-        self._file.seek(self._frame_offset[i_frame])
-        lines = self._file.read(self._frame_offset[i_frame + 1] - self._frame_offset[i_frame]) \
-            .decode().splitlines()
+        self._parse_frame(i_frame, self._read_frame_data(i_frame), frame)
+
+    def _parse_frame(self, i_frame, data, frame):
+        lines = data.decode().splitlines()
         for i in range(self.n_atom):
             words = lines[i + 2].split()
             x = float(words[1]) / 10  # convert A to nm
@@ -598,6 +598,120 @@ class GMX:
                 mols.append((words[0], int(words[1])))
         return mols
 
+    @staticmethod
+    def get_top_atom_properties(top):
+        '''
+        Get the mass and charge of all atoms in the system from a `topol` file.
+
+        The masses and charges are read from the `[ atoms ]` section of each `[ moleculetype ]`,
+        and then expanded by the `[ molecules ]` section.
+        If the mass is not provided in `[ atoms ]`, the mass of the atom type in `[ atomtypes ]` will be used.
+        The files included with `#include` are parsed if they can be found relative to the `topol` file.
+
+        Parameters
+        ----------
+        top : str
+
+        Returns
+        -------
+        masses : np.ndarray
+            The masses of all atoms in the system
+        charges : np.ndarray
+            The charges of all atoms in the system
+        '''
+        import numpy as np
+
+        masses = []
+        charges = []
+        for _, number, atoms in GMX._read_top_molecules(top):
+            masses += [mass for mass, _ in atoms] * number
+            charges += [charge for _, charge in atoms] * number
+        return np.array(masses), np.array(charges)
+
+    @staticmethod
+    def get_top_molecule_index(top):
+        '''
+        Get the index of molecule of all atoms in the system from a `topol` file.
+
+        The number of atoms in each molecule is read from the `[ atoms ]` section of each `[ moleculetype ]`,
+        and then expanded by the `[ molecules ]` section.
+        The atoms are in the same order as :func:`get_top_atom_properties`.
+
+        Parameters
+        ----------
+        top : str
+
+        Returns
+        -------
+        molecule_index : np.ndarray of int
+            The index of molecule of all atoms in the system, ranging from 0 to n_molecule - 1
+        '''
+        import numpy as np
+
+        sizes = [len(atoms) for _, number, atoms in GMX._read_top_molecules(top) for _ in range(number)]
+        return np.repeat(np.arange(len(sizes)), sizes)
+
+    @staticmethod
+    def _read_top_molecules(top):
+        '''
+        Parse the `[ molecules ]` section of a `topol` file and the `[ atoms ]` of each molecule in it.
+
+        Returns
+        -------
+        molecules : list of tuple of (str, int, list of tuple of (float, float))
+            The name, number, and the mass and charge of atoms of each molecule in `[ molecules ]`
+        '''
+
+        def read_lines(file):
+            lines = []
+            with open(file) as f:
+                for line in f:
+                    line = line.split(';')[0].strip()
+                    if line.startswith('#include'):
+                        inc = os.path.join(os.path.dirname(file), line.split()[1].strip('"<>'))
+                        if os.path.exists(inc):
+                            lines += read_lines(inc)
+                    elif line != '' and not line.startswith('#'):
+                        lines.append(line)
+            return lines
+
+        type_masses = {}
+        mol_atoms = {}  # molecule name -> list of (type, mass, charge)
+        mols = []
+        section = None
+        mol_name = None
+        for line in read_lines(top):
+            if line.startswith('['):
+                section = line.strip('[] ').lower()
+                continue
+            words = line.split()
+            if section == 'atomtypes':
+                # the bond_type and atomic number columns are optional
+                for word in words[1:4]:
+                    try:
+                        type_masses[words[0]] = float(word)
+                        break
+                    except ValueError:
+                        pass
+            elif section == 'moleculetype':
+                mol_name = words[0]
+                mol_atoms[mol_name] = []
+            elif section == 'atoms':
+                charge = float(words[6]) if len(words) > 6 else 0.
+                mass = float(words[7]) if len(words) > 7 else None
+                mol_atoms[mol_name].append((words[1], mass, charge))
+            elif section == 'molecules':
+                mols.append((words[0], int(words[1])))
+
+        molecules = []
+        for name, number in mols:
+            if name not in mol_atoms:
+                raise GmxError('Molecule %s not found in top' % name)
+            atoms = [(type_masses.get(atype, 0.) if mass is None else mass, charge)
+                     for atype, mass, charge in mol_atoms[name]]
+            molecules.append((name, number, atoms))
+        return molecules
+
     @staticmethod
     def modify_top_mol_numbers(top, numbers):
         '''
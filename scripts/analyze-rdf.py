@@ -2,7 +2,6 @@
 
 import sys
 import argparse
-import math
 import numpy as np
 
 np.seterr(all='raise')
@@ -15,6 +14,7 @@ plt.rcParams.update({'font.size': 15})
 
 from mstools.topology import Topology
 from mstools.trajectory import Trajectory
+from mstools.analyzer.rdf import select_groups, RDF
 from mstools.utils import print_data_to_file
 
 parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
@@ -54,89 +54,31 @@ if (top.n_atom != trj.n_atom):
     raise Exception('Number of atoms in topology and trajectory files do not match')
 
 if args.m1 is None:
-    group1 = [[atom] for atom in top.atoms if atom.type in args.a1]
+    groups1 = select_groups(top, atom_types=args.a1)
 else:
-    group1 = [[atom for atom in mol.atoms if atom.type in args.a1]
-              for mol in top.molecules if mol.name == args.m1]
-ids_group1 = [[atom.id for atom in atoms] for atoms in group1]
-masses_group1 = [[atom.mass for atom in atoms] for atoms in group1]
+    groups1 = select_groups(top, atom_types=args.a1, molecule_names=[args.m1], by_molecule=True)
 
 if args.m2 is None:
-    group2 = [[atom] for atom in top.atoms if atom.type in args.a2]
+    groups2 = select_groups(top, atom_types=args.a2)
 else:
-    group2 = [[atom for atom in mol.atoms if atom.type in args.a2]
-              for mol in top.molecules if mol.name == args.m2]
-ids_group2 = [[atom.id for atom in atoms] for atoms in group2]
-masses_group2 = [[atom.mass for atom in atoms] for atoms in group2]
+    groups2 = select_groups(top, atom_types=args.a2, molecule_names=[args.m2], by_molecule=True)
 
 if args.end > trj.n_frame or args.end == -1:
     args.end = trj.n_frame
 
-dr = args.dr
-n_bin = math.ceil(args.maxr / dr) + 1
-edges = np.array([dr * (i - 0.5) for i in range(n_bin + 1)], dtype=np.float32)
-r_array = (edges[1:] + edges[:-1]) / 2
-rdf_array = np.zeros(n_bin, dtype=np.float32)
-
-
-def _get_weighted_center(positions, weight):
-    return np.sum(positions * np.transpose(np.array([weight] * 3)), axis=0) / sum(weight)
-
-
-def _get_com_group(positions, ids_group, masses_group):
-    com_group = []
-    for ids, masses in zip(ids_group, masses_group):
-        poss = positions[ids]
-        if len(ids) == 1:
-            pos = poss[0]
-        else:
-            pos = _get_weighted_center(poss, masses)
-        com_group.append(pos)
-    return com_group
-
-
-def _get_distance_periodic(pos1, pos2, box, maxr: float = None):
-    delta = pos2 - pos1
-    delta[0] -= math.ceil(delta[0] / box[0] - 0.5) * box[0]
-    delta[1] -= math.ceil(delta[1] / box[1] - 0.5) * box[1]
-    delta[2] -= math.ceil(delta[2] / box[2] - 0.5) * box[2]
-
-    if max is not None and any(delta > maxr):
-        return -1
-
-    distance = np.sqrt(delta.dot(delta))
-    if max is not None and distance > maxr:
-        return -1
-
-    return distance
-
-
-n_frame = 0
+rdf = RDF(groups1, groups2, r_max=args.maxr, dr=args.dr)
 for i in range(args.begin, args.end, args.skip):
-    n_frame += 1
     frame = trj.read_frame(i)
     sys.stdout.write('\r    frame %i' % i)
+    rdf.accumulate(frame)
 
-    com_group1 = _get_com_group(frame.positions, ids_group1, masses_group1)
-    com_group2 = _get_com_group(frame.positions, ids_group2, masses_group2)
-
-    vol = frame.cell.volume
-    density_pair = len(group1) * len(group2) / vol
-
-    density_array = np.zeros(len(r_array), dtype=np.float32)
-    for com1 in com_group1:
-        for com2 in com_group2:
-            distance = _get_distance_periodic(com1, com2, frame.cell.size, args.maxr + dr / 2)
-            if 0 < distance < args.maxr + dr / 2:
-                idx_r = int((distance - edges[0]) / dr)
-                density_array[idx_r] += 1
-
-    rdf_array[1:] += density_array[1:] / (4 * np.pi * r_array[1:] ** 2 * dr) / density_pair
-
-rdf_array = rdf_array / n_frame
+r_array = rdf.r
+rdf_array = rdf.get_rdf()
+cn_array = rdf.get_coordination_number()
 
 name_column_dict = {'r'  : r_array,
-                    'rdf': rdf_array}
+                    'rdf': rdf_array,
+                    'cn' : cn_array}
 print_data_to_file(name_column_dict, f'{args.output}-rdf.txt')
 
 fig, ax = plt.subplots()
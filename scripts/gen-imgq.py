@@ -28,14 +28,9 @@ print('Topology info: ', top.n_atom, 'atoms;', top.n_molecule, 'molecules')
 gen_atoms = [atom for atom in top.atoms if atom.type not in args.ignore]
 gen_drude_atoms = [atom for atom in gen_atoms if atom.symbol != 'H'] if args.drude else []
 gen_vsite_atoms = [atom for atom in gen_atoms if atom.type in args.vsite]
-for atom in top.atoms:
-    atom._gen_img_ = atom._gen_img_drude_ = atom._gen_img_vsite_ = False
-for atom in gen_atoms:
-    atom._gen_img_ = True
-for atom in gen_drude_atoms:
-    atom._gen_img_drude_ = True
-for atom in gen_vsite_atoms:
-    atom._gen_img_vsite_ = True
+gen_ids = {atom.id for atom in gen_atoms}
+gen_drude_ids = {atom.id for atom in gen_drude_atoms}
+gen_vsite_ids = {atom.id for atom in gen_vsite_atoms}
 
 n_image = (len(gen_atoms) + len(gen_drude_atoms) + len(gen_vsite_atoms)) * ((args.cathode is not None) + (args.anode is not None))
 if n_image == 0:
@@ -52,18 +47,18 @@ with open(args.output, 'w') as f_out:
     if args.cathode is not None:
         for ii, atom in enumerate(top.atoms):
             pos = positions[ii] * 10  # convert from nm to A
-            if atom._gen_img_:
+            if atom.id in gen_ids:
                 f_out.write('%-8s %10.5f %10.5f %10.5f\n' % ('IMG', pos[0], pos[1], args.cathode * 10 - pos[2]))
-            if atom._gen_img_drude_:
+            if atom.id in gen_drude_ids:
                 f_out.write('%-8s %10.5f %10.5f %10.5f\n' % ('IMG', pos[0], pos[1], args.cathode * 10 - pos[2]))
-            if atom._gen_img_vsite_:
+            if atom.id in gen_vsite_ids:
                 f_out.write('%-8s %10.5f %10.5f %10.5f\n' % ('IMG', pos[0], pos[1], args.cathode * 10 - pos[2]))
     if args.anode is not None:
         for ii, atom in enumerate(top.atoms):
             pos = positions[ii] * 10  # convert from nm to A
-            if atom._gen_img_:
+            if atom.id in gen_ids:
                 f_out.write('%-8s %10.5f %10.5f %10.5f\n' % ('IMG', pos[0], pos[1], 2 * args.anode * 10 - pos[2]))
-            if atom._gen_img_drude_:
+            if atom.id in gen_drude_ids:
                 f_out.write('%-8s %10.5f %10.5f %10.5f\n' % ('IMG', pos[0], pos[1], 2 * args.anode * 10 - pos[2]))
-            if atom._gen_img_vsite_:
+            if atom.id in gen_vsite_ids:
                 f_out.write('%-8s %10.5f %10.5f %10.5f\n' % ('IMG', pos[0], pos[1], 2 * args.anode * 10 - pos[2]))
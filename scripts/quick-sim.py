@@ -86,8 +86,8 @@ if args.scaleeps != 1.0 or args.scalesig != 1.0:
             vdw.sigma *= args.scalesig
             vdw.comments.append('sig*%.3f' % args.scalesig)
 
-mol_count = top.get_unique_molecules(deepcopy=False)
-for mol in mol_count.keys():
+mols_unique, mol_index = top.get_unique_molecule_index()
+for mol in mols_unique:
     mol: Molecule
     logger.info('Processing %s ...' % str(mol))
     if typer is not None:
@@ -116,13 +116,14 @@ for mol in mol_count.keys():
     mol.assign_charge_from_ff(ff)
 
 if args.packmol:
-    top.update_molecules(list(mol_count.keys()))
-    top.scale_with_packmol(list(mol_count.values()))
+    top.update_molecules(mols_unique)
+    top.scale_with_packmol([int(n) for n in np.bincount(mol_index)])
     sys.exit(0)
 
 logger.info('Exporting ...')
 
-top.update_molecules(list(mol_count.keys()), list(mol_count.values()))
+# keep the sequence of molecules consistent with the trajectory
+top.update_molecules([mols_unique[i] for i in mol_index])
 
 if args.trj is None:
     logger.warning('Trajectory file not provided. '
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import os
+import numpy as np
+import pytest
+from mstools.trajectory import Trajectory
+from mstools.wrapper import GMX
+from mstools.analyzer.density import DensityProfile
+
+cwd = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_get_top_atom_properties():
+    masses, charges = GMX.get_top_atom_properties(cwd + '/../simsys/files/baselines/topol.top')
+    mols = GMX.get_top_mol_numbers(cwd + '/../simsys/files/baselines/topol.top')
+    assert len(masses) == len(charges)
+    assert pytest.approx(masses[:12:6]) == [12.011, 1.0079]
+    assert pytest.approx(charges[:12:6]) == [-0.12, 0.12]
+    assert len(mols) > 0
+
+    molecule_index = GMX.get_top_molecule_index(cwd + '/../simsys/files/baselines/topol.top')
+    assert len(molecule_index) == len(masses)
+    assert molecule_index[0] == 0
+    assert molecule_index[-1] == sum(n for _, n in mols) - 1
+    assert (np.diff(molecule_index) >= 0).all()
+
+
+def test_profile():
+    rng = np.random.default_rng(0)
+    vectors = np.diag([2.0, 2.0, 5.0])
+    # a slab of liquid between z=1 and z=2 and two gas atoms
+    positions = np.concatenate([rng.uniform([0, 0, 1], [2, 2, 2], (998, 3)), [[1, 1, 3.1], [1, 1, 4.1]]])
+    masses = np.full(1000, 18.0)
+    charges = np.tile([1.0, -1.0], 500)
+    profile = DensityProfile(1000, masses=masses, charges=charges, axis='z', n_bin=5)
+    profile.accumulate_positions(positions, vectors, block=0)
+    profile.accumulate_positions(positions + [0, 0, 5], vectors * [1, 1, 1.2], block=1)
+    assert profile.blocks == [0, 1]
+
+    z, density = profile.get_profile('number', block=0)
+    assert pytest.approx(z) == [0.5, 1.5, 2.5, 3.5, 4.5]
+    assert pytest.approx(density) == [0, 998 / 4, 0, 1 / 4, 1 / 4]
+    z, density = profile.get_profile('mass', block=0)
+    assert pytest.approx(density[1]) == 998 / 4 * 18 / 6.02214076E23 / 1000 / 1E-27
+    z, density = profile.get_profile('charge', block=0)
+    assert pytest.approx(density.sum(), abs=1E-10) == 0
+
+    # relative coordinates are used for the fluctuating box
+    z, density = profile.get_profile('number', block=1)
+    assert pytest.approx(z) == [0.6, 1.8, 3.0, 4.2, 5.4]
+    assert pytest.approx(density.sum() * 4 * 1.2) == 1000
+
+    z, density = profile.get_profile('number')
+    assert pytest.approx(z) == [0.55, 1.65, 2.75, 3.85, 4.95]
+
+
+def test_trajectory():
+    trj = Trajectory.open(cwd + '/../trajectory/files/100-SPCE.gro')
+    masses = np.tile([15.999, 1.008, 1.008], 100)
+    profile = DensityProfile(trj.n_atom, masses=masses, axis='x', n_bin=10)
+    profile_o = DensityProfile(trj.n_atom, axis='x', n_bin=10, subset=list(range(0, 300, 3)))
+    for frame_chunk in trj.iter_frames(chunk=1):
+        profile.accumulate_chunk(frame_chunk, blocks=frame_chunk.i_frames)
+        profile_o.accumulate_chunk(frame_chunk, blocks=frame_chunk.i_frames)
+    trj.close()
+
+    frame = Trajectory.read_frame_from_file(cwd + '/../trajectory/files/100-SPCE.gro', 0)
+    z, density = profile.get_profile('mass', block=0)
+    dx = frame.cell.size[0] / 10
+    assert pytest.approx(z[1] - z[0]) == dx
+    assert pytest.approx(density.mean()) == masses.sum() / frame.cell.volume / 6.02214076E23 / 1000 / 1E-27
+    z, density = profile_o.get_profile('number', block=0)
+    assert pytest.approx(density.mean() * profile_o.n_bin * dx) == 100 / frame.cell.size[1] / frame.cell.size[2]
+    with pytest.raises(Exception):
+        profile_o.get_profile('mass')
+    with pytest.raises(Exception):
+        profile_o.get_profile('charge')
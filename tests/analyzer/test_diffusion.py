@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import os
+import numpy as np
+import pytest
+from mstools.trajectory import Frame, FrameChunk
+from mstools.analyzer.rdf import AtomGroups
+from mstools.analyzer.diffusion import calc_msd, Unwrapper, MSD
+
+cwd = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_calc_msd():
+    rng = np.random.default_rng(0)
+    positions = np.cumsum(rng.normal(0, 0.1, (100, 20, 3)), axis=0)
+    for dims, index in [('xyz', [0, 1, 2]), ('xy', [0, 1]), ('z', [2])]:
+        msd = calc_msd(positions, dims)
+        x = positions[:, :, index]
+        msd_ref = [np.mean(np.sum((x[m:] - x[:len(x) - m]) ** 2, axis=-1), axis=0) for m in range(len(x))]
+        assert pytest.approx(msd, abs=1E-10) == np.array(msd_ref)
+
+
+def test_unwrap():
+    rng = np.random.default_rng(0)
+    positions = np.cumsum(rng.normal(0, 0.1, (50, 20, 3)), axis=0)
+    vectors = np.array([[2.0, 0, 0], [0.5, 2.0, 0], [0.3, -0.4, 2.0]])
+    frac = positions @ np.linalg.inv(vectors)
+    wrapped = (frac - np.floor(frac)) @ vectors
+    expected = positions - positions[0] + wrapped[0]
+
+    unwrapper = Unwrapper()
+    unwrapped = [unwrapper.unwrap(wrapped[i], vectors) for i in range(len(wrapped))]
+    assert pytest.approx(np.array(unwrapped), abs=1E-10) == expected
+
+    unwrapper = Unwrapper()
+    unwrapped = [unwrapper.unwrap_frames(wrapped[:20], [vectors] * 20),
+                 unwrapper.unwrap_frames(wrapped[20:], [vectors] * 30)]
+    assert pytest.approx(np.concatenate(unwrapped), abs=1E-10) == expected
+
+
+def test_msd():
+    # random walk of 200 dimers in a box, D = 0.005 nm^2/ps in xy, frozen in z
+    rng = np.random.default_rng(1)
+    n_frame, n_mol = 500, 200
+    steps = rng.normal(0, 0.1, (n_frame, n_mol, 3))
+    steps[:, :, 2] = 0
+    com = np.cumsum(steps, axis=0) + rng.random((n_mol, 3)) * 4
+    positions = np.repeat(com, 2, axis=1)
+    positions[:, ::2, 0] -= 0.05
+    positions[:, 1::2, 0] += 0.05
+
+    msd = MSD(AtomGroups.from_molecule_index(np.repeat(np.arange(n_mol), 2)))
+    frame = Frame(n_mol * 2)
+    frame.cell.set_box([4, 4, 4])
+    for i in range(n_frame):
+        frame.positions[:] = positions[i] - np.floor(positions[i] / 4) * 4
+        frame.time = i * 1.0
+        msd.accumulate(frame)
+
+    time, msd_z = msd.get_msd(dims='z')
+    assert pytest.approx(msd_z, abs=1E-8) == 0
+    diffusion, stderr = msd.get_diffusion(dims='xy')
+    assert pytest.approx(diffusion, rel=0.2) == 5E-5  # cm^2/s
+    assert stderr < diffusion
+
+    # the COMs of a chunk of frames are calculated at once
+    msd_chunk = MSD(AtomGroups.from_molecule_index(np.repeat(np.arange(n_mol), 2)))
+    chunk = FrameChunk(128, n_mol * 2)
+    for begin in range(0, n_frame, 128):
+        i_frames = list(range(begin, min(begin + 128, n_frame)))
+        for i, frame in zip(i_frames, chunk._frames):
+            frame.positions[:] = positions[i] - np.floor(positions[i] / 4) * 4
+            frame.cell.set_box([4, 4, 4])
+            frame.time = i * 1.0
+        chunk._select(i_frames)
+        msd_chunk.accumulate_chunk(chunk)
+    assert msd_chunk.n_frame == n_frame
+    groups = msd_chunk.groups
+    coms = np.array([groups.calc_com(positions, vectors) for positions, vectors in zip(chunk.positions, chunk.cells)])
+    assert pytest.approx(groups.calc_com(chunk.positions, chunk.cells, chunk=5000), abs=1E-10) == coms
+    assert pytest.approx(groups.calc_com(chunk.positions, chunk.cells[0], chunk=5000), abs=1E-10) == coms
+    assert pytest.approx(msd_chunk.get_msd(dims='xy')[1], rel=1E-6) == msd.get_msd(dims='xy')[1]
@@ -181,3 +181,60 @@ def test_nonbonded_kernel():
 
     assert pytest.approx(sum(energy), rel=1E-6) == e
     assert pytest.approx(forces, rel=1E-6) == f
+
+
+def test_evaluate_all():
+    dihedrals = [dihedral.id_atoms for dihedral in top.dihedrals]
+    pairs = list(itertools.combinations(list(range(top.n_atom)), 2))
+    kernels = [
+        HarmonicBondKernel(top.positions,
+                           [bond.id_atoms for bond in top.bonds],
+                           [[0.1 + 0.01 * i, 50 + 5 * i] for i in range(top.n_bond)]),
+        HarmonicAngleKernel(top.positions,
+                            [angle.id_atoms for angle in top.angles],
+                            [[1 + 0.1 * i, 50 + 5 * i] for i in range(top.n_angle)]),
+        OplsTorsionKernel(top.positions, dihedrals,
+                          [[1 + 0.1 * i, 2 + 0.1 * i, 3 + 0.1 * i, 4 + 0.1 * i] for i in range(top.n_dihedral)]),
+        ConstrainedTorsionKernel(top.positions, dihedrals,
+                                 [[1 + 0.1 * i, 2 + 0.1 * i] for i in range(top.n_dihedral)]),
+        NonbondedKernel(top.positions, pairs, [(i, j / 1000, i / 10 + j / 10) for i, j in pairs]),
+    ]
+    energy, forces = evaluate_all(kernels)
+
+    e_sum = 0
+    f_sum = np.zeros((top.n_atom, 3))
+    for kernel in kernels:
+        _, e, f = kernel.evaluate()
+        e_sum += sum(e)
+        f_sum += f
+
+    assert pytest.approx(energy, rel=1E-10) == e_sum
+    assert pytest.approx(forces, rel=1E-10) == f_sum
+
+    # the geometry can not be shared between kernels constructed from different frames
+    bonds = [bond.id_atoms for bond in top.bonds]
+    positions = top.positions + 0.01 * np.arange(top.n_atom)[:, np.newaxis]
+    kernels = [HarmonicBondKernel(top.positions, bonds, [[0.1, 50]] * top.n_bond),
+               HarmonicBondKernel(positions, bonds, [[0.1, 50]] * top.n_bond)]
+    with pytest.raises(Exception):
+        evaluate_all(kernels)
+
+
+def test_evaluate_frames():
+    np.random.seed(0)
+    positions = top.positions + (np.random.random((7, top.n_atom, 3)) - 0.5) * 0.01
+    indexes = [dihedral.id_atoms for dihedral in top.dihedrals]
+    parameters = [[1 + 0.1 * i, 2 + 0.1 * i, 3 + 0.1 * i, 4 + 0.1 * i] for i in range(top.n_dihedral)]
+
+    kernel = OplsTorsionKernel(top.positions, indexes, parameters)
+    energies, forces = kernel.evaluate_frames(positions, chunk=3)
+    assert energies.shape == (7,)
+    assert forces.shape == (7, top.n_atom, 3)
+
+    for i in range(7):
+        _, energy, f = OplsTorsionKernel(positions[i], indexes, parameters).evaluate()
+        assert pytest.approx(energies[i], rel=1E-10) == sum(energy)
+        assert pytest.approx(forces[i], rel=1E-10) == f
+
+    energies, forces = kernel.evaluate_frames(positions, calc_forces=False)
+    assert forces is None
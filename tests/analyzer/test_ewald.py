@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
+import math
 import pytest
 from mstools.analyzer.ewald import EwaldSum
+from mstools.constant import ONE_4PI_EPS0
 
 import os
 
@@ -36,3 +38,34 @@ def test_energy():
     energy, forces = ewald.calc_energy_forces(ewald=False)
     assert pytest.approx(energy, rel=1E-6) == -1011.3025
     assert pytest.approx(forces[-1], rel=1E-4) == [-1.5860e+02, 4.9182e+02, -7.5005e+01]
+
+
+def test_pme():
+    ewald = EwaldSum.create_test(100, seed=0, cutoff=1.2)
+    assert ewald.calc_pme_grid() == (21, 27, 35)
+
+    e_ewald, f_ewald = ewald.calc_ewald_long()
+    e_pme, f_pme = ewald.calc_pme_long()
+    assert pytest.approx(e_pme, rel=1E-4) == e_ewald
+    assert pytest.approx(f_pme, abs=1) == f_ewald
+
+    energy, forces = ewald.calc_energy_forces(ewald=True, pme=True)
+    assert pytest.approx(energy, rel=1E-4) == -1089.0515
+
+
+def test_small_box():
+    # the cutoff is larger than half of the box
+    ewald = EwaldSum.create_test(30, box=[2.0, 2.2, 2.4], seed=0, cutoff=1.2)
+    energy, forces = ewald.calc_ewald_short()
+
+    e_ref = 0
+    for i in range(ewald.n_atom):
+        for j in range(i + 1, ewald.n_atom):
+            delta, r = ewald.distance(ewald.positions[i], ewald.positions[j], ewald.cutoff)
+            if r > 0:
+                e = ONE_4PI_EPS0 * ewald.charges[i] * ewald.charges[j] / r
+                e_ref += e * math.erfc(ewald.alpha * r)
+    assert pytest.approx(energy, rel=1E-6) == e_ref
+
+    i, j, delta, r = ewald.find_pairs_minimum_image(chunk=100)
+    assert len(i) > 0 and all(i < j) and max(r) <= 1.2
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import itertools
+import numpy as np
+import pytest
+from mstools.analyzer.neighbors import find_pairs, find_pairs_minimum_image, minimum_image, VerletList
+
+
+def brute_force(pos1, pos2, vectors, cutoff, pbc):
+    images = [[-2, -1, 0, 1, 2] if p in pbc else [0] for p in 'xyz']
+    images = np.array(list(itertools.product(*images))) @ vectors
+    delta = pos2[np.newaxis, :, np.newaxis, :] - pos1[:, np.newaxis, np.newaxis, :] + images
+    r_min = np.sqrt((delta ** 2).sum(axis=-1)).min(axis=-1)
+    return r_min
+
+
+def test_find_pairs_between_triclinic():
+    rng = np.random.default_rng(1)
+    vectors = np.array([[3.0, 0, 0], [1.2, 2.8, 0], [-1.0, 0.9, 2.6]])
+    pos1 = rng.random((100, 3)) @ vectors * 1.5 - 0.5
+    pos2 = rng.random((150, 3)) @ vectors
+    i, j, delta, r = find_pairs(pos1, 1.1, vectors, positions2=pos2)
+
+    r_min = brute_force(pos1, pos2, vectors, 1.1, 'xyz')
+    i_ref, j_ref = np.nonzero(r_min <= 1.1)
+    assert set(zip(i, j)) == set(zip(i_ref, j_ref))
+    assert pytest.approx(np.sort(r), abs=1E-10) == np.sort(r_min[i_ref, j_ref])
+    assert pytest.approx(np.sqrt((delta ** 2).sum(axis=1)), abs=1E-10) == r
+
+
+@pytest.mark.parametrize('pbc', ['', 'z', 'xy', 'xyz'])
+def test_find_pairs_partial_pbc(pbc):
+    rng = np.random.default_rng(2)
+    vectors = np.array([[2.5, 0, 0], [0.6, 2.4, 0], [0.3, -0.4, 3.0]])
+    pos = rng.random((300, 3)) @ vectors
+    i, j, delta, r = find_pairs(pos, 0.6, vectors, pbc)
+    assert np.all(i < j)
+
+    r_min = brute_force(pos, pos, vectors, 0.6, pbc)
+    i_ref, j_ref = np.nonzero(np.triu(r_min <= 0.6, k=1))
+    assert sorted(zip(i, j)) == sorted(zip(i_ref, j_ref))
+    assert pytest.approx(delta, abs=1E-10) == minimum_image(pos[j] - pos[i], vectors, pbc)
+
+    if pbc == '':
+        i2, j2, _, _ = find_pairs(pos, 0.6)
+        assert sorted(zip(i, j)) == sorted(zip(i2, j2))
+
+    i3, j3, delta3, r3 = find_pairs_minimum_image(pos, 0.6, vectors, pbc, chunk=1000)
+    assert list(zip(i3, j3)) == sorted(zip(i, j))
+    assert pytest.approx(delta3, abs=1E-10) == minimum_image(pos[j3] - pos[i3], vectors, pbc)
+
+
+def test_find_pairs_invalid():
+    pos = np.random.default_rng(0).random((10, 3))
+    with pytest.raises(Exception):
+        find_pairs(pos, 0.6, np.identity(3))
+    with pytest.raises(Exception):
+        find_pairs(pos, 0.2, np.zeros((3, 3)), 'xyz')
+    i, j, _, _ = find_pairs(pos, 0.6, np.identity(3), '')
+    assert len(i) > 0
+
+    # the cutoff is not limited by the box if all pairs are checked
+    i, j, _, r = find_pairs_minimum_image(pos, 0.9, np.identity(3))
+    assert len(i) == 45 and np.all(r <= np.sqrt(3) / 2)
+    assert len(find_pairs_minimum_image(np.zeros((0, 3)), 0.6, np.identity(3))[0]) == 0
+
+
+def test_verlet():
+    rng = np.random.default_rng(3)
+    vectors = np.diag([3.0, 3.0, 3.0])
+    pos = rng.random((500, 3)) * 3
+    verlet = VerletList(0.8, skin=0.2)
+    for step in range(10):
+        pos = pos + rng.uniform(-0.01, 0.01, pos.shape)
+        i, j, delta, r = verlet.update(pos, vectors)
+        i_ref, j_ref, _, r_ref = find_pairs(pos, 0.8, vectors)
+        assert sorted(zip(i, j)) == sorted(zip(i_ref, j_ref))
+    assert verlet.n_build < 10
+
+    verlet.update(pos, vectors * 1.01)
+    n_build = verlet.n_build
+    verlet.update(pos + 0.5, vectors * 1.01)
+    assert verlet.n_build == n_build + 1
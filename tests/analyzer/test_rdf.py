@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import os
+import itertools
+import numpy as np
+import pytest
+from mstools.topology import Topology
+from mstools.trajectory import Trajectory
+from mstools.analyzer.rdf import select_groups, RDF
+
+cwd = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_rdf():
+    top = Topology.open(cwd + '/../trajectory/files/100-SPCE.psf')
+    trj = Trajectory.open(cwd + '/../trajectory/files/100-SPCE.gro')
+    frames = trj.read_frames(list(range(trj.n_frame)))
+
+    rdf = RDF(select_groups(top), r_max=1.0, dr=0.05)
+    rdf_com = RDF(select_groups(top, by_molecule=True), select_groups(top, atom_types=['Ow']), r_max=1.0, dr=0.05,
+                  exclude_same_molecule=True)
+    counts = np.zeros((2, 2, rdf.n_bin))
+    for frame in frames:
+        rdf.accumulate(frame)
+        rdf_com.accumulate(frame)
+
+        box = frame.cell.size
+        delta = frame.positions[np.newaxis] - frame.positions[:, np.newaxis]
+        delta -= np.floor(delta / box + 0.5) * box
+        r = np.sqrt((delta ** 2).sum(axis=-1))
+        is_o = np.array([atom.type == 'Ow' for atom in top.atoms])
+        for a, b in itertools.product([0, 1], [0, 1]):
+            mask = np.outer(is_o == (a == 1), is_o == (b == 1))
+            np.fill_diagonal(mask, False)
+            counts[a, b] += np.histogram(r[mask], bins=rdf.edges)[0]
+
+    # labels are sorted as Hw, Ow
+    cn = rdf.get_coordination_number(partial=True)
+    assert pytest.approx(cn[('Ow', 'Ow')], abs=1E-8) == np.cumsum(counts[1, 1]) / 100 / len(frames)
+    assert pytest.approx(cn[('Ow', 'Hw')], abs=1E-8) == np.cumsum(counts[1, 0]) / 100 / len(frames)
+    assert pytest.approx(rdf.get_coordination_number(), abs=1E-8) == np.cumsum(counts.sum(axis=(0, 1))) / 300 / len(frames)
+    assert cn[('Ow', 'Hw')][-1] > 2
+    assert cn[('Ow', 'Hw')][2] == pytest.approx(2)  # covalent bonds
+
+    g = rdf.get_rdf(partial=True)[('Ow', 'Ow')]
+    assert np.argmax(g) == 5  # first peak at 0.25 - 0.30 nm
+    assert g[:4].max() == 0
+    # the COM of SPCE is close to oxygen
+    assert list(rdf_com.get_rdf(partial=True).keys()) == [('SPCE', 'Ow')]
+    assert pytest.approx(rdf_com.get_coordination_number()[-1], abs=0.5) == cn[('Ow', 'Ow')][-1]
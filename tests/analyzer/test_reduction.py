@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+import os
+import numpy as np
+import pytest
+from mstools.topology import Topology
+from mstools.analyzer.reduction import MoleculeIndex
+
+cwd = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_topology():
+    top = Topology.open(cwd + '/../topology/files/10-H2O-5-C3H6.psf')
+    index = MoleculeIndex.from_topology(top)
+    assert index.n_molecule == top.n_molecule
+    assert index.n_atom == top.n_atom
+    assert pytest.approx(index.molecule_masses[0]) == sum(atom.mass for atom in top.molecules[0].atoms)
+    assert pytest.approx(index.total_charge, abs=1E-6) == [sum(a.charge for a in mol.atoms) for mol in top.molecules]
+
+    rng = np.random.default_rng(0)
+    vectors = np.diag([2.0, 2.2, 2.4])
+    positions = np.concatenate([rng.random(3) * 2 + rng.uniform(-0.1, 0.1, (mol.n_atom, 3)) for mol in top.molecules])
+    com = index.com(positions)
+    dipole = index.dipole(positions)
+    for mol in top.molecules:
+        ids = [atom.id for atom in mol.atoms]
+        masses = np.array([atom.mass for atom in mol.atoms])
+        charges = np.array([atom.charge for atom in mol.atoms])
+        com_ref = (positions[ids] * masses[:, np.newaxis]).sum(axis=0) / masses.sum()
+        assert pytest.approx(com[mol.id]) == com_ref
+        assert pytest.approx(dipole[mol.id]) == ((positions[ids] - com_ref) * charges[:, np.newaxis]).sum(axis=0)
+
+    # the molecules across boundary are made whole
+    wrapped = positions % vectors.diagonal()
+    assert pytest.approx(index.dipole(wrapped, vectors)) == dipole
+    shift = index.com(wrapped, vectors) - com
+    assert pytest.approx(shift - np.round(shift / vectors.diagonal()) * vectors.diagonal(), abs=1E-10) == 0
+
+    # a stack of frames
+    stack = np.array([positions, positions + 1.0, positions * 1.5])
+    assert pytest.approx(index.com(stack)[1]) == com + 1.0
+    assert pytest.approx(index.dipole(stack)[2]) == dipole * 1.5
+    assert pytest.approx(index.com_velocity(stack)[2]) == com * 1.5
+
+
+def test_unsorted():
+    molecule_index = [1, 0, 1, 2, 0]
+    index = MoleculeIndex(molecule_index, masses=[1, 2, 3, 0, 2], charges=[1, -1, -1, 0.5, 0])
+    assert list(index.offsets) == [0, 2, 4, 5]
+    assert pytest.approx(index.molecule_masses) == [4, 4, 0]
+    assert pytest.approx(index.total_charge) == [-1, 0, 0.5]
+    velocities = np.arange(15, dtype=float).reshape(5, 3)
+    assert pytest.approx(index.com_velocity(velocities)) == [(2 * velocities[1] + 2 * velocities[4]) / 4,
+                                                             (velocities[0] + 3 * velocities[2]) / 4,
+                                                             velocities[3]]
+    with pytest.raises(Exception):
+        MoleculeIndex([0, 2, 2])
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pytest
+from mstools.analyzer.transport import StreamingACF, calc_acf, integrate_acf, green_kubo, calc_viscosity, \
+    calc_current, calc_conductivity, calc_vacf_diffusion
+
+
+def acf_direct(x, n_lag):
+    x = x.reshape(len(x), -1)
+    return np.array([np.mean(x[:len(x) - m] * x[m:]) for m in range(n_lag)])
+
+
+def test_calc_acf():
+    rng = np.random.default_rng(0)
+    x = rng.normal(0, 1, (500, 3))
+    assert pytest.approx(calc_acf(x, 50), abs=1E-10) == acf_direct(x, 50)
+    assert pytest.approx(calc_acf(x[:, 0]), abs=1E-10) == acf_direct(x[:, 0], 500)
+
+
+def test_streaming():
+    rng = np.random.default_rng(0)
+    x = rng.normal(0, 1, (1000, 2))
+    acf_ref = acf_direct(x, 100)
+    for chunk in [1, 37, 100, 1000]:
+        acf = StreamingACF(100, block_size=250)
+        for i in range(0, len(x), chunk):
+            acf.accumulate(x[i:i + chunk])
+        assert acf.n_sample == 1000
+        assert pytest.approx(acf.get_acf(), abs=1E-10) == acf_ref
+        block_acfs = acf.get_block_acfs()
+        assert block_acfs.shape == (4, 100)
+        assert pytest.approx(block_acfs[2], abs=1E-10) == acf_direct(x[500:750], 100)
+
+    with pytest.raises(Exception):
+        acf.accumulate(rng.normal(0, 1, (10, 3)))
+
+
+def test_green_kubo():
+    # exponentially correlated series with unit variance and correlation time tau
+    rng = np.random.default_rng(0)
+    tau = 2.0
+    dt = 0.1
+    a = np.exp(-dt / tau)
+    noise = rng.normal(0, np.sqrt(1 - a * a), 200000)
+    x = np.empty(len(noise))
+    x[0] = 0
+    for i in range(1, len(x)):
+        x[i] = a * x[i - 1] + noise[i]
+
+    assert pytest.approx(integrate_acf([1, 1, 1], 0.5)) == [0, 0.5, 1.0]
+    time, integral, stderr = green_kubo(x, dt, 20, n_block=5, chunk=30000)
+    assert len(time) == 201
+    assert pytest.approx(time[-1]) == 20
+    assert pytest.approx(integral[-1], rel=0.1) == tau
+    assert 0 < stderr[-1] < 0.2
+
+    time, viscosity, stderr = calc_viscosity(np.stack([x, x, x], axis=1), dt, 2.0, 300, 20)
+    factor = 6.02214076E-3 / 8.31446262 * 2.0 / 300
+    assert pytest.approx(viscosity, rel=1E-6) == integral * factor
+
+    with pytest.raises(Exception):
+        green_kubo(x[:1000], dt, 20, n_block=10)
+
+
+def test_current():
+    rng = np.random.default_rng(0)
+    velocities = rng.normal(0, 1, (50, 4, 3))
+    charges = np.array([1, -1, 0.5, -0.5])
+    current = calc_current(velocities, charges)
+    assert current.shape == (50, 3)
+    assert pytest.approx(current[3]) == velocities[3, 0] - velocities[3, 1] + 0.5 * velocities[3, 2] - 0.5 * \
+           velocities[3, 3]
+    time, conductivity, stderr = calc_conductivity(current, 0.01, 10, 300, 0.2, n_block=1)
+    assert np.isnan(stderr).all()
+    assert conductivity[0] == 0
+    time, integral, _ = green_kubo(current, 0.01, 0.2, n_block=1)
+    factor = 1.602176634E-19 ** 2 / 1E-9 / 1E-12 / 10 / 1.380649E-23 / 300
+    assert pytest.approx(conductivity, rel=1E-6) == integral * factor
+    _, conductivity_large, _ = calc_conductivity(current, 0.01, 1000, 300, 0.2, n_block=1)
+    assert pytest.approx(conductivity_large, rel=1E-6) == conductivity / 100
+
+    time, diffusion, stderr = calc_vacf_diffusion(velocities, 0.01, 0.2, n_block=2)
+    vacf = calc_acf(velocities.reshape(50, -1), 21)
+    assert pytest.approx(diffusion) == integrate_acf(vacf, 0.01) * 1E-2
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import os
+import numpy as np
+import pytest
+from mstools.topology import Topology
+from mstools.analyzer.whole import WholeMolecules
+
+cwd = os.path.dirname(os.path.abspath(__file__))
+
+
+def wrap(positions, vectors):
+    frac = positions @ np.linalg.inv(vectors)
+    return (frac - np.floor(frac)) @ vectors
+
+
+def test_make_whole():
+    top = Topology.open(cwd + '/../topology/files/10-H2O-5-C3H6.psf')
+    whole = WholeMolecules(top)
+    assert whole.n_level == 3
+    assert len(whole.children) == top.n_atom - top.n_molecule
+
+    rng = np.random.default_rng(0)
+    vectors = np.array([[1.5, 0, 0], [0.4, 1.4, 0], [-0.3, 0.2, 1.6]])
+    positions = np.concatenate([rng.random(3) @ vectors * 2 + rng.uniform(-0.2, 0.2, (mol.n_atom, 3))
+                                for mol in top.molecules])
+    wrapped = wrap(positions, vectors)
+
+    result = whole.make_whole(wrapped, vectors)
+    for mol in top.molecules:
+        ids = [atom.id for atom in mol.atoms]
+        assert pytest.approx(result[ids[0]]) == wrapped[ids[0]]
+        assert pytest.approx(result[ids] - result[ids[0]], abs=1E-10) == positions[ids] - positions[ids[0]]
+
+    # a batch of frames with different boxes
+    batch_vectors = np.array([vectors, vectors * 1.1])
+    batch = np.array([wrapped, wrap(positions * 1.1, vectors * 1.1)])
+    result = whole.make_whole(batch, batch_vectors)
+    ids = [atom.id for atom in top.molecules[-1].atoms]
+    assert pytest.approx(result[1, ids] - result[1, ids[0]], abs=1E-10) == (positions[ids] - positions[ids[0]]) * 1.1
+    whole.make_whole(batch, batch_vectors, inplace=True)
+    assert pytest.approx(batch) == result
+
+    with pytest.raises(Exception):
+        whole.make_whole(wrapped[:-1], vectors)
+
+
+def test_subset():
+    top = Topology.open(cwd + '/../topology/files/10-H2O-5-C3H6.psf')
+    subset = [atom.id for atom in top.atoms if atom.symbol != 'H']
+    whole = WholeMolecules(top, subset=subset)
+    assert whole.n_atom == len(subset)
+    assert len(whole.children) == len(subset) - top.n_molecule
@@ -3,8 +3,10 @@
 import os
 import sys
 import shutil
+import copy
 import pytest
-from mstools.topology import Topology, UnitCell
+import numpy as np
+from mstools.topology import Topology, UnitCell, Atom
 from mstools.forcefield import ForceField
 from mstools.simsys import System
 from mstools.wrapper.packmol import Packmol
@@ -46,7 +48,24 @@ def test_compress():
     for mol, count in mols_unique.items():
         print(str(mol), count)
 
-    assert list(mols_unique.values()) == [4, 6, 5, 1, 10, 5, 1]
+    assert list(mols_unique.values()) == [14, 6, 5, 2, 5]
+
+    mols, index = top.get_unique_molecule_index()
+    assert [mol.id for mol in mols] == [0, 4, 10, 15, 26]
+    assert index == [0] * 4 + [1] * 6 + [2] * 5 + [3] + [0] * 10 + [4] * 5 + [3]
+    assert molecules[0].get_fingerprint() == molecules[16].get_fingerprint()
+    assert molecules[0].get_fingerprint() != molecules[4].get_fingerprint()
+
+    # the fingerprints are not cached on the properties of atoms
+    molecules[16].atoms[0].charge = 0.1
+    mols, index = top.get_unique_molecule_index()
+    assert len(mols) == 6 and index[16] == 4 and index[17] == 0
+
+    # the rows of atoms are not consecutive after editing a molecule without updating topology
+    top = Topology.open(cwd + '/files/10-H2O-5-C3H6.psf')
+    top.molecules[0].add_atom(Atom('X'), update_topology=False)
+    mols, index = top.get_unique_molecule_index()
+    assert len(mols) == 3 and index == [0] + [1] * 9 + [2] * 5
 
 
 def test_scale():
@@ -74,3 +93,129 @@ def test_guess_connectivity():
     assert top.n_angle == 3120
     assert top.n_dihedral == 0
     assert top.n_improper == 0
+
+    # bonds across the periodic boundaries are found after the atoms are shifted and wrapped
+    positions = top.positions + [2.0, 2.0, 0]
+    positions[:, :2] %= [4.109, 4.380]
+    top.set_positions(positions)
+    top.guess_connectivity_from_ff(ff, angle_tolerance=15, pbc='xy')
+    assert top.n_bond == 1248
+    assert top.n_angle == 3120
+
+    # all pairs are checked with minimum image if the cell is narrower than twice of bond_limit
+    a, b = 4.109 / 13, 4.380 / 8
+    mol = Topology.open(cwd + '/files/MoS2-13x8-layer1.xyz').molecules[0]
+    for atom in [atom for atom in mol.atoms if atom.position[0] >= a - 1E-3 or atom.position[1] >= b - 1E-3]:
+        mol.remove_atom(atom)
+    top = Topology([mol], cell=UnitCell([a, b, 1.230]))
+    top.guess_connectivity_from_ff(ff, angle_tolerance=15, pbc='xy')
+    assert top.n_bond == 18
+    assert top.n_angle == 41
+
+
+def test_arrays():
+    top = Topology.open(cwd + '/files/10-H2O-5-C3H6.psf')
+    atom = top.atoms[3]
+    assert not hasattr(atom, '__dict__')
+    assert top.positions.dtype == np.float32
+
+    positions = top.positions + 1.0
+    top.set_positions(positions)
+    assert pytest.approx(atom.position) == positions[3]
+    atom.position[:] = 0.5
+    assert pytest.approx(top.positions[3]) == [0.5, 0.5, 0.5]
+    atom.charge = 0.25
+    assert atom.charge == 0.25
+    assert type(atom.mass) is float
+
+    # the position stays a view into the topology after the arrays are enlarged
+    position = atom.position
+    for i in range(5):
+        top.add_molecule(copy.deepcopy(top.molecules[-1]))
+    position += 0.5
+    atom.position[2] = 2.0
+    assert pytest.approx(top.positions[3]) == [1.0, 1.0, 2.0]
+    atom.position = [0.5, 0.5, 0.5]
+    last = top.atoms[-1]
+    last.position = [7, 8, 9]
+    assert pytest.approx(top.positions[-1]) == [7, 8, 9]
+    positions = top.positions
+    positions[-1] = 1.0
+    top.set_positions(positions)
+    assert pytest.approx(last.position) == [1, 1, 1]
+    assert pytest.approx(Topology(top.molecules[-1:]).positions[-1]) == [1, 1, 1]
+    del position
+
+    # the atoms are rebound once they are added into another topology
+    mol = top.molecules[0]
+    mol.atoms[0].position = [1, 2, 3]
+    other = Topology([mol])
+    mol.atoms[0].position = [4, 5, 6]
+    assert pytest.approx(other.positions[0]) == [4, 5, 6]
+    assert pytest.approx(top.positions[0]) == [4, 5, 6]
+    assert pytest.approx(top.positions[3]) == [0.5, 0.5, 0.5]
+    assert top.has_position
+
+
+def test_replicate():
+    top = Topology.open(cwd + '/files/10-H2O-5-C3H6.psf')
+    water, propene = top.molecules[0], top.molecules[-1]
+    propene.atoms[0].charge = 0.3
+    big = Topology([water, propene], numbers=[3, 4])
+    assert big.n_molecule == 7
+    assert big.n_atom == 3 * water.n_atom + 4 * propene.n_atom
+    assert big.n_bond == 3 * water.n_bond + 4 * propene.n_bond
+    assert big.n_dihedral == 4 * propene.n_dihedral
+    mols = big.molecules
+    assert mols[3]._template is mols[6]._template is propene._template
+    assert pytest.approx(mols[6].atoms[0].charge) == 0.3
+    assert pytest.approx(big.positions[-propene.n_atom:]) == np.array([atom.position for atom in propene.atoms])
+    assert all(mol.is_similar_to(propene) for mol in mols[3:])
+    assert mols[6].bonds[0].atom1.molecule is mols[6]
+    assert [atom.id for atom in mols[6].atoms] == list(range(big.n_atom - propene.n_atom, big.n_atom))
+
+    # the replicas are independent
+    mols[3].atoms[0].position = [9, 9, 9]
+    assert pytest.approx(mols[4].atoms[0].position) == propene.atoms[0].position
+    mols[3].remove_atom(mols[3].atoms[-1])
+    assert mols[3]._template is None and mols[4]._template is propene._template
+    assert mols[4].n_atom == propene.n_atom
+
+    # replicate from molecules without topology
+    mol = copy.deepcopy(propene)
+    assert mol.topology is None and mol._template is propene._template
+    assert pytest.approx(mol.atoms[0].position) == propene.atoms[0].position
+    big = Topology([mol], numbers=[5])
+    assert pytest.approx(big.positions[-mol.n_atom:]) == np.array([atom.position for atom in propene.atoms])
+    assert pytest.approx(copy.deepcopy(big).positions) == big.positions
+
+
+def test_batch_edit():
+    ff = ForceField.open(cwd + '/../forcefield/files/SWM4-NDP.zfp')
+    mol = Topology.open(cwd + '/files/TIP3P.zmat').molecules[0]
+    top = Topology([mol], numbers=[10])
+    ref = Topology([mol], numbers=[10])
+    ref.generate_virtual_sites(ff)
+    ref.generate_drude_particles(ff)
+
+    n_update = []
+    update_molecules = top.update_molecules
+    top.update_molecules = lambda *args, **kwargs: n_update.append(1) or update_molecules(*args, **kwargs)
+    with top.batch_edit():
+        with top.batch_edit():
+            for mol in top.molecules:
+                mol.generate_virtual_sites(ff)
+        assert top.n_atom == 30
+        for mol in top.molecules:
+            mol.generate_drude_particles(ff)
+    assert len(n_update) == 1
+    assert top.n_atom == ref.n_atom == 50
+    assert [atom.id for atom in top.atoms] == list(range(50))
+    assert [atom.name for atom in top.atoms] == [atom.name for atom in ref.atoms]
+    assert [bond.id_atoms for bond in top.bonds] == [bond.id_atoms for bond in ref.bonds]
+
+    top.remove_drude_particles()
+    top.remove_virtual_sites()
+    assert len(n_update) == 3
+    assert top.n_atom == top.n_bond + top.n_molecule == 30
+    assert [atom.id for atom in top.atoms] == list(range(30))
@@ -34,3 +34,61 @@ def test_read():
     assert frame.cell.is_rectangular
     assert pytest.approx(frame.cell.size, abs=1E-6) == [3.0004316] * 3
     assert pytest.approx(frame.positions[-1], abs=1E-6) == [2.11148, 0.241373, 0.664092]
+
+
+def test_iter_frames():
+    trj = Trajectory.open([cwd + '/files/100-SPCE.gro', cwd + '/files/100-SPCE.lammpstrj'])
+    i_frames = []
+    for frame_chunk in trj.iter_frames(begin=1, stride=2, chunk=2):
+        assert frame_chunk.positions.shape == (frame_chunk.n_frame, 300, 3)
+        assert frame_chunk.cells.shape == (frame_chunk.n_frame, 3, 3)
+        for i, i_frame in enumerate(frame_chunk.i_frames):
+            frame = trj.read_frame(i_frame)
+            assert (frame_chunk.positions[i] == frame.positions).all()
+            assert (frame_chunk.cells[i] == frame.cell.vectors).all()
+            assert frame_chunk.steps[i] == frame.step
+        i_frames += list(frame_chunk.i_frames)
+    assert i_frames == [1, 3, 5]
+
+    frame_chunk = next(trj.iter_frames(end=2))
+    assert frame_chunk.has_velocity == True
+    assert pytest.approx(frame_chunk.velocities[1, -1], abs=1E-6) == [-1.0323, 0.5604, -0.3797]
+
+
+def test_map():
+    import numpy as np
+
+    trj = Trajectory.open([cwd + '/files/100-SPCE.gro', cwd + '/files/100-SPCE.lammpstrj'])
+    z_mean = [trj.read_frame(i).positions[:, 2].mean() for i in range(trj.n_frame)]
+
+    func = lambda frame: frame.positions[:, 2].mean()
+    assert pytest.approx(trj.map(func, n_proc=1, chunk=4), abs=1E-6) == z_mean
+    assert pytest.approx(trj.map(func, n_proc=3, chunk=2), abs=1E-6) == z_mean
+    assert pytest.approx(trj.map(func, frames=[5, 1, 2], n_proc=2, chunk=1), abs=1E-6) == [z_mean[5], z_mean[1], z_mean[2]]
+
+    hist_func = lambda frame: np.histogram(frame.positions[:, 2], bins=10, range=(0, 3))[0]
+    hist = sum(hist_func(trj.read_frame(i)) for i in range(trj.n_frame))
+    assert (trj.map(hist_func, n_proc=1, reducer=np.add) == hist).all()
+    assert (trj.map(hist_func, n_proc=2, reducer=np.add, chunk=1) == hist).all()
+
+
+def test_prefetch_frames():
+    import threading
+
+    trj = Trajectory.open([cwd + '/files/100-SPCE.gro', cwd + '/files/100-SPCE.lammpstrj'])
+    positions = [trj.read_frame(i).positions.copy() for i in range(trj.n_frame)]
+    n_thread = threading.active_count()
+
+    frames = [5, 0, 3, 1, 2, 4]
+    buffers = set()
+    for i, frame in enumerate(trj.prefetch_frames(frames, depth=2)):
+        assert (frame.positions == positions[frames[i]]).all()
+        buffers.add(id(frame))
+    assert i == len(frames) - 1
+    assert len(buffers) <= 3
+    assert threading.active_count() == n_thread
+
+    for frame in trj.prefetch_frames(depth=1):
+        assert (frame.positions == positions[0]).all()
+        break
+    assert threading.active_count() == n_thread
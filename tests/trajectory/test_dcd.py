@@ -35,3 +35,24 @@ def test_write():
     dcd.close()
     # It's annoying that DCD files generated are different every time. Compare the size instead of the content.
     assert os.path.getsize(tmp) == os.path.getsize(cwd + '/files/baselines/gro-out.dcd')
+
+
+def test_read_in_place():
+    dcd = Trajectory.open(cwd + '/files/100-SPCE.dcd')
+    frame = dcd.read_frame(0)
+    positions = frame.positions
+    pos0 = positions.copy()
+    frame = dcd.read_frame(1)
+    assert frame.positions is positions
+    assert not (frame.positions == pos0).all()
+    frame = dcd.read_frame(0)
+    assert frame.positions is positions
+    assert (frame.positions == pos0).all()
+
+
+def test_iter_frames():
+    dcd = Trajectory.open(cwd + '/files/100-SPCE.dcd')
+    frame_chunk = next(dcd.iter_frames(stride=2))
+    assert list(frame_chunk.i_frames) == [0, 2]
+    assert pytest.approx(frame_chunk.positions[1, -1], abs=1E-6) == [2.545774, 2.661569, 1.707037]
+    assert pytest.approx(frame_chunk.cells[1].diagonal(), abs=1E-6) == [2.983427, 2.983427, 2.983427]
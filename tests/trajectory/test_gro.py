@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 
+import shutil
 import tempfile
 import filecmp
 import pytest
-from mstools.trajectory import Trajectory
+from mstools.trajectory import Trajectory, TrjHandler
 from mstools.topology import Topology
 
 import os
@@ -27,6 +28,52 @@ def test_read():
     assert pytest.approx(frame.velocities[-1], abs=1E-6) == [-1.0323, 0.5604, -0.3797]
 
 
+def test_frame_offset():
+    file = cwd + '/files/100-SPCE.gro'
+    with open(file, 'rb') as f:
+        line_offset = [0]
+        for line in f:
+            line_offset.append(line_offset[-1] + len(line))
+    expected = line_offset[::303]
+
+    for chunk in (1000, 4096, 1 << 26):
+        assert list(TrjHandler.scan_frame_offset(file, 303, chunk=chunk)) == expected
+
+    tmp = os.path.join(tempdir, 'cached.gro')
+    shutil.copy(file, tmp)
+    assert list(TrjHandler.load_frame_offset(tmp, 303)) == expected
+    assert os.path.exists(os.path.join(tempdir, '.cached.gro.mstools-idx'))
+    assert list(TrjHandler.load_frame_offset(tmp, 303)) == expected
+
+
+def test_read_irregular():
+    with open(cwd + '/files/100-SPCE.gro') as f:
+        lines = f.read().splitlines()
+    gro = Trajectory(cwd + '/files/100-SPCE.gro')
+    frame = gro.read_frame(1)
+    positions, velocities = frame.positions.copy(), frame.velocities.copy()
+
+    # windows line ending
+    tmp = os.path.join(tempdir, 'crlf.gro')
+    with open(tmp, 'wb') as f:
+        f.write('\r\n'.join(lines).encode() + b'\r\n')
+    frame = Trajectory(tmp).read_frame(1)
+    assert frame.has_velocity
+    assert pytest.approx(frame.positions, abs=1E-6) == positions
+    assert pytest.approx(frame.velocities, abs=1E-6) == velocities
+
+    # atom lines with different width and without velocities
+    tmp = os.path.join(tempdir, 'irregular.gro')
+    with open(tmp, 'w') as f:
+        for i, line in enumerate(lines):
+            if i % 303 not in (0, 1, 302):
+                line = line[:44] + ' ' * (i % 2)
+            f.write(line + '\n')
+    frame = Trajectory(tmp).read_frame(1)
+    assert not frame.has_velocity
+    assert pytest.approx(frame.positions, abs=1E-6) == positions
+
+
 def test_write():
     top = Topology.open(cwd + '/files/100-SPCE.psf')
     xtc = Trajectory.open(cwd + '/files/100-SPCE.xtc')
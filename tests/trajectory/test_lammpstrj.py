@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
+import tempfile
 import pytest
+import numpy as np
 from mstools.trajectory import Trajectory
 
 import os
@@ -23,3 +25,27 @@ def test_read():
     assert frame.cell.is_rectangular
     assert pytest.approx(frame.cell.size, abs=1E-6) == [3.0004316] * 3
     assert pytest.approx(frame.positions[-1], abs=1E-6) == [2.11148, 0.241373, 0.664092]
+
+
+def test_read_scaled_wrapped():
+    frame = Trajectory(cwd + '/files/100-SPCE.lammpstrj').read_frame(0)
+    positions = frame.positions.copy()
+    box = frame.cell.size
+
+    tmp = os.path.join(tempfile.mkdtemp(), 'scaled.lammpstrj')
+    image = np.floor(positions / box).astype(int)
+    scaled = positions / box - image
+    with open(tmp, 'w') as f:
+        f.write('ITEM: TIMESTEP\n100\nITEM: NUMBER OF ATOMS\n300\nITEM: BOX BOUNDS pp pp pp\n')
+        for length in box:
+            f.write('0 %f\n' % (length * 10))
+        f.write('ITEM: ATOMS id type element xs ys zs ix iy iz\n')
+        for i in reversed(range(300)):
+            f.write('%i 1 H %.8f %.8f %.8f %i %i %i\n' % (i + 1, *scaled[i], *image[i]))
+
+    trj = Trajectory(tmp)
+    assert trj.n_frame == 1
+    frame = trj.read_frame(0)
+    assert frame.step == 100
+    assert frame.has_charge == False
+    assert pytest.approx(frame.positions, abs=1E-5) == positions
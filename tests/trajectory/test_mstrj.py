@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import pytest
+from mstools.trajectory import Trajectory
+
+cwd = os.path.dirname(os.path.abspath(__file__))
+tempdir = tempfile.mkdtemp()
+
+
+def test_write_read():
+    gro = Trajectory.open(cwd + '/files/100-SPCE.gro')
+    lmp = Trajectory.open(cwd + '/files/100-SPCE.lammpstrj')
+    tmp = os.path.join(tempdir, 'out.mstrj')
+    trj = Trajectory.open(tmp, 'w')
+    trj.write_frame(gro.read_frame(0), write_velocity=True)
+    trj.write_frame(gro.read_frame(1), precision=0.001, compress=True)
+    trj.write_frame(lmp.read_frame(0), write_charge=True, compress=True)
+    trj.close()
+
+    trj = Trajectory.open(tmp)
+    assert trj.n_atom == 300
+    assert trj.n_frame == 3
+
+    frame = trj.read_frame(2)
+    frame_lmp = lmp.read_frame(0)
+    assert frame.step == frame_lmp.step
+    assert frame.has_velocity == False
+    assert frame.has_charge == True
+    assert (frame.positions == frame_lmp.positions).all()
+    assert (frame.charges == frame_lmp.charges).all()
+    assert pytest.approx(frame.cell.vectors, abs=1E-6) == frame_lmp.cell.vectors
+
+    frame = trj.read_frame(1)
+    frame_gro = gro.read_frame(1)
+    assert frame.has_velocity == False
+    assert frame.has_charge == False
+    assert pytest.approx(frame.positions, abs=5E-4) == frame_gro.positions
+
+    frame = trj.read_frame(0)
+    frame_gro = gro.read_frame(0)
+    assert frame.has_velocity == True
+    assert (frame.positions == frame_gro.positions).all()
+    assert (frame.velocities == frame_gro.velocities).all()
+
+
+def test_append():
+    gro = Trajectory.open(cwd + '/files/100-SPCE.gro')
+    tmp = os.path.join(tempdir, 'append.mstrj')
+    for i in range(gro.n_frame):
+        trj = Trajectory.open(tmp, 'a')
+        trj.write_frame(gro.read_frame(i), precision=0.001)
+        trj.close()
+
+    trj = Trajectory.open(tmp)
+    assert trj.n_frame == gro.n_frame
+    assert pytest.approx(trj.read_frame(1).positions, abs=5E-4) == gro.read_frame(1).positions
+    trj.close()
+
+    # the frames can still be read if the index at the end of file is lost
+    with open(tmp, 'r+b') as f:
+        f.truncate(trj._handler._frame_offset[-1])
+    trj = Trajectory.open(tmp)
+    assert trj.n_frame == gro.n_frame
+    assert pytest.approx(trj.read_frame(1).positions, abs=5E-4) == gro.read_frame(1).positions
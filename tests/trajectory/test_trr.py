@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import pytest
+from mstools.trajectory import Trajectory
+
+cwd = os.path.dirname(os.path.abspath(__file__))
+tempdir = tempfile.mkdtemp()
+
+
+def test_write_read():
+    gro = Trajectory.open(cwd + '/files/100-SPCE.gro')
+    tmp = os.path.join(tempdir, 'gro-out.trr')
+    trr = Trajectory.open(tmp, 'w')
+    for i in range(gro.n_frame):
+        frame = gro.read_frame(i)
+        frame.step = i * 1000
+        frame.time = i * 1.0
+        trr.write_frame(frame, write_velocity=(i % 2 == 0))
+    trr.close()
+
+    trr = Trajectory.open(tmp)
+    assert trr.n_atom == gro.n_atom
+    assert trr.n_frame == gro.n_frame
+
+    for i in reversed(range(gro.n_frame)):
+        frame_gro = gro.read_frame(i)
+        frame = trr.read_frame(i)
+        assert frame.step == i * 1000
+        assert frame.time == pytest.approx(i * 1.0)
+        assert frame.has_velocity == (i % 2 == 0)
+        assert pytest.approx(frame.positions, abs=1E-6) == frame_gro.positions
+        assert pytest.approx(frame.cell.vectors, abs=1E-6) == frame_gro.cell.vectors
+        if frame.has_velocity:
+            assert pytest.approx(frame.velocities, abs=1E-6) == frame_gro.velocities
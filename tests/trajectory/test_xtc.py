@@ -4,8 +4,9 @@ import os
 import tempfile
 import filecmp
 import pytest
+import numpy as np
 from mstools.topology import Topology
-from mstools.trajectory import Trajectory
+from mstools.trajectory import Trajectory, Frame
 
 cwd = os.path.dirname(os.path.abspath(__file__))
 tempdir = tempfile.mkdtemp()
@@ -35,3 +36,53 @@ def test_write():
         xtc.write_frame(frame)
     xtc.close()
     assert filecmp.cmp(tmp, cwd + '/files/baselines/gro-out.xtc')
+
+
+def test_read_metadata():
+    xtc = Trajectory.open(cwd + '/files/100-SPCE.xtc')
+    frame = xtc.read_frame(3)
+    assert frame.step == 3000
+    assert frame.time == pytest.approx(3.0)
+    assert pytest.approx(frame.cell.lengths, abs=1E-4) == [3.0064, 3.0064, 3.0064]
+
+    # random access should give the same result as sequential reading
+    positions = [xtc.read_frame(i).positions.copy() for i in range(xtc.n_frame)]
+    for i in [2, 0, 3, 1]:
+        assert (xtc.read_frame(i).positions == positions[i]).all()
+
+
+def test_read_in_place():
+    xtc = Trajectory.open(cwd + '/files/100-SPCE.xtc')
+    frame = xtc.read_frame(0)
+    positions = frame.positions
+    pos0 = positions.copy()
+    frame = xtc.read_frame(1)
+    assert frame.positions is positions
+    assert not (frame.positions == pos0).all()
+    frame = xtc.read_frame(0)
+    assert frame.positions is positions
+    assert (frame.positions == pos0).all()
+
+
+def test_read_native():
+    # the coordinates are packed in different ways depending on the size of box
+    rng = np.random.default_rng(0)
+    for size in [3, 500, 700, 20000]:
+        tmp = os.path.join(tempdir, 'native-%i.xtc' % size)
+        xtc = Trajectory.open(tmp, 'w')
+        frame = Frame(1000)
+        positions = []
+        for step in range(3):
+            centers = rng.uniform(0, size, (250, 1, 3))
+            frame.positions[:] = (centers + rng.normal(0, 0.1, (250, 4, 3))).reshape(-1, 3)
+            frame.cell.set_box([size, size, size])
+            frame.step = step
+            xtc.write_frame(frame)
+            positions.append(frame.positions.copy())
+        xtc.close()
+
+        xtc = Trajectory.open(tmp)
+        for i in [2, 0, 1]:
+            frame = xtc.read_frame(i)
+            assert frame.step == i
+            assert pytest.approx(frame.positions, rel=1E-6, abs=1E-3) == positions[i]